@@ -454,7 +454,7 @@ class PagesAPIViewSet(BaseAPIViewSet):
             path_components = [component for component in path.split('/') if component]
 
             try:
-                page, _, _ = request.site.root_page.specific.route(request, path_components)
+                page, _, _ = request.site.root_page.route_by_url_path(request, path_components)
             except Http404:
                 return
 
@@ -407,6 +407,9 @@ class PostgresSearchRebuilder:
 
 
 class PostgresSearchAtomicRebuilder(PostgresSearchRebuilder):
+    # Objects are added in a transaction, which other processes can't add to
+    transactional = True
+
     def __init__(self, index):
         super().__init__(index)
         self.transaction = transaction.atomic(using=index.db_alias)
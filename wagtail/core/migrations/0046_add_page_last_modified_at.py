@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0045_assign_unlock_grouppagepermission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='last_modified_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='last modified at'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 import json
 import logging
+import re
 from collections import defaultdict
 from io import StringIO
-from urllib.parse import urlparse
+from urllib.parse import quote, urlparse
 from warnings import warn
 
 from django.conf import settings
@@ -19,18 +20,21 @@ from django.db.models import Case, Q, Value, When
 from django.db.models.functions import Concat, Substr
 from django.http import Http404
 from django.template.response import TemplateResponse
-from django.urls import reverse
+from django.urls import get_script_prefix, get_urlconf, reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
+from django.utils.http import RFC3986_SUBDELIMS
 from django.utils.text import capfirst, slugify
+from django.utils.translation import get_language
 from django.utils.translation import ugettext_lazy as _
 from modelcluster.models import (
     ClusterableModel, get_all_child_m2m_relations, get_all_child_relations)
 from treebeard.mp_tree import MP_Node
 
 from wagtail.core.query import PageQuerySet, TreeQuerySet
+from wagtail.core.rich_text import cache as rich_text_cache
 from wagtail.core.signals import page_published, page_unpublished
-from wagtail.core.sites import get_site_for_hostname
+from wagtail.core.sites import clear_site_cache, get_site_for_hostname
 from wagtail.core.url_routing import RouteResult
 from wagtail.core.utils import WAGTAIL_APPEND_SLASH, camelcase_to_underscore, resolve_model_string
 from wagtail.search import index
@@ -183,6 +187,65 @@ def get_default_page_content_type():
     return ContentType.objects.get_for_model(Page)
 
 
+# Page paths that the 'wagtail_serve' URL pattern is guaranteed to accept
+SERVE_PATH_RE = re.compile(r'^(?:[\w\-]+/)*$')
+
+_serve_path_prefixes = {}
+
+
+def get_serve_path(relative_path):
+    """
+    Return the result of ``reverse('wagtail_serve', args=(relative_path,))``. The URL prefix
+    that the serve view is mounted on is cached per URLconf, script prefix and language, so that
+    generating links to many pages doesn't incur the cost of a ``reverse`` call for each one.
+    """
+    if not SERVE_PATH_RE.match(relative_path):
+        return reverse('wagtail_serve', args=(relative_path,))
+
+    key = (get_urlconf() or settings.ROOT_URLCONF, get_script_prefix(), get_language())
+    try:
+        prefix = _serve_path_prefixes[key]
+    except KeyError:
+        prefix = _serve_path_prefixes[key] = reverse('wagtail_serve', args=('',))
+
+    return prefix + quote(relative_path, safe=RFC3986_SUBDELIMS + '/~:@')
+
+
+def get_urls_for_pages(pages, request=None):
+    """
+    Return a list of URLs for the given pages, as returned by ``page.get_url(request)``.
+
+    Site root paths are fetched once and indexed by path, so each page's site is found with
+    a lookup per level of its ``url_path`` rather than a scan over all sites. The URL parts
+    are also cached on each page, so that subsequent calls to ``get_url``, ``get_full_url``,
+    ``relative_url`` and the ``url`` / ``full_url`` properties don't repeat the work.
+    """
+    pages = list(pages)
+    if not pages:
+        return []
+
+    site_root_paths = pages[0]._get_site_root_paths(request)
+    sites_by_root_path = defaultdict(list)
+    for site_id, root_path, root_url in site_root_paths:
+        sites_by_root_path[root_path].append((site_id, root_path, root_url))
+
+    for page in pages:
+        if request is None:
+            page._wagtail_cached_site_root_paths = site_root_paths
+
+        # Check every ancestor path of the page, longest first, to match the ordering of
+        # site_root_paths (which puts the most specific root path first)
+        possible_sites = []
+        url_path = page.url_path
+        while url_path:
+            possible_sites.extend(sites_by_root_path.get(url_path, []))
+            url_path = url_path[:url_path.rstrip('/').rfind('/') + 1]
+
+        page._cache_url_parts(page._build_url_parts(possible_sites, request), request)
+
+    return [page.get_url(request=request) for page in pages]
+
+
 class BasePageManager(models.Manager):
     def get_queryset(self):
         return self._queryset_class(self.model).order_by('path')
@@ -336,6 +399,14 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
         null=True,
         editable=False
     )
+    # Updated whenever the page is saved or its URL path changes, including on changes
+    # that don't create a revision such as unpublishing and moving
+    last_modified_at = models.DateTimeField(
+        verbose_name=_('last modified at'),
+        null=True,
+        editable=False,
+        auto_now=True
+    )
     live_revision = models.ForeignKey(
         'PageRevision',
         related_name='+',
@@ -414,6 +485,9 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
             # a page without a parent is the tree root, which always has a url_path of '/'
             self.url_path = '/'
 
+        # discard any URL parts cached by get_urls_for_pages, as they're based on the old url_path
+        self.__dict__.pop('_wagtail_cached_url_parts', None)
+
         return self.url_path
 
     @staticmethod
@@ -497,9 +571,11 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
         if update_descendant_url_paths:
             self._update_descendant_url_paths(old_url_path, new_url_path)
 
-        # Check if this is a root page of any sites and clear the 'wagtail_site_root_paths' key if so
+        # Check if this is a root page of any sites and clear the 'wagtail_site_root_paths' key
+        # and the site lookup table (which holds the root page) if so
         if Site.objects.filter(root_page=self).exists():
             cache.delete('wagtail_site_root_paths')
+            clear_site_cache()
 
         # Log
         if is_new:
@@ -604,7 +680,13 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
             .exclude(pk=self.pk)
             .update(url_path=Concat(
                 Value(new_url_path),
-                Substr('url_path', len(old_url_path) + 1))))
+                Substr('url_path', len(old_url_path) + 1)), last_modified_at=timezone.now()))
+
+        # The URLs of this page and all of its descendants have changed
+        if rich_text_cache.is_enabled():
+            rich_text_cache.invalidate_rich_text_cache(
+                'page', Page.objects.filter(path__startswith=self.path).values_list('pk', flat=True)
+            )
 
     #: Return this page in its most specific subclassed form.
     @cached_property
@@ -660,6 +742,43 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
             else:
                 raise Http404
 
+    def route_by_url_path(self, request, path_components):
+        """
+        Equivalent to ``self.specific.route(request, path_components)``, but looks up
+        all pages along the path in a single query on ``url_path`` rather than issuing
+        a query per path component. As soon as a page along the path has a type that
+        overrides ``route`` (such as ``RoutablePageMixin``), routing of the remaining
+        path components is handed over to that page's ``route`` method.
+        """
+        url_paths = [self.url_path]
+        for component in path_components:
+            url_paths.append(url_paths[-1] + component + '/')
+
+        if path_components:
+            pages_by_url_path = {
+                page.url_path: page
+                for page in Page.objects.filter(
+                    path__startswith=self.path, url_path__in=url_paths[1:]
+                )
+            }
+
+        page = self
+        for depth, url_path in enumerate(url_paths):
+            if depth:
+                try:
+                    page = pages_by_url_path[url_path]
+                except KeyError:
+                    raise Http404
+
+            specific_class = page.specific_class
+            if specific_class is not None and specific_class.route is not Page.route:
+                return page.specific.route(request, path_components[depth:])
+
+        if page.live:
+            return RouteResult(page.specific)
+        else:
+            raise Http404
+
     def get_admin_display_title(self):
         """
         Return the title for this page as it should appear in the admin backend;
@@ -818,12 +937,38 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
         when calling ``super``.
         """
 
+        try:
+            return self._wagtail_cached_url_parts[self._get_url_parts_cache_key(request)]
+        except (AttributeError, KeyError):
+            pass
+
         possible_sites = [
             (pk, path, url)
             for pk, path, url in self._get_site_root_paths(request)
             if self.url_path.startswith(path)
         ]
 
+        return self._build_url_parts(possible_sites, request)
+
+    @staticmethod
+    def _get_url_parts_cache_key(request):
+        site = getattr(request, 'site', None)
+        return site.pk if site is not None else None
+
+    def _cache_url_parts(self, url_parts, request=None):
+        """
+        Store the result of the base ``get_url_parts`` implementation for the given request's
+        site (used by ``get_urls_for_pages``).
+        """
+        if not hasattr(self, '_wagtail_cached_url_parts'):
+            self._wagtail_cached_url_parts = {}
+        self._wagtail_cached_url_parts[self._get_url_parts_cache_key(request)] = url_parts
+
+    def _build_url_parts(self, possible_sites, request=None):
+        """
+        Return the ``get_url_parts`` result for this page, given the list of sites whose root
+        page is an ancestor of (or is) this page, most specific root path first.
+        """
         if not possible_sites:
             return None
 
@@ -836,8 +981,7 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
             else:
                 site_id, root_path, root_url = possible_sites[0]
 
-        page_path = reverse(
-            'wagtail_serve', args=(self.url_path[len(root_path):],))
+        page_path = get_serve_path(self.url_path[len(root_path):])
 
         # Remove the trailing slash from the URL reverse generates if
         # WAGTAIL_APPEND_SLASH is False and we're not trying to serve
@@ -928,6 +1072,15 @@ class Page(AbstractPage, index.Indexed, ClusterableModel, metaclass=PageBase):
         content_type = ContentType.objects.get_for_model(cls)
         return super(Page, cls).get_indexed_objects().filter(content_type=content_type)
 
+    @classmethod
+    def get_indexed_objects_modified_since(cls, since):
+        # Pages are modified by saving a revision, by publishing, or by saving them directly
+        # (e.g. when they are unpublished, expire or are moved)
+        return cls.get_indexed_objects().filter(
+            Q(last_modified_at__gte=since) | Q(latest_revision_created_at__gte=since)
+            | Q(last_published_at__gte=since)
+        )
+
     def get_indexed_instance(self):
         # This is accessed on save by the wagtailsearch signal handler, and in edge
         # cases (e.g. loading test fixtures), may be called before the specific instance's
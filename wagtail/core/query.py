@@ -3,9 +3,12 @@ from collections import defaultdict
 
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import CharField, Q
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import DEFERRED, CharField, Q
 from django.db.models.functions import Length, Substr
-from django.db.models.query import BaseIterable
+from django.db.models.query import BaseIterable, ModelIterable
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
 from treebeard.mp_tree import MP_NodeQuerySet
 
 from wagtail.search.queryset import SearchableQuerySetMixin
@@ -341,10 +344,13 @@ class PageQuerySet(SearchableQuerySetMixin, TreeQuerySet):
         This efficiently gets all the specific pages for the queryset, using
         the minimum number of queries.
 
+        Fields that have already been fetched for the queryset's own model are
+        not fetched again; only the remaining specific fields are, with one
+        query per page type.
+
         When the "defer" keyword argument is set to True, only the basic page
-        fields will be loaded and all specific fields will be deferred. It
-        will still generate a query for each page type though (this may be
-        improved to generate only a single query in a future release).
+        fields will be loaded and all specific fields will be deferred, so the
+        specific pages are returned using a single query.
         """
         clone = self._clone()
         if defer:
@@ -353,6 +359,24 @@ class PageQuerySet(SearchableQuerySetMixin, TreeQuerySet):
             clone._iterable_class = SpecificIterable
         return clone
 
+    def iterator(self, chunk_size=2000):
+        """
+        When iterating over the specific pages of a queryset (see ``specific``),
+        pages are fetched and converted in chunks of ``chunk_size``, so that memory
+        use stays constant however many pages there are.
+        """
+        if issubclass(self._iterable_class, SpecificIterable):
+            if chunk_size <= 0:
+                raise ValueError('Chunk size must be strictly positive.')
+
+            # Where the pages can't be fetched by keyset, stream the rows with a server-side
+            # cursor, as Django's own iterator() does
+            use_chunked_fetch = not connections[self.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS')
+            return specific_iterator(
+                self, defer=self._iterable_class.defer, chunked_fetch=use_chunked_fetch, chunk_size=chunk_size)
+
+        return super().iterator(chunk_size=chunk_size)
+
     def in_site(self, site):
         """
         This filters the QuerySet to only contain pages within the specified site.
@@ -360,48 +384,192 @@ class PageQuerySet(SearchableQuerySetMixin, TreeQuerySet):
         return self.descendant_of(site.root_page, inclusive=True)
 
 
-def specific_iterator(qs, defer=False):
+def specific_iterator(qs, defer=False, chunked_fetch=False, chunk_size=None):
     """
     This efficiently iterates all the specific pages in a queryset, using
     the minimum number of queries.
 
+    The rows of the queryset are fetched once, as instances of the queryset's
+    model; the remaining specific fields are then fetched with one query per
+    page type, and combined with the fields that have already been fetched.
+    When ``defer`` is True, the specific fields are deferred instead, so no
+    further queries are made at all.
+
+    If ``chunk_size`` is given, pages are converted and yielded in chunks of
+    that size, so that only one chunk is held in memory at a time. Where the
+    queryset is ordered by its primary key or another unique field (such as
+    ``path``), each chunk is fetched with its own query, filtering on the value
+    of that field for the last page of the previous chunk.
+
     This should be called from ``PageQuerySet.specific``
     """
-    pks_and_types = qs.values_list('pk', 'content_type')
-    pks_by_type = defaultdict(list)
-    for pk, content_type in pks_and_types:
-        pks_by_type[content_type].append(pk)
-
-    # Content types are cached by ID, so this will not run any queries.
-    content_types = {pk: ContentType.objects.get_for_id(pk)
-                     for _, pk in pks_and_types}
-
-    # Get the specific instances of all pages, one model class at a time.
-    pages_by_type = {}
-    for content_type, pks in pks_by_type.items():
-        # look up model class for this content type, falling back on the original
-        # model (i.e. Page) if the more specific one is missing
-        model = content_types[content_type].model_class() or qs.model
-        pages = model.objects.filter(pk__in=pks)
+    annotation_names = list(qs.query.annotation_select)
 
-        if defer:
-            # Defer all specific fields
-            from wagtail.core.models import Page
-            fields = [field.attname for field in Page._meta.get_fields() if field.concrete]
-            pages = pages.only(*fields)
+    if chunk_size and get_keyset_ordering(qs):
+        chunks = keyset_chunks(qs, chunk_size)
+    else:
+        chunks = _chunks(
+            ModelIterable(qs, chunked_fetch=chunked_fetch, chunk_size=chunk_size or GET_ITERATOR_CHUNK_SIZE),
+            chunk_size
+        )
 
-        pages_by_type[content_type] = {page.pk: page for page in pages}
+    for chunk in chunks:
+        yield from _get_specific_pages(chunk, qs.db, defer, annotation_names)
 
-    # Yield all of the pages, in the order they occurred in the original query.
-    for pk, content_type in pks_and_types:
-        yield pages_by_type[content_type][pk]
 
+def get_keyset_ordering(qs):
+    """
+    Return the ordering of the given queryset (for example, ``'path'`` or ``'-pk'``)
+    if it is ordered by a single unique, non-nullable field, or is unordered (in
+    which case ``'pk'`` is returned). Otherwise, return None.
+    """
+    query = qs.query
+    if query.low_mark or query.high_mark is not None or query.combinator or query.distinct_fields:
+        return None
+
+    if query.extra_order_by:
+        return None
+    elif query.order_by:
+        ordering = query.order_by
+    elif query.default_ordering:
+        ordering = qs.model._meta.ordering
+    else:
+        ordering = ()
+
+    if not ordering:
+        return 'pk'
+    elif len(ordering) > 1 or not isinstance(ordering[0], str):
+        return None
+
+    field_name = ordering[0].lstrip('-')
+    if field_name == 'pk':
+        return ordering[0]
+
+    try:
+        field = qs.model._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return None
+
+    if (field.primary_key or field.unique) and not field.null and field.concrete:
+        return ordering[0]
+
+
+def keyset_chunks(qs, chunk_size):
+    """
+    Yield the results of the given queryset, as instances of its model, in lists of
+    up to ``chunk_size`` items. Each chunk is fetched with a separate query, filtered
+    by the value of the ordering field (see ``get_keyset_ordering``) of the last item
+    of the previous chunk; unlike slicing with OFFSET, this stays fast for later chunks,
+    and unlike a database cursor, it does not hold a transaction open.
+    """
+    ordering = get_keyset_ordering(qs)
+    field_name = ordering.lstrip('-')
+    lookup = '%s__%s' % (field_name, 'lt' if ordering.startswith('-') else 'gt')
+    qs = qs.order_by(ordering)
+
+    last_value = None
+    while True:
+        chunk_qs = qs if last_value is None else qs.filter(**{lookup: last_value})
+        chunk = list(ModelIterable(chunk_qs[:chunk_size]))
+        if chunk:
+            yield chunk
+
+        if len(chunk) < chunk_size:
+            return
+
+        last_value = getattr(chunk[-1], field_name)
 
-class SpecificIterable(BaseIterable):
-    def __iter__(self):
-        return specific_iterator(self.queryset)
 
+def _chunks(iterable, chunk_size=None):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if chunk_size and len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _get_specific_pages(pages, db, defer=False, annotation_names=()):
+    """
+    Convert a list of page instances into their most specific forms, reusing
+    the field values that have already been loaded onto them. Pages whose
+    specific class (or specific database row) cannot be found are returned
+    unchanged.
+    """
+    pages_by_type = defaultdict(list)
+    for page in pages:
+        pages_by_type[page.content_type_id].append(page)
+
+    specific_pages = {}
+    for content_type_id, pages_of_type in pages_by_type.items():
+        # Content types are cached by ID, so this will not run any queries.
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        base_model = type(pages_of_type[0])
+        if model is None or model is base_model or not issubclass(model, base_model):
+            continue
+
+        # The fields that are stored in the specific model's own tables (excluding
+        # the links to its parent tables, which are all equal to the primary key)
+        base_field_names = {field.attname for field in base_model._meta.concrete_fields}
+        specific_field_names = [
+            field.attname for field in model._meta.concrete_fields
+            if field.attname not in base_field_names and not (field.remote_field and field.remote_field.parent_link)
+        ]
+
+        pks = [page.pk for page in pages_of_type]
+        if defer or not specific_field_names:
+            specific_values = {pk: {} for pk in pks}
+        else:
+            specific_values = {
+                values['pk']: values
+                for values in model._base_manager.using(db).filter(pk__in=pks).values('pk', *specific_field_names)
+            }
+
+        field_names = [field.attname for field in model._meta.concrete_fields]
+        for page in pages_of_type:
+            try:
+                values = specific_values[page.pk]
+            except KeyError:
+                # The specific database row is missing, so keep the page as it is
+                continue
+
+            field_values = []
+            for field in model._meta.concrete_fields:
+                if field.attname in page.__dict__:
+                    field_values.append(page.__dict__[field.attname])
+                elif field.remote_field and field.remote_field.parent_link:
+                    field_values.append(page.pk)
+                else:
+                    field_values.append(values.get(field.attname, DEFERRED))
+
+            specific_page = model.from_db(db, field_names, field_values)
+
+            # Carry over related objects fetched through select_related, and annotations
+            specific_page._state.fields_cache.update(page._state.fields_cache)
+            for name in annotation_names:
+                setattr(specific_page, name, getattr(page, name))
+
+            specific_pages[page.pk] = specific_page
+
+    return [specific_pages.get(page.pk, page) for page in pages]
+
+
+class SpecificIterable(BaseIterable):
+    defer = False
 
-class DeferredSpecificIterable(BaseIterable):
     def __iter__(self):
-        return specific_iterator(self.queryset, defer=True)
+        # Only convert pages in chunks when iterating with QuerySet.iterator(); otherwise,
+        # the whole result is kept in memory anyway, and a single chunk needs fewest queries
+        return specific_iterator(
+            self.queryset,
+            defer=self.defer,
+            chunked_fetch=self.chunked_fetch,
+            chunk_size=self.chunk_size if self.chunked_fetch else None,
+        )
+
+
+class DeferredSpecificIterable(SpecificIterable):
+    defer = True
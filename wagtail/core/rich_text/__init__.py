@@ -1,6 +1,8 @@
+from django.core.exceptions import ValidationError
 from django.db.models import Model
 from django.utils.safestring import mark_safe
 
+from wagtail.core.rich_text import cache
 from wagtail.core.rich_text.feature_registry import FeatureRegistry
 from wagtail.core.rich_text.rewriters import EmbedRewriter, LinkRewriter, MultiRuleRewriter
 
@@ -15,18 +17,57 @@ features = FeatureRegistry()
 FRONTEND_REWRITER = None
 
 
+def _get_defining_class(handler, attr_name):
+    handler_class = handler if isinstance(handler, type) else type(handler)
+    for cls in handler_class.__mro__:
+        if attr_name in vars(cls):
+            return cls
+    return object
+
+
+def _get_bulk_rules(handlers):
+    # Handlers not derived from EntityHandler may not implement the bulk method, and
+    # subclasses that customise expand_db_attributes or get_instance without also customising
+    # the bulk method would have their customisation skipped by it; in both cases the
+    # rewriter falls back to calling expand_db_attributes once per tag
+    bulk_rules = {}
+    for name, handler in handlers.items():
+        if not hasattr(handler, 'expand_db_attributes_many'):
+            continue
+
+        bulk_class = _get_defining_class(handler, 'expand_db_attributes_many')
+        if all(
+            issubclass(bulk_class, _get_defining_class(handler, attr_name))
+            for attr_name in ['expand_db_attributes', 'get_instance']
+        ):
+            bulk_rules[name] = handler.expand_db_attributes_many
+    return bulk_rules
+
+
 def expand_db_html(html):
     """
     Expand database-representation HTML into proper HTML usable on front-end templates
     """
+    if cache.is_enabled():
+        return cache.get_expanded_html(html, _expand_db_html)
+    return _expand_db_html(html)
+
+
+def _expand_db_html(html):
     global FRONTEND_REWRITER
 
     if FRONTEND_REWRITER is None:
         embed_rules = features.get_embed_types()
         link_rules = features.get_link_types()
         FRONTEND_REWRITER = MultiRuleRewriter([
-            LinkRewriter({linktype: handler.expand_db_attributes for linktype, handler in link_rules.items()}),
-            EmbedRewriter({embedtype: handler.expand_db_attributes for embedtype, handler in embed_rules.items()})
+            LinkRewriter(
+                {linktype: handler.expand_db_attributes for linktype, handler in link_rules.items()},
+                _get_bulk_rules(link_rules)
+            ),
+            EmbedRewriter(
+                {embedtype: handler.expand_db_attributes for embedtype, handler in embed_rules.items()},
+                _get_bulk_rules(embed_rules)
+            ),
         ])
 
     return FRONTEND_REWRITER(html)
@@ -76,6 +117,34 @@ class EntityHandler:
         model = cls.get_model()
         return model._default_manager.get(id=attrs['id'])
 
+    @classmethod
+    def get_pks(cls, attrs_list: list) -> list:
+        """
+        Given a list of attribute dicts, returns the primary key value of the model instance
+        each one refers to. Entries with a missing or invalid id are None.
+        """
+        pk_field = cls.get_model()._meta.pk
+        pks = []
+        for attrs in attrs_list:
+            try:
+                pks.append(pk_field.to_python(attrs['id']))
+            except (KeyError, ValueError, ValidationError):
+                pks.append(None)
+        return pks
+
+    @classmethod
+    def get_many(cls, attrs_list: list, queryset=None) -> list:
+        """
+        Given a list of attribute dicts, returns the corresponding model instances in the same
+        order, fetched in a single query (from `queryset` if given). Entries whose instance
+        does not exist are None.
+        """
+        if queryset is None:
+            queryset = cls.get_model()._default_manager.all()
+        pks = cls.get_pks(attrs_list)
+        instances = queryset.in_bulk([pk for pk in pks if pk is not None])
+        return [instances.get(pk) for pk in pks]
+
     @staticmethod
     def expand_db_attributes(attrs: dict) -> str:
         """
@@ -84,6 +153,15 @@ class EntityHandler:
         """
         raise NotImplementedError
 
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list: list) -> list:
+        """
+        Given a list of attribute dicts for all entity tags of this type within a rich text
+        value, returns the list of real HTML representations in the same order. Handlers
+        that fetch models override this to load all instances at once with get_many.
+        """
+        return [cls.expand_db_attributes(attrs) for attrs in attrs_list]
+
 
 class LinkHandler(EntityHandler):
     pass
@@ -0,0 +1,87 @@
+"""
+Cache for the front-end HTML rendering of rich text, enabled with the WAGTAIL_RICH_TEXT_CACHE
+setting.
+
+Each rendered fragment is stored under a hash of its source, along with the version stamps of
+the objects it refers to (e.g. ``<a linktype="page" id="3">`` depends on page 3) and of the site
+configuration. Invalidating an object replaces its version stamp, so that only the fragments
+referring to it are rendered again on their next use.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from wagtail.core.rich_text.rewriters import FIND_A_TAG, FIND_EMBED_TAG, extract_attrs
+from wagtail.core.sites import SITE_CACHE_VERSION_KEY
+
+FRAGMENT_KEY_PREFIX = 'wagtail_rich_text:'
+DEPENDENCY_KEY_PREFIX = 'wagtail_rich_text_dependency:'
+
+
+def is_enabled():
+    return getattr(settings, 'WAGTAIL_RICH_TEXT_CACHE', False)
+
+
+def get_dependency_key(entity_type, id):
+    return '%s%s:%s' % (DEPENDENCY_KEY_PREFIX, entity_type, id)
+
+
+def get_dependency_keys(html):
+    """
+    Return the keys of the version stamps that the rendering of the given rich text depends on:
+    one per distinct entity referenced by id, plus the site configuration.
+    """
+    keys = {SITE_CACHE_VERSION_KEY}
+    for tag_re, type_attr in [(FIND_A_TAG, 'linktype'), (FIND_EMBED_TAG, 'embedtype')]:
+        for match in tag_re.finditer(html):
+            attrs = extract_attrs(match.group(1))
+            if type_attr in attrs and 'id' in attrs:
+                keys.add(get_dependency_key(attrs[type_attr], attrs['id']))
+    return keys
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing_keys = [key for key in keys if key not in versions]
+    if missing_keys:
+        for key in missing_keys:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing_keys))
+    return versions
+
+
+def get_expanded_html(html, expand):
+    """
+    Return the front-end rendering of the rich text source `html`, as produced by the
+    function `expand`, from the cache if none of its dependencies have changed since it was
+    stored.
+    """
+    if 'linktype=' not in html and 'embedtype=' not in html:
+        # Nothing to look up, so the rendering is as cheap as a cache lookup
+        return expand(html)
+
+    key = FRAGMENT_KEY_PREFIX + hashlib.sha1(html.encode('utf-8')).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        expanded_html, versions = cached
+        if cache.get_many(versions.keys()) == versions:
+            return expanded_html
+
+    # Read the version stamps before rendering, so that an invalidation made while rendering
+    # leaves the stored fragment out of date rather than stale
+    versions = _get_versions(get_dependency_keys(html))
+    expanded_html = expand(html)
+    cache.set(key, (expanded_html, versions), getattr(settings, 'WAGTAIL_RICH_TEXT_CACHE_TIMEOUT', 3600))
+    return expanded_html
+
+
+def invalidate_rich_text_cache(entity_type, ids):
+    """
+    Invalidate the cached renderings of all rich text that refers to any of the objects with
+    the given ids through a ``linktype`` or ``embedtype`` of `entity_type`.
+    """
+    if is_enabled():
+        cache.delete_many([get_dependency_key(entity_type, id) for id in ids])
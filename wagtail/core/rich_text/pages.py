@@ -1,6 +1,6 @@
 from django.utils.html import escape
 
-from wagtail.core.models import Page
+from wagtail.core.models import Page, get_urls_for_pages
 from wagtail.core.rich_text import LinkHandler
 
 
@@ -22,3 +22,19 @@ class PageLinkHandler(LinkHandler):
             return '<a href="%s">' % escape(page.specific.url)
         except Page.DoesNotExist:
             return "<a>"
+
+    @classmethod
+    def get_many(cls, attrs_list, queryset=None):
+        if queryset is None:
+            queryset = Page.objects.all()
+        return super().get_many(attrs_list, queryset.specific(defer=True))
+
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list):
+        pages = cls.get_many(attrs_list)
+        found_pages = [page for page in pages if page is not None]
+        urls = dict(zip(found_pages, get_urls_for_pages(found_pages)))
+        return [
+            '<a href="%s">' % escape(urls[page]) if page is not None else "<a>"
+            for page in pages
+        ]
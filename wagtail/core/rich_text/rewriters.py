@@ -20,73 +20,139 @@ def extract_attrs(attr_string):
     return attributes
 
 
-class EmbedRewriter:
+class TagRewriter:
     """
-    Rewrites <embed embedtype="foo" /> tags within rich text into the HTML fragment given by the
-    embed rule for 'foo'. Each embed rule is a function that takes a dict of attributes and
-    returns the HTML fragment.
+    Base class for rewriters that replace tags matching `tag_re` within rich text. Rewriting
+    happens in two phases: all matching tags are found and grouped by type first, so that each
+    rule can resolve its whole group of tags at once (typically with one database query) via
+    a bulk rule, before the results are substituted back into the HTML.
+
+    `rules` is a dict of type -> function that takes a dict of attributes and returns the
+    replacement HTML; `bulk_rules` is an optional dict of type -> function that takes a list
+    of attribute dicts and returns a list of replacements in the same order.
     """
-    def __init__(self, embed_rules):
-        self.embed_rules = embed_rules
+    tag_re = None
+
+    def __init__(self, rules, bulk_rules=None):
+        self.rules = rules
+        self.bulk_rules = bulk_rules or {}
+
+    def get_tag_type(self, attrs):
+        raise NotImplementedError
+
+    def get_fallback(self, tag_type, match):
+        """
+        Return the replacement for a tag whose type has no registered rule
+        """
+        raise NotImplementedError
 
     def replace_tag(self, match):
         attrs = extract_attrs(match.group(1))
+        tag_type = self.get_tag_type(attrs)
         try:
-            rule = self.embed_rules[attrs['embedtype']]
+            rule = self.rules[tag_type]
         except KeyError:
-            # silently drop any tags with an unrecognised or missing embedtype attribute
-            return ''
+            return self.get_fallback(tag_type, match)
         return rule(attrs)
 
     def __call__(self, html):
-        return FIND_EMBED_TAG.sub(self.replace_tag, html)
+        matches = list(self.tag_re.finditer(html))
+        if not matches:
+            return html
+
+        replacements = [None] * len(matches)
+        tags_by_type = {}
+        for index, match in enumerate(matches):
+            attrs = extract_attrs(match.group(1))
+            tag_type = self.get_tag_type(attrs)
+            if tag_type in self.rules:
+                tags_by_type.setdefault(tag_type, []).append((index, attrs))
+            else:
+                replacements[index] = self.get_fallback(tag_type, match)
+
+        for tag_type, tags in tags_by_type.items():
+            attrs_list = [attrs for index, attrs in tags]
+            bulk_rule = self.bulk_rules.get(tag_type)
+            if bulk_rule is not None:
+                results = bulk_rule(attrs_list)
+            else:
+                rule = self.rules[tag_type]
+                results = [rule(attrs) for attrs in attrs_list]
+            for (index, attrs), result in zip(tags, results):
+                replacements[index] = result
+
+        output = []
+        position = 0
+        for match, replacement in zip(matches, replacements):
+            output.append(html[position:match.start()])
+            output.append(replacement)
+            position = match.end()
+        output.append(html[position:])
+        return ''.join(output)
+
+
+class EmbedRewriter(TagRewriter):
+    """
+    Rewrites <embed embedtype="foo" /> tags within rich text into the HTML fragment given by the
+    embed rule for 'foo'. Each embed rule is a function that takes a dict of attributes and
+    returns the HTML fragment.
+    """
+    tag_re = FIND_EMBED_TAG
+
+    def __init__(self, embed_rules, bulk_rules=None):
+        super().__init__(embed_rules, bulk_rules=bulk_rules)
+
+    @property
+    def embed_rules(self):
+        return self.rules
+
+    def get_tag_type(self, attrs):
+        return attrs.get('embedtype')
 
+    def get_fallback(self, tag_type, match):
+        # silently drop any tags with an unrecognised or missing embedtype attribute
+        return ''
 
-class LinkRewriter:
+
+class LinkRewriter(TagRewriter):
     """
     Rewrites <a linktype="foo"> tags within rich text into the HTML fragment given by the
     rule for 'foo'. Each link rule is a function that takes a dict of attributes and
     returns the HTML fragment for the opening tag (only).
     """
-    def __init__(self, link_rules):
-        self.link_rules = link_rules
+    tag_re = FIND_A_TAG
 
-    def replace_tag(self, match):
-        attrs = extract_attrs(match.group(1))
+    def __init__(self, link_rules, bulk_rules=None):
+        super().__init__(link_rules, bulk_rules=bulk_rules)
+
+    @property
+    def link_rules(self):
+        return self.rules
+
+    def get_tag_type(self, attrs):
         try:
-            link_type = attrs['linktype']
+            return attrs['linktype']
         except KeyError:
-            link_type = None
             href = attrs.get('href', None)
             if href:
                 # From href attribute we try to detect only the linktypes that we
                 # currently support (`external` & `email`, `page` has a default handler)
                 # from the link chooser.
                 if href.startswith(('http:', 'https:')):
-                    link_type = 'external'
+                    return 'external'
                 elif href.startswith('mailto:'):
-                    link_type = 'email'
+                    return 'email'
                 elif href.startswith('#'):
-                    link_type = 'anchor'
-
-            if not link_type:
-                # otherwise return ordinary links without a linktype unchanged
-                return match.group(0)
-
-        try:
-            rule = self.link_rules[link_type]
-        except KeyError:
-            if link_type in ['email', 'external', 'anchor']:
-                # If no rule is registered for supported types
-                # return ordinary links without a linktype unchanged
-                return match.group(0)
-            # unrecognised link type
-            return '<a>'
-
-        return rule(attrs)
-
-    def __call__(self, html):
-        return FIND_A_TAG.sub(self.replace_tag, html)
+                    return 'anchor'
+            return None
+
+    def get_fallback(self, tag_type, match):
+        if tag_type is None or tag_type in ['email', 'external', 'anchor']:
+            # return ordinary links without a linktype, or supported types with
+            # no registered rule, unchanged
+            return match.group(0)
+        # unrecognised link type
+        return '<a>'
 
 
 class MultiRuleRewriter:
@@ -4,17 +4,22 @@ from django.core.cache import cache
 from django.db.models.signals import post_delete, post_save, pre_delete
 
 from wagtail.core.models import Page, Site
+from wagtail.core.rich_text.cache import invalidate_rich_text_cache
+from wagtail.core.signals import page_published, page_unpublished
+from wagtail.core.sites import clear_site_cache
 
 logger = logging.getLogger('wagtail.core')
 
 
-# Clear the wagtail_site_root_paths from the cache whenever Site records are updated.
+# Clear the wagtail_site_root_paths and the site lookup table from the cache whenever Site records are updated.
 def post_save_site_signal_handler(instance, update_fields=None, **kwargs):
     cache.delete('wagtail_site_root_paths')
+    clear_site_cache()
 
 
 def post_delete_site_signal_handler(instance, **kwargs):
     cache.delete('wagtail_site_root_paths')
+    clear_site_cache()
 
 
 def pre_delete_page_unpublish(sender, instance, **kwargs):
@@ -28,9 +33,18 @@ def post_delete_page_log_deletion(sender, instance, **kwargs):
     logger.info("Page deleted: \"%s\" id=%d", instance.title, instance.id)
 
 
+# Invalidate cached rich text renderings that link to a page whenever it changes state
+def page_rich_text_cache_invalidation_signal_handler(instance, **kwargs):
+    invalidate_rich_text_cache('page', [instance.pk])
+
+
 def register_signal_handlers():
     post_save.connect(post_save_site_signal_handler, sender=Site)
     post_delete.connect(post_delete_site_signal_handler, sender=Site)
 
     pre_delete.connect(pre_delete_page_unpublish, sender=Page)
     post_delete.connect(post_delete_page_log_deletion, sender=Page)
+
+    page_published.connect(page_rich_text_cache_invalidation_signal_handler)
+    page_unpublished.connect(page_rich_text_cache_invalidation_signal_handler)
+    post_delete.connect(page_rich_text_cache_invalidation_signal_handler, sender=Page)
@@ -1,4 +1,8 @@
+import uuid
+
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Case, IntegerField, Q, When
 
 MATCH_HOSTNAME_PORT = 0
@@ -7,8 +11,83 @@ MATCH_DEFAULT = 2
 MATCH_HOSTNAME = 3
 
 
+SITE_CACHE_VERSION_KEY = 'wagtail_site_cache_version'
+
+# Per-process lookup table of all sites, tagged with the version stamp (held in
+# Django's cache) it was built from, so that changes made by any process are noticed
+_site_cache = {
+    'version': None,
+    'sites_by_hostname': None,
+    'default_site': None,
+}
+
+
+def clear_site_cache():
+    """
+    Invalidate the site lookup table in this process, and (through the shared
+    version stamp) in every other process using the same cache backend.
+    """
+    _site_cache['version'] = None
+    cache.delete(SITE_CACHE_VERSION_KEY)
+
+
+def _get_site_lookup():
+    version = cache.get(SITE_CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(SITE_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SITE_CACHE_VERSION_KEY)
+
+    if version is None or version != _site_cache['version']:
+        Site = apps.get_model('wagtailcore.Site')
+
+        sites_by_hostname = {}
+        default_site = None
+        for site in Site.objects.select_related('root_page').order_by('hostname', 'port'):
+            sites_by_hostname.setdefault(site.hostname, []).append(site)
+            if site.is_default_site:
+                default_site = site
+
+        _site_cache.update({
+            'version': version,
+            'sites_by_hostname': sites_by_hostname,
+            'default_site': default_site,
+        })
+
+    return _site_cache['sites_by_hostname'], _site_cache['default_site']
+
+
+def _get_cached_site_for_hostname(hostname, port):
+    # Mirrors the matching rules of the database query in get_site_for_hostname
+    sites_by_hostname, default_site = _get_site_lookup()
+    hostname_matches = sites_by_hostname.get(hostname, [])
+
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        pass
+
+    for site in hostname_matches:
+        if site.port == port:
+            return site
+
+    for site in hostname_matches:
+        if site.is_default_site:
+            return site
+
+    if len(hostname_matches) == 1:
+        return hostname_matches[0]
+
+    if default_site is not None:
+        return default_site
+
+    raise apps.get_model('wagtailcore.Site').DoesNotExist()
+
+
 def get_site_for_hostname(hostname, port):
     """Return the wagtailcore.Site object for the given hostname and port."""
+    if getattr(settings, 'WAGTAIL_SITE_CACHE', False):
+        return _get_cached_site_for_hostname(hostname, port)
+
     Site = apps.get_model('wagtailcore.Site')
 
     sites = list(Site.objects.annotate(match=Case(
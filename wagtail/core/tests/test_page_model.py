@@ -11,9 +11,11 @@ from django.http import Http404, HttpRequest
 from django.test import Client, TestCase
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from django.urls import reverse
 from freezegun import freeze_time
 
-from wagtail.core.models import Page, PageManager, Site, get_page_models
+from wagtail.core.models import (
+    Page, PageManager, Site, get_page_models, get_serve_path, get_urls_for_pages)
 from wagtail.tests.testapp.models import (
     AbstractPage, Advert, AlwaysShowInMenusPage, BlogCategory, BlogCategoryBlogPage, BusinessChild,
     BusinessIndex, BusinessNowherePage, BusinessSubIndex, CustomManager, CustomManagerPage,
@@ -365,6 +367,56 @@ class TestRouting(TestCase):
         with self.assertRaises(Http404):
             homepage.route(request, ['events', 'tentative-unpublished-event'])
 
+    def test_route_by_url_path(self):
+        homepage = Page.objects.get(url_path='/home/')
+        event_page = EventPage.objects.get(url_path='/home/secret-plans/steal-underpants/')
+
+        request = HttpRequest()
+        request.path = '/secret-plans/steal-underpants/'
+
+        # one query to find the pages along the path, one to fetch the specific page
+        with self.assertNumQueries(2):
+            (found_page, args, kwargs) = homepage.route_by_url_path(request, ['secret-plans', 'steal-underpants'])
+        self.assertEqual(found_page, event_page)
+        self.assertIsInstance(found_page, EventPage)
+
+        (found_page, args, kwargs) = homepage.route_by_url_path(request, [])
+        self.assertEqual(found_page, homepage)
+
+    def test_route_by_url_path_to_unknown_page_returns_404(self):
+        homepage = Page.objects.get(url_path='/home/')
+
+        request = HttpRequest()
+        request.path = '/events/quinquagesima/'
+        with self.assertRaises(Http404):
+            homepage.route_by_url_path(request, ['events', 'quinquagesima'])
+
+        # pages outside of the starting page are not reachable
+        events_page = Page.objects.get(url_path='/home/events/')
+        with self.assertRaises(Http404):
+            events_page.route_by_url_path(request, ['about-us'])
+
+    def test_route_by_url_path_to_unpublished_page_returns_404(self):
+        homepage = Page.objects.get(url_path='/home/')
+
+        request = HttpRequest()
+        request.path = '/events/tentative-unpublished-event/'
+        with self.assertRaises(Http404):
+            homepage.route_by_url_path(request, ['events', 'tentative-unpublished-event'])
+
+    def test_route_by_url_path_defers_to_overridden_route(self):
+        homepage = Page.objects.get(url_path='/home/')
+        saint_patrick_page = SingleEventPage.objects.get(url_path='/home/events/saint-patrick/')
+
+        request = HttpRequest()
+        request.path = '/events/saint-patrick/pointless-suffix/'
+
+        # SingleEventPage overrides route to accept a 'pointless-suffix' path component
+        (found_page, args, kwargs) = homepage.route_by_url_path(
+            request, ['events', 'saint-patrick', 'pointless-suffix']
+        )
+        self.assertEqual(found_page, saint_patrick_page)
+
     # Override CACHES so we don't generate any cache-related SQL queries (tests use DatabaseCache
     # otherwise) and so cache.get will always return None.
     @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
@@ -393,6 +445,71 @@ class TestRouting(TestCase):
         with self.assertNumQueries(0):
             self.assertEqual(christmas_page.get_url(request=request), '/events/christmas/')
 
+    def test_get_urls_for_pages(self):
+        pages = list(Page.objects.filter(live=True).order_by('path'))
+        expected_urls = [page.get_url() for page in Page.objects.filter(live=True).order_by('path')]
+
+        self.assertEqual(get_urls_for_pages(pages), expected_urls)
+        self.assertEqual(get_urls_for_pages([]), [])
+
+    def test_get_urls_for_pages_with_multiple_sites(self):
+        events_page = Page.objects.get(url_path='/home/events/')
+        events_site = Site.objects.create(hostname='events.example.com', root_page=events_page)
+        Site.objects.create(hostname='second_events.example.com', root_page=events_page)
+        default_site = Site.objects.get(is_default_site=True)
+
+        homepage = Page.objects.get(url_path='/home/')
+        christmas_page = Page.objects.get(url_path='/home/events/christmas/')
+        saint_patrick_page = SingleEventPage.objects.get(url_path='/home/events/saint-patrick/')
+
+        self.assertEqual(
+            get_urls_for_pages([homepage, christmas_page, saint_patrick_page]),
+            [
+                'http://localhost/',
+                'http://events.example.com/christmas/',
+                # overridden get_url_parts methods are respected
+                'http://events.example.com/saint-patrick/pointless-suffix/',
+            ]
+        )
+        self.assertEqual(christmas_page.full_url, 'http://events.example.com/christmas/')
+        self.assertEqual(christmas_page.relative_url(events_site), '/christmas/')
+
+        # the request's site is preferred where the page is reachable from several sites
+        request = HttpRequest()
+        request.site = default_site
+        self.assertEqual(
+            get_urls_for_pages([homepage, christmas_page], request=request),
+            ['/', '/events/christmas/']
+        )
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_get_urls_for_pages_caches_url_parts(self):
+        pages = list(Page.objects.filter(url_path__startswith='/home/events/'))
+
+        # a single query fetches the site root paths
+        with self.assertNumQueries(1):
+            urls = get_urls_for_pages(pages)
+        self.assertIn('/events/christmas/', urls)
+
+        # subsequent lookups of the URLs do no further work
+        with self.assertNumQueries(0):
+            self.assertEqual([page.url for page in pages], urls)
+
+        # changes to url_path invalidate the cached URL
+        christmas_page = next(page for page in pages if page.slug == 'christmas')
+        christmas_page.slug = 'xmas'
+        christmas_page.set_url_path(christmas_page.get_parent())
+        self.assertEqual(christmas_page.url, '/events/xmas/')
+
+    def test_get_serve_path(self):
+        self.assertEqual(get_serve_path(''), '/')
+        self.assertEqual(get_serve_path('events/christmas/'), '/events/christmas/')
+        self.assertEqual(get_serve_path('événements/'), reverse('wagtail_serve', args=('événements/',)))
+
+    @override_settings(ROOT_URLCONF='wagtail.tests.non_root_urls')
+    def test_get_serve_path_with_non_root_urlconf(self):
+        self.assertEqual(get_serve_path('events/christmas/'), '/site/events/christmas/')
+
 
 class TestServeView(TestCase):
     fixtures = ['test.json']
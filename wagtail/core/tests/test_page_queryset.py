@@ -1,6 +1,12 @@
+from unittest import mock
+
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.db.models import Q
+from django.db.models.functions import Length
+from django.db.models.query import ModelIterable
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from wagtail.core.models import Page, PageViewRestriction, Site
 from wagtail.core.signals import page_unpublished
@@ -612,6 +618,74 @@ class TestSpecificQuery(TestCase):
         self.assertIn(Page.objects.get(url_path='/home/events/').specific, pages)
         self.assertIn(Page.objects.get(url_path='/home/about-us/').specific, pages)
 
+    def test_specific_reuses_fetched_fields(self):
+        # Fields that have already been fetched for the base queryset are not fetched again
+        with CaptureQueriesContext(connection) as queries:
+            pages = list(Page.objects.filter(url_path__startswith='/home/events/').specific())
+
+        self.assertEqual(len(queries), 3)
+        for query in queries[1:]:
+            self.assertNotIn('wagtailcore_page', query['sql'])
+
+        self.assertEqual(pages, [
+            page.specific for page in Page.objects.filter(url_path__startswith='/home/events/')
+        ])
+        christmas_page = pages[1]
+        self.assertIsInstance(christmas_page, EventPage)
+        with self.assertNumQueries(0):
+            self.assertEqual(christmas_page.title, "Christmas")
+            self.assertEqual(christmas_page.location, "The North Pole")
+            self.assertEqual(christmas_page.page_ptr_id, christmas_page.id)
+
+    def test_specific_keeps_annotations_and_select_related(self):
+        pages = list(
+            Page.objects.filter(url_path='/home/events/christmas/')
+            .annotate(url_path_length=Length('url_path')).select_related('owner').specific()
+        )
+
+        self.assertIsInstance(pages[0], EventPage)
+        self.assertEqual(pages[0].url_path_length, len('/home/events/christmas/'))
+        with self.assertNumQueries(0):
+            pages[0].owner
+
+    def test_specific_in_chunks(self):
+        root = Page.objects.get(url_path='/home/')
+        expected_pages = list(root.get_descendants().specific())
+
+        # Each chunk of two pages is fetched with its own query, then converted with
+        # one query per page type found within it
+        with self.assertNumQueries(9):
+            pages = list(root.get_descendants().specific().iterator(chunk_size=2))
+
+        self.assertEqual(pages, expected_pages)
+        self.assertEqual([type(page) for page in pages], [type(page) for page in expected_pages])
+
+        # Chunks are fetched by filtering on the ordering field rather than with OFFSET
+        with CaptureQueriesContext(connection) as queries:
+            list(root.get_descendants().order_by('-path').specific(defer=True).iterator(chunk_size=3))
+        self.assertEqual(len(queries), 3)
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'])
+        self.assertIn('"wagtailcore_page"."path" <', queries[1]['sql'])
+
+    def test_specific_in_chunks_with_other_ordering(self):
+        expected_pages = list(Page.objects.order_by('title').specific())
+
+        # Ordering on a non-unique field can't be used to find the next chunk,
+        # so the pages are streamed from a single query instead
+        with mock.patch('wagtail.core.query.ModelIterable', wraps=ModelIterable) as model_iterable:
+            pages = list(Page.objects.order_by('title').specific().iterator(chunk_size=2))
+        self.assertEqual(pages, expected_pages)
+        self.assertTrue(model_iterable.call_args[1]['chunked_fetch'])
+
+        # Slicing is respected too
+        pages = list(Page.objects.order_by('path')[1:5].specific().iterator(chunk_size=2))
+        self.assertEqual(pages, list(Page.objects.order_by('path')[1:5].specific()))
+
+    def test_specific_in_chunks_requires_positive_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(Page.objects.specific().iterator(chunk_size=0))
+
     def test_specific_gracefully_handles_missing_models(self):
         # 3567 - PageQuerySet.specific should gracefully handle pages whose class definition
         # is missing, by keeping them as basic Page instances.
@@ -636,11 +710,9 @@ class TestSpecificQuery(TestCase):
             # The query should be lazy.
             qs = root.get_descendants().specific(defer=True)
 
-        with self.assertNumQueries(4):
-            # This still performs 4 queries (one for each specific class)
-            # even though we're only pulling in fields from the base Page
-            # model.
-            # TODO: Find a way to make this perform a single query
+        with self.assertNumQueries(1):
+            # As we're only pulling in fields from the base Page model, the
+            # specific pages are built from a single query
             pages = list(qs)
 
         self.assertIsInstance(pages, list)
@@ -1,11 +1,14 @@
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-from wagtail.core.rich_text import RichText, expand_db_html
+from wagtail.core.models import Page
+from wagtail.core.rich_text import LinkHandler, RichText, _get_bulk_rules, expand_db_html
 from wagtail.core.rich_text.feature_registry import FeatureRegistry
 from wagtail.core.rich_text.pages import PageLinkHandler
 from wagtail.core.rich_text.rewriters import LinkRewriter, extract_attrs
+from wagtail.tests.testapp.models import AdvertWithCustomPrimaryKey, AdvertWithCustomUUIDPrimaryKey
 
 
 class TestPageLinktypeHandler(TestCase):
@@ -19,6 +22,82 @@ class TestPageLinktypeHandler(TestCase):
         result = PageLinkHandler.expand_db_attributes({'id': 1})
         self.assertEqual(result, '<a href="None">')
 
+    def test_expand_db_attributes_many(self):
+        result = PageLinkHandler.expand_db_attributes_many([
+            {'id': 3}, {'id': 0}, {'id': 4}, {'id': 3}, {'id': 'foo'}
+        ])
+        self.assertEqual(result, [
+            '<a href="/events/">', '<a>', '<a href="/events/christmas/">', '<a href="/events/">', '<a>'
+        ])
+
+
+class TestEntityHandlerGetMany(TestCase):
+    def get_handler(self, model):
+        class AdvertLinkHandler(LinkHandler):
+            @staticmethod
+            def get_model():
+                return model
+
+        return AdvertLinkHandler
+
+    def test_char_primary_key(self):
+        advert = AdvertWithCustomPrimaryKey.objects.create(advert_id='summer-sale', text="Sale")
+        handler = self.get_handler(AdvertWithCustomPrimaryKey)
+
+        self.assertEqual(
+            handler.get_many([{'id': 'summer-sale'}, {'id': 'winter-sale'}, {}]), [advert, None, None])
+
+    def test_uuid_primary_key(self):
+        advert = AdvertWithCustomUUIDPrimaryKey.objects.create(text="Sale")
+        handler = self.get_handler(AdvertWithCustomUUIDPrimaryKey)
+
+        self.assertEqual(
+            handler.get_many([{'id': str(advert.pk)}, {'id': 'not-a-uuid'}]), [advert, None])
+
+
+class TestGetBulkRules(TestCase):
+    fixtures = ['test.json']
+
+    def test_handler_with_bulk_method(self):
+        class CustomPageLinkHandler(PageLinkHandler):
+            pass
+
+        self.assertIn('page', _get_bulk_rules({'page': CustomPageLinkHandler}))
+
+    def test_subclass_overriding_expand_db_attributes(self):
+        class CustomPageLinkHandler(PageLinkHandler):
+            @classmethod
+            def expand_db_attributes(cls, attrs):
+                return '<a class="custom">'
+
+        self.assertEqual(_get_bulk_rules({'page': CustomPageLinkHandler}), {})
+
+        # The override is used for every link
+        rewriter = LinkRewriter(
+            {'page': CustomPageLinkHandler.expand_db_attributes},
+            _get_bulk_rules({'page': CustomPageLinkHandler})
+        )
+        self.assertEqual(
+            rewriter('<a linktype="page" id="3">a</a><a linktype="page" id="4">b</a>'),
+            '<a class="custom">a</a><a class="custom">b</a>'
+        )
+
+    def test_subclass_overriding_get_instance(self):
+        class CustomPageLinkHandler(PageLinkHandler):
+            @classmethod
+            def get_instance(cls, attrs):
+                return super().get_instance(attrs)
+
+        self.assertEqual(_get_bulk_rules({'page': CustomPageLinkHandler}), {})
+
+    def test_handler_without_bulk_method(self):
+        class OtherHandler:
+            @staticmethod
+            def expand_db_attributes(attrs):
+                return '<a>'
+
+        self.assertEqual(_get_bulk_rules({'other': OtherHandler}), {})
+
 
 class TestExtractAttrs(TestCase):
     def test_extract_attr(self):
@@ -47,6 +126,91 @@ class TestExpandDbHtml(TestCase):
         self.assertIn('test html', result)
 
 
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class TestExpandDbHtmlWithManyLinks(TestCase):
+    fixtures = ['test.json']
+
+    def test_page_links_are_fetched_together(self):
+        html = ''.join(
+            '<p><a linktype="page" id="%d">link</a></p>' % page_id
+            for page_id in [3, 4, 5, 6, 9, 12, 3]
+        )
+        # Warm the site root paths cache, which is shared by all rich text rendering
+        expand_db_html('<a linktype="page" id="2">')
+
+        with self.assertNumQueries(1):
+            result = expand_db_html(html)
+
+        self.assertIn('<a href="/events/">link</a>', result)
+        self.assertIn('<a href="/events/christmas/">link</a>', result)
+        self.assertEqual(result.count('<a href="/events/">'), 2)
+
+
+@override_settings(
+    WAGTAIL_RICH_TEXT_CACHE=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestRichTextCache(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        cache.clear()
+        self.html = '<p><a linktype="page" id="4">Christmas</a></p>'
+
+    def test_cached_rendering_needs_no_queries(self):
+        result = expand_db_html(self.html)
+        self.assertEqual(result, '<p><a href="/events/christmas/">Christmas</a></p>')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(expand_db_html(self.html), result)
+
+    def test_text_without_references_is_not_cached(self):
+        expand_db_html('<p>Hello world</p>')
+        self.assertEqual(cache._cache, {})
+
+    def test_publishing_linked_page_invalidates(self):
+        expand_db_html(self.html)
+
+        christmas = Page.objects.get(id=4).specific
+        christmas.slug = 'xmas'
+        christmas.save_revision().publish()
+
+        self.assertEqual(expand_db_html(self.html), '<p><a href="/events/xmas/">Christmas</a></p>')
+
+    def test_unpublishing_linked_page_invalidates(self):
+        expand_db_html(self.html)
+        Page.objects.get(id=4).unpublish()
+
+        with self.assertNumQueries(1):
+            expand_db_html(self.html)
+
+    def test_publishing_other_page_does_not_invalidate(self):
+        expand_db_html(self.html)
+        Page.objects.get(id=5).specific.save_revision().publish()
+
+        with self.assertNumQueries(0):
+            expand_db_html(self.html)
+
+    def test_moving_ancestor_invalidates(self):
+        expand_db_html(self.html)
+
+        events_index = Page.objects.get(url_path='/home/events/')
+        about_us = Page.objects.get(url_path='/home/about-us/')
+        events_index.move(about_us, pos='last-child')
+
+        self.assertEqual(
+            expand_db_html(self.html), '<p><a href="/about-us/events/christmas/">Christmas</a></p>'
+        )
+
+    def test_deleting_linked_page_invalidates(self):
+        expand_db_html(self.html)
+        Page.objects.get(id=4).delete()
+
+        self.assertEqual(expand_db_html(self.html), '<p><a>Christmas</a></p>')
+
+
 class TestRichTextValue(TestCase):
     fixtures = ['test.json']
 
@@ -159,3 +323,26 @@ class TestLinkRewriterTagReplacing(TestCase):
         # Also call the rule if a custom linktype is mentioned.
         link_with_custom_linktype = rewriter('<a linktype="custom" href="tel:+4917640206387">')
         self.assertEqual(link_with_custom_linktype, '<a data-phone="true" href="tel:+4917640206387">')
+
+    def test_bulk_rules_are_called_once_per_type(self):
+        calls = []
+
+        def bulk_page_rule(attrs_list):
+            calls.append([attrs['id'] for attrs in attrs_list])
+            return ['<a href="/article/{}">'.format(attrs['id']) for attrs in attrs_list]
+
+        rules = {
+            'page': lambda attrs: '<a href="/single/{}">'.format(attrs['id']),
+        }
+        rewriter = LinkRewriter(rules, {'page': bulk_page_rule})
+
+        result = rewriter(
+            '<a linktype="page" id="3">one</a> <a href="#test">two</a> '
+            '<a linktype="custom">three</a> <a linktype="page" id="4">four</a>'
+        )
+        self.assertEqual(
+            result,
+            '<a href="/article/3">one</a> <a href="#test">two</a> '
+            '<a>three</a> <a href="/article/4">four</a>'
+        )
+        self.assertEqual(calls, [['3', '4']])
@@ -3,6 +3,7 @@ from django.http.request import HttpRequest
 from django.test import TestCase, override_settings
 
 from wagtail.core.models import Page, Site
+from wagtail.core.sites import clear_site_cache
 
 
 class TestSiteNaturalKey(TestCase):
@@ -145,3 +146,83 @@ class TestGetSiteRootPaths(TestCase):
         # Followed by entries for others in 'host' alphabetical order
         self.assertEqual(result[1][0], self.abc_site.id)
         self.assertEqual(result[2][0], self.def_site.id)
+
+
+@override_settings(
+    WAGTAIL_SITE_CACHE=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    ALLOWED_HOSTS=['localhost', 'events.example.com', 'about.example.com', 'unknown.site.com'],
+)
+class TestSiteCache(TestCase):
+    fixtures = ['test.json']
+
+    def setUp(self):
+        clear_site_cache()
+        self.default_site = Site.objects.get(is_default_site=True)
+        events_page = Page.objects.get(url_path='/home/events/')
+        about_page = Page.objects.get(url_path='/home/about-us/')
+        self.events_site = Site.objects.create(hostname='events.example.com', root_page=events_page)
+        self.alternate_port_events_site = Site.objects.create(
+            hostname='events.example.com',
+            root_page=events_page,
+            port=8765
+        )
+        self.about_site = Site.objects.create(hostname='about.example.com', root_page=about_page)
+
+    def tearDown(self):
+        clear_site_cache()
+
+    def find_site(self, hostname, port):
+        request = HttpRequest()
+        request.META = {'HTTP_HOST': hostname, 'SERVER_PORT': port}
+        return Site.find_for_request(request)
+
+    def test_matching_rules(self):
+        self.assertEqual(self.find_site('events.example.com', '80'), self.events_site)
+        self.assertEqual(self.find_site('events.example.com', '8765'), self.alternate_port_events_site)
+        self.assertEqual(self.find_site('about.example.com', '8000'), self.about_site)
+        self.assertEqual(self.find_site('events.example.com', '8000'), self.default_site)
+        self.assertEqual(self.find_site('unknown.site.com', '80'), self.default_site)
+
+    def test_no_queries_once_warm(self):
+        self.find_site('events.example.com', '80')
+
+        with self.assertNumQueries(0):
+            site = self.find_site('events.example.com', '80')
+            self.assertEqual(site, self.events_site)
+            self.assertEqual(site.root_page.url_path, '/home/events/')
+
+    def test_invalidated_on_site_save(self):
+        self.assertEqual(self.find_site('about.example.com', '80'), self.about_site)
+
+        self.about_site.hostname = 'unknown.site.com'
+        self.about_site.save()
+
+        self.assertEqual(self.find_site('about.example.com', '80'), self.default_site)
+        self.assertEqual(self.find_site('unknown.site.com', '80'), self.about_site)
+
+    def test_invalidated_on_site_delete(self):
+        self.assertEqual(self.find_site('about.example.com', '80'), self.about_site)
+
+        self.about_site.delete()
+
+        self.assertEqual(self.find_site('about.example.com', '80'), self.default_site)
+
+    def test_invalidated_on_root_page_save(self):
+        self.find_site('about.example.com', '80')
+
+        about_page = self.about_site.root_page
+        about_page.title = "About Us (changed)"
+        about_page.save()
+
+        site = self.find_site('about.example.com', '80')
+        self.assertEqual(site.root_page.title, "About Us (changed)")
+
+    def test_no_default_site(self):
+        self.default_site.delete()
+
+        self.assertEqual(self.find_site('about.example.com', '8000'), self.about_site)
+        with self.assertRaises(Site.DoesNotExist):
+            self.find_site('events.example.com', '8000')
+        with self.assertRaises(Site.DoesNotExist):
+            self.find_site('unknown.site.com', '80')
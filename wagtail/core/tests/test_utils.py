@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*
+import hashlib
+from io import BytesIO
+from unittest import mock
+
 from django.test import TestCase
 from django.utils.text import slugify
 
-from wagtail.core.utils import accepts_kwarg, cautious_slugify
+from wagtail.core.utils import accepts_kwarg, cautious_slugify, hash_filelike
 
 
 class TestCautiousSlugify(TestCase):
@@ -50,3 +54,21 @@ class TestAcceptsKwarg(TestCase):
         self.assertFalse(accepts_kwarg(func_without_banana, 'banana'))
         self.assertTrue(accepts_kwarg(func_with_banana, 'banana'))
         self.assertTrue(accepts_kwarg(func_with_kwargs, 'banana'))
+
+
+class TestHashFilelike(TestCase):
+    def test_hash_filelike(self):
+        contents = b'wagtail' * 100000
+        f = BytesIO(contents)
+        f.seek(100)
+
+        with mock.patch.object(f, 'read', wraps=f.read) as read:
+            file_hash = hash_filelike(f)
+
+        self.assertEqual(file_hash, hashlib.sha1(contents).hexdigest())
+        # The file is read in chunks, and left at the start
+        self.assertGreater(read.call_count, 2)
+        self.assertEqual(f.tell(), 0)
+
+    def test_empty_file(self):
+        self.assertEqual(hash_filelike(BytesIO()), hashlib.sha1().hexdigest())
@@ -1,3 +1,4 @@
+import hashlib
 import inspect
 import re
 import unicodedata
@@ -10,6 +11,8 @@ from django.utils.text import slugify
 
 WAGTAIL_APPEND_SLASH = getattr(settings, 'WAGTAIL_APPEND_SLASH', True)
 
+HASH_CHUNK_SIZE = 64 * 1024
+
 
 def camelcase_to_underscore(str):
     # https://djangosnippets.org/snippets/585/
@@ -115,3 +118,20 @@ def filename_to_human_readable(string):
     string = re.sub(r'\.[a-zA-Z]+$', '', string)
     string = re.sub(r'[_\-]', ' ', string)
     return string
+
+
+def hash_filelike(filelike):
+    """
+    Return the SHA-1 hash of the contents of a binary file-like object as a hex string. The
+    file is read in chunks from the start, so memory use doesn't grow with the size of the
+    file, and is left at the start afterwards.
+    """
+    hasher = hashlib.sha1()
+    filelike.seek(0)
+    while True:
+        chunk = filelike.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+    filelike.seek(0)
+    return hasher.hexdigest()
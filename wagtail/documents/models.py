@@ -12,6 +12,7 @@ from taggit.managers import TaggableManager
 
 from wagtail.admin.models import get_object_usage
 from wagtail.core.models import CollectionMember
+from wagtail.core.utils import hash_filelike
 from wagtail.search import index
 from wagtail.search.queryset import SearchableQuerySetMixin
 from wagtail.utils.deprecation import RemovedInWagtail210Warning
@@ -111,13 +112,17 @@ class AbstractDocument(CollectionMember, index.Indexed, models.Model):
 
         return self.file_size
 
-    def _set_file_hash(self, file_contents):
-        self.file_hash = hashlib.sha1(file_contents).hexdigest()
+    def _set_file_hash(self, file_contents=None):
+        if file_contents is None:
+            # Read the file in chunks, rather than loading all of it into memory
+            self.file_hash = hash_filelike(self.file)
+        else:
+            self.file_hash = hashlib.sha1(file_contents).hexdigest()
 
     def get_file_hash(self):
         if self.file_hash == '':
             with self.open_file() as f:
-                self._set_file_hash(f.read())
+                self.file_hash = hash_filelike(f)
 
             self.save(update_fields=['file_hash'])
 
@@ -1,6 +1,7 @@
 from django.db import transaction
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 
+from wagtail.core.rich_text.cache import invalidate_rich_text_cache
 from wagtail.documents import get_document_model
 
 
@@ -9,6 +10,12 @@ def post_delete_file_cleanup(instance, **kwargs):
     transaction.on_commit(lambda: instance.file.delete(False))
 
 
+def rich_text_cache_invalidation(instance, **kwargs):
+    invalidate_rich_text_cache('document', [instance.pk])
+
+
 def register_signal_handlers():
     Document = get_document_model()
     post_delete.connect(post_delete_file_cleanup, sender=Document)
+    post_save.connect(rich_text_cache_invalidation, sender=Document)
+    post_delete.connect(rich_text_cache_invalidation, sender=Document)
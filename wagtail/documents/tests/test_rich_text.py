@@ -57,3 +57,8 @@ class TestFrontendDocumentLinkHandler(TestCase):
     def test_expand_db_attributes_with_missing_id(self):
         result = FrontendDocumentLinkHandler.expand_db_attributes({})
         self.assertEqual(result, '<a>')
+
+    def test_expand_db_attributes_many(self):
+        with self.assertNumQueries(1):
+            result = FrontendDocumentLinkHandler.expand_db_attributes_many([{'id': 1}, {'id': 0}, {}, {'id': 1}])
+        self.assertEqual(result, ['<a href="/documents/1/test.pdf">', '<a>', '<a>', '<a href="/documents/1/test.pdf">'])
@@ -201,6 +201,42 @@ class TestServeViewWithSendfile(TestCase):
         self.assertEqual(response['X-Accel-Redirect'], os.path.join(settings.MEDIA_URL, self.document.file.name))
 
 
+@override_settings(
+    WAGTAILDOCS_SERVE_METHOD=None,
+    SENDFILE_BACKEND='wagtail.utils.sendfile_accel_backend',
+    WAGTAIL_SENDFILE_PATH_MAP={settings.MEDIA_ROOT: '/protected-media/'},
+)
+class TestServeViewWithSendfileAccelBackend(TestCase):
+    def setUp(self):
+        from wagtail.utils.sendfile import _get_sendfile
+        _get_sendfile.clear()
+        self.addCleanup(_get_sendfile.clear)
+
+        self.document = models.Document(title="Test document")
+        self.document.file.save('example.doc', ContentFile("A boring example document"))
+
+    def tearDown(self):
+        self.document.file.delete()
+
+    def get(self):
+        return self.client.get(reverse('wagtaildocs_serve', args=(self.document.id, self.document.filename)))
+
+    def test_x_accel_redirect(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.file.name)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="%s"' % self.document.filename)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(WAGTAIL_SENDFILE_HEADER='X-Sendfile', WAGTAIL_SENDFILE_PATH_MAP={})
+    def test_x_sendfile(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], self.document.file.path)
+
+
 @override_settings(WAGTAILDOCS_SERVE_METHOD=None)
 class TestServeWithUnicodeFilename(TestCase):
     def setUp(self):
@@ -103,9 +103,7 @@ def add(request):
             doc.file_size = doc.file.size
 
             # Set new document file hash
-            doc.file.seek(0)
-            doc._set_file_hash(doc.file.read())
-            doc.file.seek(0)
+            doc._set_file_hash()
 
             form.save()
 
@@ -145,9 +143,7 @@ def edit(request, document_id):
                 doc.file_size = doc.file.size
 
                 # Set new document file hash
-                doc.file.seek(0)
-                doc._set_file_hash(doc.file.read())
-                doc.file.seek(0)
+                doc._set_file_hash()
                 doc.save()
 
                 # If providing a new document file, delete the old one.
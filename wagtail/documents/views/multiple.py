@@ -56,9 +56,7 @@ def add(request):
             doc.file_size = doc.file.size
 
             # Set new document file hash
-            doc.file.seek(0)
-            doc._set_file_hash(doc.file.read())
-            doc.file.seek(0)
+            doc._set_file_hash()
 
             doc.save()
 
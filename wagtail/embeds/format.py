@@ -4,9 +4,10 @@ from wagtail.embeds import embeds
 from wagtail.embeds.exceptions import EmbedException
 
 
-def embed_to_frontend_html(url):
+def embed_to_frontend_html(url, embed=None):
     try:
-        embed = embeds.get_embed(url)
+        if embed is None:
+            embed = embeds.get_embed(url)
 
         # Render template
         return render_to_string('wagtailembeds/embed_frontend.html', {
@@ -24,3 +24,14 @@ class MediaEmbedHandler(EmbedHandler):
         representation for use on the front-end.
         """
         return format.embed_to_frontend_html(attrs['url'])
+
+    @staticmethod
+    def expand_db_attributes_many(attrs_list):
+        # Fetch the embeds that are already stored in a single query; only
+        # those not found here need to go through the finders
+        urls = [attrs['url'] for attrs in attrs_list]
+        embeds = {
+            embed.url: embed
+            for embed in Embed.objects.filter(url__in=urls, max_width__isnull=True)
+        }
+        return [format.embed_to_frontend_html(url, embed=embeds.get(url)) for url in urls]
@@ -9,6 +9,10 @@ from willow.plugins.pillow import PillowImage
 
 
 class Operation:
+    # Whether the result of the operation is the same whatever size the image it is run on was
+    # decoded at, because it doesn't depend on the image's pixels (e.g. setting output options)
+    resolution_independent = False
+
     def __init__(self, method, *args):
         self.method = method
         self.args = args
@@ -31,8 +35,17 @@ class Operation:
     def run(self, willow, image, env):
         raise NotImplementedError
 
+    def get_draft_scale(self, width, height, image):
+        """
+        Return the smallest fraction of its full size that an image of the given size can be
+        decoded at without changing the result of this operation
+        """
+        return 1
+
 
 class DoNothingOperation(Operation):
+    resolution_independent = True
+
     def construct(self):
         pass
 
@@ -65,10 +78,7 @@ class FillOperation(Operation):
         if self.crop_closeness > 1:
             self.crop_closeness = 1
 
-    def run(self, willow, image, env):
-        image_width, image_height = willow.get_size()
-        focal_point = image.get_focal_point()
-
+    def get_crop_rect(self, image_width, image_height, focal_point):
         # Get crop aspect ratio
         crop_aspect_ratio = self.width / self.height
 
@@ -127,7 +137,21 @@ class FillOperation(Operation):
             rect = rect.move_to_cover(focal_point)
 
         # Don't allow the crop box to go over the image boundary
-        rect = rect.move_to_clamp(Rect(0, 0, image_width, image_height))
+        return rect.move_to_clamp(Rect(0, 0, image_width, image_height))
+
+    def get_draft_scale(self, width, height, image):
+        rect = self.get_crop_rect(width, height, image.get_focal_point())
+        return min(self.width / rect.width, 1)
+
+    def run(self, willow, image, env):
+        image_width, image_height = willow.get_size()
+        focal_point = image.get_focal_point()
+
+        # The focal point is in the coordinates of the full size image
+        if focal_point is not None and 'draft-scale' in env:
+            focal_point = Rect(*(coordinate * env['draft-scale'] for coordinate in focal_point))
+
+        rect = self.get_crop_rect(image_width, image_height, focal_point)
 
         # Crop!
         willow = willow.crop(rect.round())
@@ -153,6 +177,22 @@ class MinMaxOperation(Operation):
         self.width = int(width_str)
         self.height = int(height_str)
 
+    def get_draft_scale(self, width, height, image):
+        horz_scale = self.width / width
+        vert_scale = self.height / height
+
+        if self.method == 'min':
+            if width <= self.width or height <= self.height:
+                return 1
+            return max(horz_scale, vert_scale)
+
+        elif self.method == 'max':
+            if width <= self.width and height <= self.height:
+                return 1
+            return min(horz_scale, vert_scale)
+
+        return 1
+
     def run(self, willow, image, env):
         image_width, image_height = willow.get_size()
 
@@ -193,6 +233,15 @@ class WidthHeightOperation(Operation):
         self.size = int(size)
         self.force = force
 
+    def get_draft_scale(self, width, height, image):
+        if self.method == 'width':
+            scale = self.size / width
+        elif self.method == 'height':
+            scale = self.size / height
+        else:
+            return 1
+        return min(scale, 1)
+
     def run(self, willow, image, env):
         image_width, image_height = willow.get_size()
 
@@ -249,6 +298,9 @@ class ForceFitOperation(Operation):
         self.width = int(width_str)
         self.height = int(height_str)
 
+    def get_draft_scale(self, width, height, image):
+        return min(self.width / width, self.height / height, 1)
+
     def run(self, willow, image, env):
         (original_width, original_height) = willow.get_size()
         (target_width, target_height) = self.width, self.height
@@ -291,9 +343,17 @@ class ScaleOperation(Operation):
     def construct(self, percent):
         self.percent = float(percent)
 
+    def get_draft_scale(self, width, height, image):
+        return min(self.percent / 100, 1)
+
     def run(self, willow, image, env):
         image_width, image_height = willow.get_size()
 
+        # Scale the full size of the image, not the size it was decoded at
+        if 'draft-scale' in env:
+            image_width = round(image_width / env['draft-scale'])
+            image_height = round(image_height / env['draft-scale'])
+
         scale = self.percent / 100
         width = int(image_width * scale)
         height = int(image_height * scale)
@@ -302,6 +362,8 @@ class ScaleOperation(Operation):
 
 
 class JPEGQualityOperation(Operation):
+    resolution_independent = True
+
     def construct(self, quality):
         self.quality = int(quality)
 
@@ -313,6 +375,8 @@ class JPEGQualityOperation(Operation):
 
 
 class FormatOperation(Operation):
+    resolution_independent = True
+
     def construct(self, fmt):
         self.format = fmt
 
@@ -325,6 +389,8 @@ class FormatOperation(Operation):
 
 
 class BackgroundColorOperation(Operation):
+    resolution_independent = True
+
     def construct(self, color_string):
         self.color = parse_color_string(color_string)
 
@@ -333,6 +399,8 @@ class BackgroundColorOperation(Operation):
 
 
 class AltTextOperation(Operation):
+    resolution_independent = True
+
     def construct(self, *args):
         pass
 
@@ -3,7 +3,7 @@ import re
 from django import template
 from jinja2.ext import Extension
 
-from .shortcuts import get_rendition_or_not_found
+from .shortcuts import get_rendition_or_not_found, render_picture, render_srcset_image
 from .templatetags.wagtailimages_tags import image_url
 
 
@@ -28,6 +28,32 @@ def image(image, filterspec, **attrs):
         return rendition
 
 
+def picture(image, filterspec=None, widths=None, formats=None, sizes=None, **attrs):
+    if not image:
+        return ''
+
+    if filterspec and not allowed_filter_pattern.match(filterspec):
+        raise template.TemplateSyntaxError(
+            "filter specs in 'picture' tag may only contain A-Z, a-z, 0-9, dots, hyphens, pipes and underscores. "
+            "(given filter: {})".format(filterspec)
+        )
+
+    return render_picture(image, filterspec, widths=widths, formats=formats, sizes=sizes, attrs=attrs)
+
+
+def srcset_image(image, filterspec=None, widths=None, sizes=None, **attrs):
+    if not image:
+        return ''
+
+    if filterspec and not allowed_filter_pattern.match(filterspec):
+        raise template.TemplateSyntaxError(
+            "filter specs in 'srcset_image' tag may only contain A-Z, a-z, 0-9, dots, hyphens, pipes and underscores. "
+            "(given filter: {})".format(filterspec)
+        )
+
+    return render_srcset_image(image, filterspec, widths=widths, sizes=sizes, attrs=attrs)
+
+
 class WagtailImagesExtension(Extension):
     def __init__(self, environment):
         super().__init__(environment)
@@ -35,6 +61,8 @@ class WagtailImagesExtension(Extension):
         self.environment.globals.update({
             'image': image,
             'image_url': image_url,
+            'picture': picture,
+            'srcset_image': srcset_image,
         })
 
 
@@ -0,0 +1,205 @@
+import os
+import re
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.template.utils import get_app_template_dirs
+
+from wagtail.core.query import keyset_chunks
+from wagtail.images import get_image_model
+from wagtail.images.exceptions import InvalidFilterSpecError
+from wagtail.images.formats import get_image_formats
+from wagtail.images.models import Filter
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Literal filter specs in {% image %} tags, e.g. {% image page.photo fill-300x200 %}, and in
+# image() calls in Jinja2 templates, e.g. {{ image(page.photo, "fill-300x200") }}
+TEMPLATE_FILTER_SPEC_RES = [
+    re.compile(r'{%\s*image\s+\S+\s+([\w|-]+)'),
+    re.compile(r'''\bimage\(\s*[^,()]+,\s*["']([\w|-]+)["']'''),
+]
+
+
+def get_template_dirs():
+    dirs = []
+    for backend in settings.TEMPLATES:
+        dirs.extend(backend.get('DIRS', []))
+    dirs.extend(get_app_template_dirs('templates'))
+    dirs.extend(get_app_template_dirs('jinja2'))
+    return dirs
+
+
+def find_template_filter_specs():
+    filter_specs = set()
+    for template_dir in get_template_dirs():
+        for dirpath, dirnames, filenames in os.walk(template_dir):
+            for filename in filenames:
+                if not filename.endswith(('.html', '.txt', '.xml', '.jinja', '.jinja2')):
+                    continue
+                with open(os.path.join(dirpath, filename), encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+                for filter_spec_re in TEMPLATE_FILTER_SPEC_RES:
+                    filter_specs.update(filter_spec_re.findall(content))
+    return filter_specs
+
+
+def init_worker():
+    # Connections inherited from the parent process must not be shared with it
+    connections.close_all()
+
+
+def generate_renditions(image_id, filter_specs):
+    """
+    Generate the given renditions of an image. Returns the image ID, the number of renditions
+    generated and a list of (filter spec, error message) pairs for the ones that failed.
+    """
+    Image = get_image_model()
+    try:
+        image = Image._default_manager.get(pk=image_id)
+    except Image.DoesNotExist:
+        # The image was deleted since the chunk was fetched
+        return image_id, 0, []
+
+    try:
+        # Generate them all from a single decode of the original image
+        renditions = image.get_renditions(*filter_specs)
+    except Exception as e:
+        return image_id, 0, [(filter_spec, str(e)) for filter_spec in filter_specs]
+
+    generated = 0
+    errors = []
+    for filter_spec, rendition in renditions.items():
+        if rendition.pk is None:
+            # get_renditions returns unsaved placeholders if the source file is missing
+            errors.append((filter_spec, "source image file not found"))
+        else:
+            generated += 1
+    return image_id, generated, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the missing renditions of all images for the given filter specs, so that "
+        "they don't have to be generated when first requested. Renditions that already exist "
+        "are skipped, so the command can be stopped and run again to continue where it left off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'filter_specs', nargs='*', metavar='filter_spec',
+            help="Filter specs to generate renditions for, e.g. 'fill-300x200' or 'width-800|jpegquality-60'")
+        parser.add_argument(
+            '--discover', action='store_true', dest='discover', default=False,
+            help="Also generate renditions for the filter specs used in {% image %} tags in templates, "
+                 "in registered rich text image formats, and by existing renditions.")
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help="Number of processes to generate renditions in (default 1)")
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, dest='chunk_size',
+            help="Number of images to check for missing renditions at a time (default %d)" % DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            '--start-after', type=int, default=None, dest='start_after',
+            help="Only process images with an ID greater than this one, e.g. the last ID reported by "
+                 "an interrupted run")
+
+    def get_filter_specs(self, options):
+        filter_specs = set(options['filter_specs'])
+
+        if options['discover']:
+            Rendition = get_image_model().get_rendition_model()
+            filter_specs.update(find_template_filter_specs())
+            filter_specs.update(image_format.filter_spec for image_format in get_image_formats())
+            filter_specs.update(Rendition.objects.values_list('filter_spec', flat=True).distinct())
+
+        if not filter_specs:
+            raise CommandError("Please specify one or more filter specs, or use --discover.")
+
+        # Check that all the filter specs are valid before starting
+        filters = []
+        for filter_spec in sorted(filter_specs):
+            filter = Filter(spec=filter_spec)
+            try:
+                filter.operations
+            except InvalidFilterSpecError as e:
+                raise CommandError("Invalid filter spec '%s': %s" % (filter_spec, e))
+            filters.append(filter)
+
+        return filters
+
+    def get_tasks(self, images, filters):
+        """
+        Return a list of (image id, filter specs) pairs for the renditions of these images that
+        don't exist yet
+        """
+        Rendition = get_image_model().get_rendition_model()
+        existing = set(
+            Rendition.objects.filter(
+                image__in=images, filter_spec__in=[filter.spec for filter in filters]
+            ).values_list('image_id', 'filter_spec', 'focal_point_key')
+        )
+
+        tasks = []
+        for image in images:
+            missing = [
+                filter.spec for filter in filters
+                if (image.pk, filter.spec, image.get_focal_point_key(filter)) not in existing
+            ]
+            if missing:
+                tasks.append((image.pk, missing))
+        return tasks
+
+    def handle(self, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        filters = self.get_filter_specs(options)
+        self.stdout.write("Generating renditions for filter specs: %s" % ", ".join(filter.spec for filter in filters))
+
+        images = get_image_model()._default_manager.order_by('pk')
+        if options['start_after'] is not None:
+            images = images.filter(pk__gt=options['start_after'])
+        total_images = images.count()
+
+        pool = None
+        if options['workers'] > 1:
+            # Forked processes would otherwise share this process' database connections
+            connections.close_all()
+            pool = Pool(options['workers'], initializer=init_worker)
+
+        start_time = time.time()
+        processed_images = generated = failed = 0
+        try:
+            for chunk in keyset_chunks(images, options['chunk_size']):
+                tasks = self.get_tasks(chunk, filters)
+                if pool is not None:
+                    results = pool.starmap(generate_renditions, tasks)
+                else:
+                    results = [generate_renditions(*task) for task in tasks]
+
+                for image_id, image_generated, errors in results:
+                    generated += image_generated
+                    failed += len(errors)
+                    for filter_spec, message in errors:
+                        self.stderr.write("Image %s, '%s': %s" % (image_id, filter_spec, message))
+
+                processed_images += len(chunk)
+                elapsed = time.time() - start_time
+                self.stdout.write(
+                    "%d/%d images processed, %d renditions generated (%.1f/s), last image ID %s" % (
+                        processed_images, total_images, generated,
+                        generated / elapsed if elapsed else 0, chunk[-1].pk))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        elapsed = time.time() - start_time
+        self.stdout.write(
+            "Done in %.1fs: %d renditions generated, %d failed." % (elapsed, generated, failed))
@@ -1,7 +1,9 @@
 import hashlib
+import math
 import os.path
+import time
 from collections import OrderedDict
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from io import BytesIO
 
 from django.conf import settings
@@ -14,13 +16,17 @@ from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django.utils.translation import ugettext_lazy as _
+from PIL import Image as PILImage
 from taggit.managers import TaggableManager
 from unidecode import unidecode
 from willow.image import Image as WillowImage
+from willow.plugins.pillow import PillowImage
 
 from wagtail.admin.models import get_object_usage
 from wagtail.core import hooks
 from wagtail.core.models import CollectionMember
+from wagtail.core.utils import hash_filelike
+from wagtail.images import rendition_cache, rendition_locks
 from wagtail.images.exceptions import InvalidFilterSpecError
 from wagtail.images.rect import Rect
 from wagtail.search import index
@@ -108,7 +114,69 @@ def get_rendition_upload_to(instance, filename):
 
 
 class ImageQuerySet(SearchableQuerySetMixin, models.QuerySet):
-    pass
+    def prefetch_renditions(self, *filters):
+        """
+        Prefetch the existing renditions of each image for the given filters (or all
+        renditions, if no filters are given), so that ``get_rendition`` and the ``{% image %}``
+        tag can find them without a query per image.
+        """
+        renditions = self.model.get_rendition_model().objects.all()
+        if filters:
+            renditions = renditions.filter(filter_spec__in=[
+                filter.spec if isinstance(filter, Filter) else filter for filter in filters
+            ])
+        return self.prefetch_related(
+            models.Prefetch('renditions', queryset=renditions, to_attr='prefetched_renditions')
+        )
+
+
+def get_renditions(images, filter):
+    """
+    Return a list of the renditions of the given images for `filter`, as returned by
+    ``image.get_rendition(filter)``.
+
+    The existing renditions are fetched in a single query, and only the missing ones are
+    generated. The renditions are also remembered on each image, so that subsequent calls to
+    ``get_rendition`` for the same filter (including through ``{% image %}``) need no query.
+    """
+    images = list(images)
+    if not images:
+        return []
+
+    if isinstance(filter, str):
+        filter = Filter(spec=filter)
+
+    cached_renditions = {}
+    if rendition_cache.is_enabled():
+        cached_renditions = rendition_cache.get_renditions(images, filter)
+
+    renditions_by_key = {}
+    uncached_images = [image for image in images if image.pk not in cached_renditions]
+    if uncached_images:
+        renditions_by_key = {
+            (rendition.image_id, rendition.focal_point_key): rendition
+            for rendition in images[0].get_rendition_model().objects.filter(
+                image__in=uncached_images, filter_spec=filter.spec
+            )
+        }
+
+    result = []
+    for image in images:
+        focal_point_key = image.get_focal_point_key(filter)
+        rendition = cached_renditions.get(image.pk)
+        if rendition is None:
+            rendition = renditions_by_key.get((image.pk, focal_point_key))
+            if rendition is None:
+                rendition = image._create_rendition_once(filter, focal_point_key)
+            else:
+                rendition.image = image
+            if rendition.pk is not None and rendition_cache.is_enabled():
+                rendition_cache.set_rendition(rendition)
+        if rendition.pk is not None:
+            image._add_prefetched_rendition(rendition)
+        result.append(rendition)
+
+    return result
 
 
 class WillowImageWrapper:
@@ -201,13 +269,22 @@ class AbstractImage(CollectionMember, index.Indexed, models.Model, WillowImageWr
 
         return self.file_size
 
-    def _set_file_hash(self, file_contents):
-        self.file_hash = hashlib.sha1(file_contents).hexdigest()
+    def _set_file_hash(self, file_contents=None):
+        if file_contents is None:
+            # Read the file in chunks, rather than loading all of it into memory
+            self.file_hash = hash_filelike(self.file)
+        else:
+            self.file_hash = hashlib.sha1(file_contents).hexdigest()
 
     def get_file_hash(self):
         if self.file_hash == '':
-            with self.open_file() as f:
-                self._set_file_hash(f.read())
+            storage = self._meta.get_field('file').storage
+            try:
+                with storage.open(self.file.name, 'rb') as f:
+                    self.file_hash = hash_filelike(f)
+            except Exception as e:
+                # File not found (see get_file_size)
+                raise SourceImageIOError(str(e))
 
             self.save(update_fields=['file_hash'])
 
@@ -363,43 +440,251 @@ class AbstractImage(CollectionMember, index.Indexed, models.Model, WillowImageWr
         return cls.renditions.rel.related_model
 
     def _get_rendition(self, renditions, filter, focal_point_key=''):
-        filter_spec = filter.spec
-        spec_hash = filter.get_cache_key(self)
-
         try:
             rendition = renditions.get(
-                filter_spec=filter_spec,
+                filter_spec=filter.spec,
                 focal_point_key=focal_point_key,
             )
         except ObjectDoesNotExist:
+            rendition = self._create_rendition(renditions, filter, focal_point_key)
+
+        return rendition
+
+    def _create_rendition_once(self, filter, focal_point_key):
+        """
+        Create this image's rendition for the filter. If another thread or process is already
+        generating it, wait for that to finish instead of generating it too.
+        """
+        with rendition_locks.rendition_lock(self, filter.spec, focal_point_key) as acquired:
+            if acquired:
+                return self._create_rendition(self.renditions, filter, focal_point_key)
+
+        deadline = time.monotonic() + rendition_locks.get_lock_timeout()
+        while time.monotonic() < deadline:
+            time.sleep(rendition_locks.POLL_INTERVAL)
             try:
-                # Generate the rendition image
-                generated_image = filter.run(self, BytesIO())
-            except IOError:
-                return _rendition_for_missing_image(renditions.model, self,
-                                                    filter_spec=filter_spec)
+                return self.renditions.get(filter_spec=filter.spec, focal_point_key=focal_point_key)
+            except ObjectDoesNotExist:
+                if not rendition_locks.is_locked(self, filter.spec, focal_point_key):
+                    # The lock was released without the rendition being saved, e.g. because
+                    # generating it failed, so try again here
+                    break
 
-            # Generate filename
-            input_filename = os.path.basename(self.file.name)
-            output_filename = _generate_output_filename(
-                                input_filename,
-                                generated_image.format_name,
-                                spec_hash)
+        return self._create_rendition(self.renditions, filter, focal_point_key)
+
+    def _create_rendition(self, renditions, filter, focal_point_key=''):
+        rendition = self._reuse_identical_rendition(renditions, filter, focal_point_key)
+        if rendition is not None:
+            return rendition
+
+        try:
+            # Generate the rendition image
+            generated_image = filter.run(self, BytesIO())
+        except IOError:
+            return _rendition_for_missing_image(renditions.model, self,
+                                                filter_spec=filter.spec)
+
+        return self._save_rendition(renditions, filter, focal_point_key, generated_image)
+
+    def _save_rendition(self, renditions, filter, focal_point_key, generated_image):
+        # Generate filename
+        input_filename = os.path.basename(self.file.name)
+        output_filename = _generate_output_filename(
+                            input_filename,
+                            generated_image.format_name,
+                            filter.get_cache_key(self))
+
+        rendition, created = renditions.get_or_create(
+            filter_spec=filter.spec,
+            focal_point_key=focal_point_key,
+            defaults={'file': File(generated_image.f, name=output_filename)}
+        )
+
+        return rendition
+
+    def _reuse_identical_rendition(self, renditions, filter, focal_point_key):
+        """
+        If another image with the same file contents already has this rendition, create this
+        image's rendition from the same file instead of generating it again. Returns the
+        rendition, or None if there is no such image.
+        """
+        return self._reuse_identical_renditions(renditions, {filter.spec: focal_point_key}).get(filter.spec)
 
-            rendition, created = renditions.get_or_create(
+    def _reuse_identical_renditions(self, renditions, focal_point_keys):
+        """
+        Like _reuse_identical_rendition, for several filters at once, looking up the other
+        images' renditions in a single query. `focal_point_keys` maps filter specs to the
+        focal point key of each rendition. Returns a dict of the reused renditions, keyed by
+        filter spec.
+        """
+        if not self.file_hash or not getattr(settings, 'WAGTAILIMAGES_SHARE_RENDITION_FILES', True):
+            return {}
+
+        identical_renditions = {}
+        for identical_rendition in renditions.model._default_manager.filter(
+            image__file_hash=self.file_hash,
+            filter_spec__in=list(focal_point_keys),
+        ).exclude(image_id=self.pk).order_by('pk'):
+            if identical_rendition.focal_point_key == focal_point_keys[identical_rendition.filter_spec]:
+                identical_renditions.setdefault(identical_rendition.filter_spec, identical_rendition)
+
+        reused_renditions = {}
+        for filter_spec, identical_rendition in identical_renditions.items():
+            reused_renditions[filter_spec], created = renditions.get_or_create(
                 filter_spec=filter_spec,
-                focal_point_key=focal_point_key,
-                defaults={'file': File(generated_image.f, name=output_filename)}
+                focal_point_key=focal_point_keys[filter_spec],
+                defaults={
+                    'file': identical_rendition.file.name,
+                    'width': identical_rendition.width,
+                    'height': identical_rendition.height,
+                }
             )
 
+        return reused_renditions
+
+    def _get_prefetched_renditions(self):
+        # Renditions fetched by ImageQuerySet.prefetch_renditions / get_renditions, or
+        # by a plain prefetch_related('renditions')
+        if hasattr(self, 'prefetched_renditions'):
+            return self.prefetched_renditions
+        return getattr(self, '_prefetched_objects_cache', {}).get('renditions')
+
+    def _add_prefetched_rendition(self, rendition):
+        if not hasattr(self, 'prefetched_renditions'):
+            self.prefetched_renditions = list(self._get_prefetched_renditions() or [])
+        self.prefetched_renditions.append(rendition)
+
+    def _remember_rendition(self, rendition):
+        # Keep a newly created rendition where later lookups will find it
+        if self._get_prefetched_renditions() is not None:
+            self._add_prefetched_rendition(rendition)
+        if rendition_cache.is_enabled():
+            rendition_cache.set_rendition(rendition)
+
+    def find_rendition(self, filter):
+        """
+        Return the existing rendition of this image for the given filter, or None if it
+        has not been generated yet.
+        """
+        if isinstance(filter, str):
+            filter = Filter(spec=filter)
+
+        focal_point_key = self.get_focal_point_key(filter)
+
+        rendition = self._find_known_rendition(filter, focal_point_key)
+        if rendition is None:
+            try:
+                rendition = self.renditions.get(filter_spec=filter.spec, focal_point_key=focal_point_key)
+            except ObjectDoesNotExist:
+                return None
+
+            # Remember renditions looked up after prefetching too
+            self._remember_rendition(rendition)
         return rendition
 
+    def _find_known_rendition(self, filter, focal_point_key):
+        # Look for the rendition among the prefetched renditions and in the rendition cache,
+        # without querying the database
+        for rendition in self._get_prefetched_renditions() or []:
+            if rendition.filter_spec == filter.spec and rendition.focal_point_key == focal_point_key:
+                return rendition
+
+        if rendition_cache.is_enabled():
+            return rendition_cache.get_rendition(self, filter.spec, focal_point_key)
+
     def get_rendition(self, filter):
         if isinstance(filter, str):
             filter = Filter(spec=filter)
 
-        return self._get_rendition(self.renditions, filter,
-                                   self.get_focal_point_key(filter))
+        rendition = self.find_rendition(filter)
+        if rendition is None:
+            rendition = self._create_rendition_once(filter, self.get_focal_point_key(filter))
+            if rendition.pk is not None:
+                self._remember_rendition(rendition)
+        return rendition
+
+    def get_renditions(self, *filters):
+        """
+        Return a dict of the renditions of this image for the given filters, keyed by filter
+        spec. All of the missing renditions are generated from a single decode of the
+        original image file.
+        """
+        filters = OrderedDict(
+            (filter.spec, filter) for filter in (
+                Filter(spec=filter) if isinstance(filter, str) else filter for filter in filters
+            )
+        )
+
+        renditions = {}
+        unknown_filters = []
+        for filter_spec, filter in filters.items():
+            rendition = self._find_known_rendition(filter, self.get_focal_point_key(filter))
+            if rendition is None:
+                unknown_filters.append(filter)
+            else:
+                renditions[filter_spec] = rendition
+
+        if unknown_filters:
+            # Look up all of the other existing renditions in one query
+            focal_point_keys = {filter.spec: self.get_focal_point_key(filter) for filter in unknown_filters}
+            for rendition in self.renditions.filter(filter_spec__in=list(focal_point_keys)):
+                if focal_point_keys[rendition.filter_spec] == rendition.focal_point_key:
+                    self._remember_rendition(rendition)
+                    renditions[rendition.filter_spec] = rendition
+
+        missing_filters = [filter for filter in unknown_filters if filter.spec not in renditions]
+        if missing_filters:
+            reused_renditions = self._reuse_identical_renditions(self.renditions, {
+                filter.spec: self.get_focal_point_key(filter) for filter in missing_filters
+            })
+            for rendition in reused_renditions.values():
+                self._remember_rendition(rendition)
+                renditions[rendition.filter_spec] = rendition
+            missing_filters = [filter for filter in missing_filters if filter.spec not in reused_renditions]
+
+        with ExitStack() as locks:
+            # Generate the renditions that aren't already being generated elsewhere, holding
+            # their locks until they are saved
+            locked_filters = []
+            other_filters = []
+            for filter in missing_filters:
+                lock = rendition_locks.rendition_lock(self, filter.spec, self.get_focal_point_key(filter))
+                if locks.enter_context(lock):
+                    locked_filters.append(filter)
+                else:
+                    other_filters.append(filter)
+
+            if locked_filters:
+                renditions.update(self._generate_renditions(locked_filters))
+
+        # Wait for the others to be generated, as get_rendition does
+        for filter in other_filters:
+            rendition = self._create_rendition_once(filter, self.get_focal_point_key(filter))
+            if rendition.pk is not None:
+                self._remember_rendition(rendition)
+            renditions[filter.spec] = rendition
+
+        return renditions
+
+    def _generate_renditions(self, filters):
+        # Generate and save renditions for all of the filters from a single decode of the
+        # original image file, returning them keyed by filter spec
+        try:
+            generated_images = Filter.run_many(filters, self, [BytesIO() for filter in filters])
+        except IOError:
+            return {
+                filter.spec: _rendition_for_missing_image(self.renditions.model, self, filter_spec=filter.spec)
+                for filter in filters
+            }
+
+        renditions = {}
+        for filter, generated_image in zip(filters, generated_images):
+            rendition = self._save_rendition(
+                self.renditions, filter, self.get_focal_point_key(filter), generated_image
+            )
+            self._remember_rendition(rendition)
+            renditions[filter.spec] = rendition
+        return renditions
 
     def get_user_rendition(self, filter):
         if isinstance(filter, str):
@@ -482,62 +767,129 @@ class Filter:
             operations.append(op_class(*op_spec_parts))
         return operations
 
+    def get_draft_scale(self, width, height, image):
+        """
+        Return the smallest fraction of its full size that an image of the given size can be
+        decoded at without changing the result of this filter. Only the first operation that
+        depends on the image's resolution is taken into account, as the ones after it work
+        from its result.
+        """
+        for operation in self.operations:
+            if not operation.resolution_independent:
+                return operation.get_draft_scale(width, height, image)
+        return 1
+
     def run(self, image, output):
+        return Filter.run_many([self], image, [output])[0]
+
+    @staticmethod
+    def run_many(filters, image, outputs):
+        """
+        Apply each of the filters to the image, writing the results to the corresponding
+        outputs. The original image is opened and decoded only once, and the decoded image
+        is shared by all of the filters (Willow operations return new images rather than
+        modifying the one they are given).
+        """
         with image.get_willow_image() as willow:
             original_format = willow.format_name
+            draft_scale = 1
+
+            if original_format == 'jpeg' and getattr(settings, 'WAGTAILIMAGES_JPEG_DRAFT_MODE', True):
+                willow, draft_scale = Filter._open_jpeg_draft(filters, image, willow)
 
             # Fix orientation of image
             willow = willow.auto_orient()
 
-            env = {
-                'original-format': original_format,
-            }
-            for operation in self.operations:
-                willow = operation.run(willow, image, env) or willow
+            return [
+                filter._run_operations(willow, image, output, original_format, draft_scale)
+                for filter, output in zip(filters, outputs)
+            ]
 
-            # Find the output format to use
-            if 'output-format' in env:
-                # Developer specified an output format
-                output_format = env['output-format']
-            else:
-                # Convert bmp and webp to png by default
-                default_conversions = {
-                    'bmp': 'png',
-                    'webp': 'png',
-                }
+    @staticmethod
+    def _open_jpeg_draft(filters, image, willow):
+        """
+        JPEGs can be decoded at 1/2, 1/4 or 1/8 of their size much faster than at full size.
+        If all of the filters shrink the image at least that much, open it at the smallest of
+        these sizes that is still larger than any of them need. Returns the Willow image to
+        use and the scale it was decoded at.
+        """
+        willow.f.seek(0)
+        pillow_image = PILImage.open(willow.f)
+        full_width, full_height = pillow_image.size
 
-                # Convert unanimated GIFs to PNG as well
-                if not willow.has_animation():
-                    default_conversions['gif'] = 'png'
+        # The filters run on the image after it has been rotated by auto_orient
+        width, height = full_width, full_height
+        try:
+            orientation = pillow_image._getexif().get(0x0112, 1)
+        except Exception:
+            orientation = 1
+        if orientation in (5, 6, 7, 8):
+            width, height = height, width
+
+        scale = max(filter.get_draft_scale(width, height, image) for filter in filters)
+        if scale > 0.5:
+            return willow, 1
+
+        pillow_image.draft(pillow_image.mode, (math.ceil(full_width * scale), math.ceil(full_height * scale)))
+        return PillowImage(pillow_image), pillow_image.size[0] / full_width
+
+    def _run_operations(self, willow, image, output, original_format, draft_scale=1):
+        env = {
+            'original-format': original_format,
+        }
+        if draft_scale != 1:
+            env['draft-scale'] = draft_scale
 
-                # Allow the user to override the conversions
-                conversion = getattr(settings, 'WAGTAILIMAGES_FORMAT_CONVERSIONS', {})
-                default_conversions.update(conversion)
+        for operation in self.operations:
+            willow = operation.run(willow, image, env) or willow
 
-                # Get the converted output format falling back to the original
-                output_format = default_conversions.get(
-                    original_format, original_format)
+            if not operation.resolution_independent:
+                # Operations after this one work from its result, not the decoded image
+                env.pop('draft-scale', None)
 
-            if output_format == 'jpeg':
-                # Allow changing of JPEG compression quality
-                if 'jpeg-quality' in env:
-                    quality = env['jpeg-quality']
-                elif hasattr(settings, 'WAGTAILIMAGES_JPEG_QUALITY'):
-                    quality = settings.WAGTAILIMAGES_JPEG_QUALITY
-                else:
-                    quality = 85
+        # Find the output format to use
+        if 'output-format' in env:
+            # Developer specified an output format
+            output_format = env['output-format']
+        else:
+            # Convert bmp and webp to png by default
+            default_conversions = {
+                'bmp': 'png',
+                'webp': 'png',
+            }
 
-                # If the image has an alpha channel, give it a white background
-                if willow.has_alpha():
-                    willow = willow.set_background_color_rgb((255, 255, 255))
+            # Convert unanimated GIFs to PNG as well
+            if not willow.has_animation():
+                default_conversions['gif'] = 'png'
 
-                return willow.save_as_jpeg(output, quality=quality, progressive=True, optimize=True)
-            elif output_format == 'png':
-                return willow.save_as_png(output, optimize=True)
-            elif output_format == 'gif':
-                return willow.save_as_gif(output)
-            elif output_format == 'webp':
-                return willow.save_as_webp(output)
+            # Allow the user to override the conversions
+            conversion = getattr(settings, 'WAGTAILIMAGES_FORMAT_CONVERSIONS', {})
+            default_conversions.update(conversion)
+
+            # Get the converted output format falling back to the original
+            output_format = default_conversions.get(
+                original_format, original_format)
+
+        if output_format == 'jpeg':
+            # Allow changing of JPEG compression quality
+            if 'jpeg-quality' in env:
+                quality = env['jpeg-quality']
+            elif hasattr(settings, 'WAGTAILIMAGES_JPEG_QUALITY'):
+                quality = settings.WAGTAILIMAGES_JPEG_QUALITY
+            else:
+                quality = 85
+
+            # If the image has an alpha channel, give it a white background
+            if willow.has_alpha():
+                willow = willow.set_background_color_rgb((255, 255, 255))
+
+            return willow.save_as_jpeg(output, quality=quality, progressive=True, optimize=True)
+        elif output_format == 'png':
+            return willow.save_as_png(output, optimize=True)
+        elif output_format == 'gif':
+            return willow.save_as_gif(output)
+        elif output_format == 'webp':
+            return willow.save_as_webp(output)
 
     def get_cache_key(self, image):
         return (
@@ -583,8 +935,14 @@ class AbstractRendition(models.Model):
     focal_point_key = models.CharField(max_length=16, blank=True, default='', editable=False)
     alt_text = models.CharField(max_length=255, null=True, blank=True)
 
+    # Set on the unsaved renditions that stand in for one being generated in the background
+    # (see wagtail.images.rendition_queue), to the URL of the view that serves it once ready
+    pending_url = None
+
     @property
     def url(self):
+        if self.pending_url is not None:
+            return self.pending_url
         return self.file.url
 
     @property
@@ -0,0 +1,86 @@
+"""
+Cache of image renditions, enabled with the WAGTAILIMAGES_RENDITION_CACHE setting.
+
+The field values of each rendition are stored in Django's cache under its image id, filter spec
+and focal point key, so that ``get_rendition`` (and so the ``{% image %}`` tag) can find an
+existing rendition without a database query. Entries are removed when the rendition is
+deleted, and when its image is saved.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+KEY_PREFIX = 'wagtail_rendition:'
+
+
+def is_enabled():
+    return getattr(settings, 'WAGTAILIMAGES_RENDITION_CACHE', False)
+
+
+def get_cache_key(image_id, filter_spec, focal_point_key):
+    # Filter specs can be long and contain characters that not all cache backends accept in keys
+    spec_hash = hashlib.sha1(('%s:%s' % (filter_spec, focal_point_key)).encode('utf-8')).hexdigest()
+    return '%s%s:%s' % (KEY_PREFIX, image_id, spec_hash)
+
+
+def _get_rendition_cache_key(rendition):
+    return get_cache_key(rendition.image_id, rendition.filter_spec, rendition.focal_point_key)
+
+
+def _get_field_values(rendition):
+    values = {}
+    for field in rendition._meta.concrete_fields:
+        value = getattr(rendition, field.attname)
+        if isinstance(field, models.FileField):
+            value = value.name
+        values[field.attname] = value
+    return values
+
+
+def _build_rendition(image, values):
+    Rendition = image.get_rendition_model()
+    field_names = [field.attname for field in Rendition._meta.concrete_fields if field.attname in values]
+    rendition = Rendition.from_db(image._state.db, field_names, [values[name] for name in field_names])
+    rendition.image = image
+    return rendition
+
+
+def get_rendition(image, filter_spec, focal_point_key):
+    """
+    Return the cached rendition of the image for the given filter spec and focal point key, or
+    None if it isn't in the cache
+    """
+    values = cache.get(get_cache_key(image.pk, filter_spec, focal_point_key))
+    if values is None:
+        return None
+    return _build_rendition(image, values)
+
+
+def get_renditions(images, filter):
+    """
+    Return a dict of the cached renditions of the given images for the Filter, keyed by image
+    id. Images whose renditions aren't in the cache are left out.
+    """
+    keys = {
+        get_cache_key(image.pk, filter.spec, image.get_focal_point_key(filter)): image
+        for image in images
+    }
+    return {
+        keys[key].pk: _build_rendition(keys[key], values)
+        for key, values in cache.get_many(keys.keys()).items()
+    }
+
+
+def set_rendition(rendition):
+    cache.set(
+        _get_rendition_cache_key(rendition),
+        _get_field_values(rendition),
+        getattr(settings, 'WAGTAILIMAGES_RENDITION_CACHE_TIMEOUT', 3600),
+    )
+
+
+def delete_renditions(renditions):
+    cache.delete_many([_get_rendition_cache_key(rendition) for rendition in renditions])
@@ -0,0 +1,55 @@
+"""
+Locks that stop several threads or processes from generating the same rendition at once.
+
+Locks are taken with ``cache.add()`` on Django's default cache, which is atomic across
+processes on shared backends such as memcached, redis and the database cache, and within a
+process on the local memory cache.
+"""
+
+import hashlib
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_KEY_PREFIX = 'wagtail_rendition_lock:'
+
+# Seconds between checks for a rendition being generated elsewhere
+POLL_INTERVAL = 0.1
+
+
+def get_lock_timeout():
+    return getattr(settings, 'WAGTAILIMAGES_RENDITION_LOCK_TIMEOUT', 30)
+
+
+def get_lock_key(image, filter_spec, focal_point_key):
+    spec_hash = hashlib.sha1(('%s:%s' % (filter_spec, focal_point_key)).encode('utf-8')).hexdigest()
+    return '%s%s:%s' % (LOCK_KEY_PREFIX, image.pk, spec_hash)
+
+
+def is_locked(image, filter_spec, focal_point_key):
+    return cache.get(get_lock_key(image, filter_spec, focal_point_key)) is not None
+
+
+@contextmanager
+def rendition_lock(image, filter_spec, focal_point_key):
+    """
+    Try to take the lock for generating a rendition, which expires after
+    WAGTAILIMAGES_RENDITION_LOCK_TIMEOUT seconds in case its holder never releases it. Yields
+    True if the lock was taken (or locking is disabled), or False if it is held elsewhere.
+    """
+    timeout = get_lock_timeout()
+    if not timeout:
+        yield True
+        return
+
+    key = get_lock_key(image, filter_spec, focal_point_key)
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        # Don't release a lock that expired and was taken by someone else
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
@@ -0,0 +1,130 @@
+"""
+Background generation of image renditions.
+
+When the WAGTAILIMAGES_RENDITION_QUEUE setting is configured, the ``{% image %}`` tag no
+longer generates missing renditions while rendering the template. Instead, it hands them to
+the configured queue and outputs a URL for the image serve view, which returns the rendition
+once it is ready (generating it on the spot if the queue hasn't got to it yet).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from wagtail.images.models import Filter
+
+logger = logging.getLogger('wagtail.images')
+
+
+# Renditions being generated in this process, keyed by (image id, filter spec, focal point key),
+# so that concurrent requests for the same rendition wait for a single generation
+_in_progress = {}
+_in_progress_lock = threading.Lock()
+
+
+def get_rendition_key(image, filter):
+    return (image.pk, filter.spec, image.get_focal_point_key(filter))
+
+
+def generate_rendition(image, filter):
+    """
+    Return the rendition of the image for the given filter, generating it if it doesn't exist
+    yet. If the same rendition is already being generated by another thread of this process,
+    wait for that to finish instead of generating it a second time.
+    """
+    if isinstance(filter, str):
+        filter = Filter(spec=filter)
+
+    key = get_rendition_key(image, filter)
+
+    with _in_progress_lock:
+        done = _in_progress.get(key)
+        is_generating = done is None
+        if is_generating:
+            done = _in_progress[key] = threading.Event()
+
+    if not is_generating:
+        done.wait()
+        # The rendition now exists, unless generating it failed; in that case this
+        # will try again and report the error to this caller too
+        return image.get_rendition(filter)
+
+    try:
+        return image.get_rendition(filter)
+    finally:
+        with _in_progress_lock:
+            del _in_progress[key]
+        done.set()
+
+
+class BaseRenditionQueue:
+    def __init__(self, params):
+        self.serve_view = params.pop('SERVE_VIEW', 'wagtailimages_serve')
+
+    def enqueue(self, image, filter):
+        """
+        Arrange for the rendition of the image for the given Filter to be generated
+        """
+        raise NotImplementedError
+
+
+class ThreadPoolRenditionQueue(BaseRenditionQueue):
+    """
+    Generates renditions in a pool of threads within the current process
+    """
+    def __init__(self, params):
+        super().__init__(params)
+        self.executor = ThreadPoolExecutor(
+            max_workers=params.pop('WORKERS', 2),
+            thread_name_prefix='wagtail-renditions',
+        )
+        self.queued = set()
+        self.lock = threading.Lock()
+
+    def enqueue(self, image, filter):
+        key = get_rendition_key(image, filter)
+        with self.lock:
+            if key in self.queued:
+                return
+            self.queued.add(key)
+
+        self.executor.submit(self.generate, type(image), image.pk, filter.spec, key)
+
+    def generate(self, image_model, image_id, filter_spec, key):
+        try:
+            image = image_model._default_manager.get(pk=image_id)
+            generate_rendition(image, filter_spec)
+        except Exception:
+            logger.exception("Failed to generate rendition '%s' of image %s", filter_spec, image_id)
+        finally:
+            with self.lock:
+                self.queued.discard(key)
+            # Database connections are per thread, and this one won't be reused by a request
+            connections.close_all()
+
+
+_queue = None
+
+
+def get_rendition_queue():
+    """
+    Return the queue configured in the WAGTAILIMAGES_RENDITION_QUEUE setting, or None if
+    renditions are to be generated while rendering templates.
+    """
+    global _queue
+
+    config = getattr(settings, 'WAGTAILIMAGES_RENDITION_QUEUE', None)
+    if config is None:
+        return None
+
+    # The queue (and its workers) are created once, and replaced if the setting changes
+    if _queue is None or _queue[0] != config:
+        params = config.copy()
+        backend = params.pop('BACKEND', 'wagtail.images.rendition_queue.ThreadPoolRenditionQueue')
+        _queue = (config, import_string(backend)(params))
+
+    return _queue[1]
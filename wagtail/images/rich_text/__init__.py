@@ -27,3 +27,19 @@ class ImageEmbedHandler(EmbedHandler):
 
         image_format = get_image_format(attrs['format'])
         return image_format.image_to_html(image, attrs.get('alt', ''))
+
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list):
+        image_formats = [get_image_format(attrs['format']) for attrs in attrs_list]
+
+        # Fetch the existing renditions for all of the formats along with the images, so that
+        # only missing renditions need a query of their own
+        images = cls.get_many(attrs_list, cls.get_model()._default_manager.prefetch_renditions(
+            *{image_format.filter_spec for image_format in image_formats}
+        ))
+
+        return [
+            image_format.image_to_html(image, attrs.get('alt', ''))
+            if image is not None else '<img alt="">'
+            for attrs, image_format, image in zip(attrs_list, image_formats, images)
+        ]
@@ -1,15 +1,31 @@
-from wagtail.images.models import SourceImageIOError
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from wagtail.images.models import Filter, SourceImageIOError
+from wagtail.images.rendition_queue import get_rendition_queue
+from wagtail.images.utils import is_output_format_supported
+
+# The formats of the <source> elements of a picture, followed by the format of its <img>,
+# where None is the format the rendition would normally be saved in. Formats that Pillow
+# can't save are left out
+DEFAULT_PICTURE_FORMATS = ['webp', None]
 
 
 def get_rendition_or_not_found(image, specs):
     """
     Tries to get / create the rendition for the image or renders a not-found image if it does not exist.
 
+    If a rendition queue is configured (see WAGTAILIMAGES_RENDITION_QUEUE), a missing rendition is
+    queued instead, and a placeholder is returned whose URL serves the rendition once it is ready.
+
     :param image: AbstractImage
     :param specs: str or Filter
     :return: Rendition
     """
     try:
+        queue = get_rendition_queue()
+        if queue is not None:
+            return get_rendition_or_pending(image, specs, queue)
         return image.get_rendition(specs)
     except SourceImageIOError:
         # Image file is (probably) missing from /media/original_images - generate a dummy
@@ -19,3 +35,138 @@ def get_rendition_or_not_found(image, specs):
         rendition = Rendition(image=image, width=0, height=0)
         rendition.file.name = 'not-found'
         return rendition
+
+
+def get_rendition_or_pending(image, specs, queue):
+    """
+    Returns the existing rendition for the image, or queues it to be generated and returns an
+    unsaved placeholder rendition whose URL points at the image serve view.
+    """
+    from wagtail.images.views.serve import generate_image_url
+
+    filter = Filter(spec=specs) if isinstance(specs, str) else specs
+
+    rendition = image.find_rendition(filter)
+    if rendition is None:
+        queue.enqueue(image, filter)
+
+        Rendition = image.renditions.model
+        rendition = Rendition(
+            image=image,
+            filter_spec=filter.spec,
+            focal_point_key=image.get_focal_point_key(filter),
+            width=None,
+            height=None,
+        )
+        rendition.pending_url = generate_image_url(image, filter.spec, viewname=queue.serve_view)
+
+    return rendition
+
+
+def get_picture_filter_spec(filter_spec=None, width=None, format=None):
+    """
+    Return the filter spec for one rendition of a picture: `filter_spec` (if any), followed by
+    resizing to `width` and converting to `format`
+    """
+    operations = [filter_spec] if filter_spec else []
+    if width is not None:
+        operations.append('width-%d' % width)
+    if format is not None:
+        operations.append('format-%s' % format)
+    return '|'.join(operations) or 'original'
+
+
+def get_picture_renditions(image, filter_spec=None, widths=None, formats=None):
+    """
+    Return the renditions for a <picture> element showing the image, as a list of
+    (format, renditions) pairs, one for each of `formats`, with one rendition for each of
+    `widths` (or a single rendition if no widths are given). The existing renditions are found
+    and the missing ones generated together, decoding the original image only once.
+
+    :param image: AbstractImage
+    :param filter_spec: str, operations to apply before resizing, e.g. 'fill-800x600'
+    :param widths: list of int
+    :param formats: list of output formats, e.g. ['webp', 'jpeg'], where None is the format the
+        rendition would normally be saved in. Defaults to DEFAULT_PICTURE_FORMATS. Formats that
+        Pillow can't save are left out
+    """
+    if formats is None:
+        formats = DEFAULT_PICTURE_FORMATS
+    formats = [format for format in formats if is_output_format_supported(format)] or [None]
+    widths = widths or [None]
+
+    specs = [
+        [get_picture_filter_spec(filter_spec, width, format) for width in widths]
+        for format in formats
+    ]
+
+    queue = get_rendition_queue()
+    if queue is not None:
+        renditions = {
+            spec: get_rendition_or_pending(image, spec, queue)
+            for format_specs in specs for spec in format_specs
+        }
+    else:
+        renditions = image.get_renditions(*[spec for format_specs in specs for spec in format_specs])
+
+    return [
+        (format, [renditions[spec] for spec in format_specs])
+        for format, format_specs in zip(formats, specs)
+    ]
+
+
+def _get_srcset(renditions, widths):
+    if widths is None:
+        return renditions[0].url
+
+    srcset = []
+    seen_widths = set()
+    for rendition, width in zip(renditions, widths):
+        # Renditions aren't enlarged, so several may have the same width
+        width = rendition.width or width
+        if width not in seen_widths:
+            seen_widths.add(width)
+            srcset.append('%s %dw' % (rendition.url, width))
+    return ', '.join(srcset)
+
+
+def render_picture(image, filter_spec=None, widths=None, formats=None, sizes=None, attrs=None):
+    """
+    Return the HTML of a <picture> element showing the image, with a <source> for each of
+    `formats` but the last, and an <img> in the last format. Each has a srcset with one
+    rendition per width, see get_picture_renditions. The <img> falls back to the first width,
+    and has any extra `attrs` given.
+    """
+    picture_renditions = get_picture_renditions(image, filter_spec, widths, formats)
+
+    sources = format_html_join('', '<source{}>', (
+        (flatatt({
+            'srcset': _get_srcset(renditions, widths),
+            'sizes': sizes,
+            'type': 'image/%s' % format if format else None,
+        }),)
+        for format, renditions in picture_renditions[:-1]
+    ))
+
+    img_tag = _render_srcset_img(picture_renditions[-1][1], widths, sizes, attrs)
+
+    return format_html('<picture>{}{}</picture>', sources, img_tag)
+
+
+def _render_srcset_img(renditions, widths, sizes, attrs):
+    img_attrs = {
+        'srcset': _get_srcset(renditions, widths) if widths else None,
+        'sizes': sizes,
+    }
+    img_attrs.update(attrs or {})
+    return renditions[0].img_tag(img_attrs)
+
+
+def render_srcset_image(image, filter_spec=None, widths=None, sizes=None, attrs=None):
+    """
+    Return the HTML of an <img> showing the image, with a srcset of one rendition per width in
+    the format the renditions would normally be saved in. The src is the rendition for the
+    first width, and the <img> has any extra `attrs` given.
+    """
+    renditions = get_picture_renditions(image, filter_spec, widths, formats=[None])[0][1]
+    return _render_srcset_img(renditions, widths, sizes, attrs)
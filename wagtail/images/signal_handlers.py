@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 
-from wagtail.images import get_image_model
+from wagtail.core.rich_text.cache import invalidate_rich_text_cache
+from wagtail.images import get_image_model, rendition_cache
 
 
 def post_delete_file_cleanup(instance, **kwargs):
@@ -10,6 +11,25 @@ def post_delete_file_cleanup(instance, **kwargs):
     transaction.on_commit(lambda: instance.file.delete(False))
 
 
+def post_delete_rendition_file_cleanup(instance, **kwargs):
+    if rendition_cache.is_enabled():
+        rendition_cache.delete_renditions([instance])
+        # Also after the transaction commits, in case another request has cached the
+        # rendition again in the meantime
+        transaction.on_commit(lambda: rendition_cache.delete_renditions([instance]))
+
+    def delete_file():
+        # Renditions of images with the same file contents can share a file, which is only
+        # deleted along with the last of them
+        Rendition = type(instance)
+        if not Rendition._default_manager.filter(
+            filter_spec=instance.filter_spec, file=instance.file.name
+        ).exists():
+            instance.file.delete(False)
+
+    transaction.on_commit(delete_file)
+
+
 def pre_save_image_feature_detection(instance, **kwargs):
     if getattr(settings, 'WAGTAILIMAGES_FEATURE_DETECTION_ENABLED', False):
         # Make sure the image doesn't already have a focal point
@@ -18,10 +38,23 @@ def pre_save_image_feature_detection(instance, **kwargs):
             instance.set_focal_point(instance.get_suggested_focal_point())
 
 
+def rich_text_cache_invalidation(instance, **kwargs):
+    invalidate_rich_text_cache('image', [instance.pk])
+
+
+def post_save_rendition_cache_invalidation(instance, **kwargs):
+    # The cached renditions keep the image's old field values (e.g. a changed file)
+    if rendition_cache.is_enabled():
+        rendition_cache.delete_renditions(instance.renditions.all())
+
+
 def register_signal_handlers():
     Image = get_image_model()
     Rendition = Image.get_rendition_model()
 
     pre_save.connect(pre_save_image_feature_detection, sender=Image)
     post_delete.connect(post_delete_file_cleanup, sender=Image)
-    post_delete.connect(post_delete_file_cleanup, sender=Rendition)
+    post_delete.connect(post_delete_rendition_file_cleanup, sender=Rendition)
+    post_save.connect(rich_text_cache_invalidation, sender=Image)
+    post_save.connect(post_save_rendition_cache_invalidation, sender=Image)
+    post_delete.connect(rich_text_cache_invalidation, sender=Image)
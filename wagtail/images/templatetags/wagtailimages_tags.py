@@ -6,7 +6,7 @@ from django.urls import NoReverseMatch
 from django.utils.functional import cached_property
 
 from wagtail.images.models import Filter
-from wagtail.images.shortcuts import get_rendition_or_not_found
+from wagtail.images.shortcuts import get_rendition_or_not_found, render_picture, render_srcset_image
 from wagtail.images.views.serve import generate_image_url
 
 
@@ -116,6 +116,114 @@ class ImageNode(template.Node):
             return rendition.img_tag(resolved_attrs)
 
 
+def parse_picture_option(value):
+    # Widths and formats can be given as lists, or as comma-separated strings
+    if isinstance(value, str):
+        value = [item.strip() for item in value.split(',') if item.strip()]
+    return list(value)
+
+
+def parse_picture_tag(parser, token, usage):
+    # Returns the image expression, filter spec and attributes of a picture or srcset_image tag
+    bits = token.split_contents()
+    tag_name = bits.pop(0)
+    if not bits:
+        raise template.TemplateSyntaxError("'%s' tag should be of the form %s" % (tag_name, usage))
+    image_expr = parser.compile_filter(bits[0])
+
+    filter_specs = []
+    attrs = {}
+    for bit in bits[1:]:
+        try:
+            name, value = bit.split('=', 1)
+            attrs[name] = parser.compile_filter(value)
+        except ValueError:
+            if allowed_filter_pattern.match(bit):
+                filter_specs.append(bit)
+            else:
+                raise template.TemplateSyntaxError(
+                    "filter specs in '%s' tag may only contain A-Z, a-z, 0-9, dots, hyphens and underscores. "
+                    "(given filter: %s)" % (tag_name, bit)
+                )
+
+    return image_expr, '|'.join(filter_specs), attrs
+
+
+@register.tag(name="picture")
+def picture(parser, token):
+    image_expr, filter_spec, attrs = parse_picture_tag(
+        parser, token,
+        "{% picture self.photo [fill-800x600] [widths=\"400,800\"] [formats=\"webp,jpeg\"] [sizes=\"...\"] "
+        "[ custom-attr=\"value\" ... ] %}"
+    )
+    return PictureNode(image_expr, filter_spec, attrs=attrs)
+
+
+class PictureNode(template.Node):
+    tag_name = 'picture'
+
+    def __init__(self, image_expr, filter_spec, attrs={}):
+        self.image_expr = image_expr
+        self.filter_spec = filter_spec
+        self.attrs = attrs
+
+    def render(self, context):
+        try:
+            image = self.image_expr.resolve(context)
+        except template.VariableDoesNotExist:
+            return ''
+
+        if not image:
+            return ''
+
+        if not hasattr(image, 'get_renditions'):
+            raise ValueError("%s tag expected an Image object, got %r" % (self.tag_name, image))
+
+        attrs = {key: value.resolve(context) for key, value in self.attrs.items()}
+        widths = attrs.pop('widths', None)
+        return self.render_image(
+            image,
+            widths=[int(width) for width in parse_picture_option(widths)] if widths else None,
+            attrs=attrs,
+        )
+
+    def render_image(self, image, widths, attrs):
+        formats = attrs.pop('formats', None)
+        return render_picture(
+            image,
+            filter_spec=self.filter_spec,
+            widths=widths,
+            formats=parse_picture_option(formats) if formats else None,
+            sizes=attrs.pop('sizes', None),
+            attrs=attrs,
+        )
+
+
+@register.tag(name="srcset_image")
+def srcset_image(parser, token):
+    usage = (
+        "{% srcset_image self.photo [fill-800x600] widths=\"400,800,1200\" [sizes=\"...\"] "
+        "[ custom-attr=\"value\" ... ] %}"
+    )
+    image_expr, filter_spec, attrs = parse_picture_tag(parser, token, usage)
+    if 'widths' not in attrs:
+        raise template.TemplateSyntaxError("'srcset_image' tag should be of the form %s" % usage)
+    return SrcsetImageNode(image_expr, filter_spec, attrs=attrs)
+
+
+class SrcsetImageNode(PictureNode):
+    tag_name = 'srcset_image'
+
+    def render_image(self, image, widths, attrs):
+        return render_srcset_image(
+            image,
+            filter_spec=self.filter_spec,
+            widths=widths,
+            sizes=attrs.pop('sizes', None),
+            attrs=attrs,
+        )
+
+
 @register.simple_tag()
 def image_url(image, filter_spec, viewname='wagtailimages_serve'):
     try:
@@ -1,12 +1,16 @@
 from io import BytesIO
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
+import PIL.Image
+from django.core.files.images import ImageFile
 from django.test import TestCase, override_settings
+from PIL.JpegImagePlugin import JpegImageFile
 
 from wagtail.core import hooks
 from wagtail.images import image_operations
 from wagtail.images.exceptions import InvalidFilterSpecError
 from wagtail.images.models import Filter, Image
+from wagtail.images.rect import Rect
 from wagtail.images.tests.utils import (
     get_test_image_file, get_test_image_file_jpeg, get_test_image_file_webp)
 
@@ -701,3 +705,66 @@ class TestWebpFormatConversion(TestCase):
         out = fil.run(image, BytesIO())
 
         self.assertEqual(out.format_name, 'webp')
+
+
+class TestJPEGDraftMode(TestCase):
+    def setUp(self):
+        # Left half black, right half white
+        f = BytesIO()
+        pillow_image = PIL.Image.new('RGB', (2000, 1500), 'white')
+        pillow_image.paste((0, 0, 0), (0, 0, 1000, 1500))
+        pillow_image.save(f, 'JPEG')
+        self.image = Image.objects.create(title="Test image", file=ImageFile(f, name='test.jpg'))
+
+    def run_filter(self, spec):
+        with patch.object(JpegImageFile, 'draft', autospec=True, side_effect=JpegImageFile.draft) as draft:
+            out = Filter(spec=spec).run(self.image, BytesIO())
+        return out, draft
+
+    def test_downscale_uses_draft(self):
+        out, draft = self.run_filter('width-200')
+
+        draft.assert_called_once_with(ANY, 'RGB', (200, 150))
+        self.assertEqual(out.get_size(), (200, 150))
+
+    def test_small_downscale_doesnt_use_draft(self):
+        out, draft = self.run_filter('width-1200')
+
+        draft.assert_not_called()
+        self.assertEqual(out.get_size(), (1200, 900))
+
+    def test_scale_uses_draft(self):
+        out, draft = self.run_filter('scale-50')
+
+        draft.assert_called_once_with(ANY, 'RGB', (1000, 750))
+        self.assertEqual(out.get_size(), (1000, 750))
+
+    def test_crop_doesnt_use_draft(self):
+        out, draft = self.run_filter('crop-0,0:2000,1500|width-200')
+
+        draft.assert_not_called()
+
+    def test_output_options_before_resize(self):
+        out, draft = self.run_filter('jpegquality-40|max-100x100')
+
+        draft.assert_called_once_with(ANY, 'RGB', (100, 75))
+        self.assertEqual(out.get_size(), (100, 75))
+
+    def test_fill_with_focal_point(self):
+        # The crop is 1500x1500, from x=450 to x=1950, so its left 550 pixels are black
+        self.image.set_focal_point(Rect(1700, 700, 1900, 800))
+
+        out, draft = self.run_filter('fill-150x150')
+        draft.assert_called_once_with(ANY, 'RGB', (200, 150))
+
+        self.assertEqual(out.get_size(), (150, 150))
+        pillow_image = out.get_pillow_image()
+        self.assertLess(pillow_image.getpixel((40, 75))[0], 20)
+        self.assertGreater(pillow_image.getpixel((70, 75))[0], 235)
+
+    @override_settings(WAGTAILIMAGES_JPEG_DRAFT_MODE=False)
+    def test_disabled(self):
+        out, draft = self.run_filter('width-200')
+
+        draft.assert_not_called()
+        self.assertEqual(out.get_size(), (200, 150))
@@ -1,4 +1,5 @@
 import os
+import unittest
 
 from django import template
 from django.conf import settings
@@ -7,6 +8,7 @@ from django.template import engines
 from django.test import TestCase
 
 from wagtail.core.models import Site
+from wagtail.images.utils import is_output_format_supported
 
 from .utils import Image, get_test_image_file
 
@@ -101,3 +103,18 @@ class TestImagesJinja(TestCase):
             self.render('{{ image_url(myimage, "width-200", "wagtailimages_serve_custom_view") }}', {'myimage': self.image}),
             '/testimages/custom_view/.*/width-200/{}'.format(self.image.file.name.split('/')[-1]),
         )
+
+    @unittest.skipUnless(is_output_format_supported('webp'), "Pillow was built without WebP support")
+    def test_picture(self):
+        rendered = self.render(
+            '{{ picture(myimage, "width-200", formats=["webp", "jpeg"], class="photo") }}', {'myimage': self.image})
+        self.assertIn('<picture>', rendered)
+        self.assertIn('type="image/webp"', rendered)
+        self.assertIn('class="photo"', rendered)
+        self.assertRegex(rendered, r'<img [^>]*src="[^"]+\.jpg"')
+
+    def test_srcset_image(self):
+        rendered = self.render(
+            '{{ srcset_image(myimage, widths=[100, 200], sizes="50vw") }}', {'myimage': self.image})
+        self.assertRegex(rendered, r'^<img [^>]*srcset="[^"]+ 100w, [^"]+ 200w"')
+        self.assertIn('sizes="50vw"', rendered)
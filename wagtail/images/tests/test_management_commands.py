@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core import management
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from wagtail.images.management.commands.wagtail_generate_renditions import generate_renditions
+from wagtail.images.models import Rendition
+
+from .utils import Image, get_test_image_file
+
+
+class TestGenerateRenditionsCommand(TestCase):
+    def setUp(self):
+        self.images = [
+            Image.objects.create(title="Test image %d" % i, file=get_test_image_file())
+            for i in range(3)
+        ]
+
+    def run_command(self, *args, **options):
+        output = StringIO()
+        management.call_command('wagtail_generate_renditions', *args, stdout=output, stderr=StringIO(), **options)
+        output.seek(0)
+        return output.read()
+
+    def test_generates_missing_renditions(self):
+        self.images[0].get_rendition('width-400')
+
+        output = self.run_command('width-400', 'fill-100x100', chunk_size=2)
+
+        self.assertEqual(Rendition.objects.filter(filter_spec='width-400').count(), 3)
+        self.assertEqual(Rendition.objects.filter(filter_spec='fill-100x100').count(), 3)
+        self.assertIn("3/3 images processed", output)
+        self.assertIn("5 renditions generated, 0 failed", output)
+
+    def test_existing_renditions_are_skipped(self):
+        self.run_command('width-400')
+
+        with self.assertNumQueries(3):
+            # Count images, then fetch the chunk and its existing renditions
+            output = self.run_command('width-400')
+
+        self.assertIn("0 renditions generated", output)
+
+    def test_start_after(self):
+        self.run_command('width-400', start_after=self.images[0].pk)
+
+        self.assertEqual(
+            list(Rendition.objects.filter(filter_spec='width-400').values_list('image_id', flat=True).order_by('image_id')),
+            [self.images[1].pk, self.images[2].pk]
+        )
+
+    def test_discover(self):
+        self.images[0].get_rendition('max-123x456')
+
+        output = self.run_command(discover=True)
+
+        # Used by an existing rendition
+        self.assertEqual(Rendition.objects.filter(filter_spec='max-123x456').count(), 3)
+        # Used by a registered rich text image format
+        self.assertEqual(Rendition.objects.filter(filter_spec='width-500').count(), 3)
+        # Used in an {% image %} tag in the admin templates
+        self.assertIn('max-165x165', output)
+
+    def test_invalid_filter_spec(self):
+        with self.assertRaises(CommandError):
+            self.run_command('foo-400')
+
+    def test_no_filter_specs(self):
+        with self.assertRaises(CommandError):
+            self.run_command()
+
+    def test_deleted_image_is_skipped(self):
+        image_id = self.images[0].pk
+        self.images[0].delete()
+
+        self.assertEqual(generate_renditions(image_id, ['width-100']), (image_id, 0, []))
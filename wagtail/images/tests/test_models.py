@@ -1,16 +1,22 @@
+import hashlib
 import unittest
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.template import Context, Template
 from django.test import TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from willow.image import Image as WillowImage
 
 from wagtail.core.models import Collection, GroupCollectionPermission, Page
-from wagtail.images.models import Rendition, SourceImageIOError
+from wagtail.images import rendition_locks
+from wagtail.images.models import Filter, Rendition, SourceImageIOError, get_renditions
 from wagtail.images.rect import Rect
 from wagtail.tests.testapp.models import EventPage, EventPageCarouselItem
 from wagtail.tests.utils import WagtailTestUtils
@@ -95,6 +101,22 @@ class TestImage(TestCase):
         with self.assertRaises(SourceImageIOError):
             self.image.get_file_size()
 
+    def test_get_file_hash(self):
+        self.image.file.open('rb')
+        expected_hash = hashlib.sha1(self.image.file.read()).hexdigest()
+        self.image.file.close()
+
+        file_hash = self.image.get_file_hash()
+
+        self.assertEqual(file_hash, expected_hash)
+        self.assertEqual(Image.objects.get(id=self.image.id).file_hash, expected_hash)
+        self.assertTrue(self.image.file.closed)
+
+    def test_get_file_hash_on_missing_file_raises_sourceimageioerror(self):
+        self.image.file.delete(save=False)
+        with self.assertRaises(SourceImageIOError):
+            self.image.get_file_hash()
+
 
 class TestImageQuerySet(TestCase):
     def test_search_method(self):
@@ -253,6 +275,308 @@ class TestRenditions(TestCase):
         self.assertEqual(rendition.alt, "Test image")
 
 
+class TestGetRenditions(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(
+            title="Test image",
+            file=get_test_image_file(),
+        )
+
+    def test_get_renditions(self):
+        existing_rendition = self.image.get_rendition('width-400')
+
+        renditions = self.image.get_renditions('width-400', 'fill-100x100', 'max-50x50')
+
+        self.assertEqual(set(renditions.keys()), {'width-400', 'fill-100x100', 'max-50x50'})
+        self.assertEqual(renditions['width-400'], existing_rendition)
+        self.assertEqual((renditions['fill-100x100'].width, renditions['fill-100x100'].height), (100, 100))
+        self.assertEqual((renditions['max-50x50'].width, renditions['max-50x50'].height), (50, 37))
+        self.assertEqual(renditions['max-50x50'], self.image.get_rendition('max-50x50'))
+
+    def test_existing_renditions_are_fetched_in_one_query(self):
+        self.image.get_renditions('width-400', 'width-800', 'width-1200')
+        image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(1):
+            renditions = image.get_renditions('width-400', 'width-800', 'width-1200')
+
+        self.assertEqual(set(renditions.keys()), {'width-400', 'width-800', 'width-1200'})
+
+    def test_missing_renditions_share_one_decode(self):
+        with mock.patch.object(Image, 'get_willow_image', wraps=self.image.get_willow_image) as get_willow_image:
+            self.image.get_renditions('width-400', 'fill-100x100', 'max-50x50')
+
+        self.assertEqual(get_willow_image.call_count, 1)
+
+    def test_missing_source_file(self):
+        Image.objects.filter(id=self.image.id).update(file='original_images/missing.png')
+        image = Image.objects.get(id=self.image.id)
+
+        renditions = image.get_renditions('width-400', 'fill-100x100')
+
+        self.assertEqual(renditions['width-400'].pk, None)
+        self.assertEqual(renditions['width-400'].file.name, 'source-image-not-found')
+        self.assertFalse(Rendition.objects.filter(image=self.image).exists())
+
+
+class TestSharedRenditionFiles(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file(), file_hash='abc')
+        self.copy = Image.objects.create(title="Test image copy", file=get_test_image_file(), file_hash='abc')
+        self.rendition = self.image.get_rendition('fill-100x100')
+
+    def test_identical_image_reuses_rendition_file(self):
+        with mock.patch.object(Filter, 'run_many') as run_many:
+            rendition = self.copy.get_rendition('fill-100x100')
+
+        run_many.assert_not_called()
+        self.assertEqual(rendition.image, self.copy)
+        self.assertEqual(rendition.file.name, self.rendition.file.name)
+        self.assertEqual((rendition.width, rendition.height), (100, 100))
+        self.assertEqual(self.copy.get_rendition('fill-100x100'), rendition)
+
+    def test_get_renditions(self):
+        with mock.patch.object(Filter, 'run_many', wraps=Filter.run_many) as run_many:
+            renditions = self.copy.get_renditions('fill-100x100', 'width-400')
+
+        # Only the rendition that the other image doesn't have is generated
+        self.assertEqual([filter.spec for filter in run_many.call_args[0][0]], ['width-400'])
+        self.assertEqual(renditions['fill-100x100'].file.name, self.rendition.file.name)
+        self.assertEqual(renditions['width-400'].width, 400)
+
+    def test_get_renditions_looks_up_identical_renditions_together(self):
+        self.image.get_renditions('width-400', 'max-50x50')
+
+        with CaptureQueriesContext(connection) as queries:
+            renditions = self.copy.get_renditions('fill-100x100', 'width-400', 'max-50x50')
+
+        self.assertEqual(len([query for query in queries if 'file_hash' in query['sql']]), 1)
+        self.assertEqual(renditions['max-50x50'].file.name, self.image.get_rendition('max-50x50').file.name)
+
+    def test_different_focal_point(self):
+        self.copy.set_focal_point(Rect(0, 0, 100, 100))
+        self.copy.save()
+
+        rendition = self.copy.get_rendition('fill-100x100')
+
+        self.assertNotEqual(rendition.file.name, self.rendition.file.name)
+
+    def test_different_file(self):
+        other = Image.objects.create(title="Other image", file=get_test_image_file(), file_hash='def')
+
+        rendition = other.get_rendition('fill-100x100')
+
+        self.assertNotEqual(rendition.file.name, self.rendition.file.name)
+
+    @override_settings(WAGTAILIMAGES_SHARE_RENDITION_FILES=False)
+    def test_disabled(self):
+        rendition = self.copy.get_rendition('fill-100x100')
+
+        self.assertNotEqual(rendition.file.name, self.rendition.file.name)
+
+
+@override_settings(
+    WAGTAILIMAGES_RENDITION_CACHE=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class TestRenditionCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+        self.rendition = self.image.get_rendition('width-400')
+
+    def test_cached_rendition(self):
+        image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(0):
+            rendition = image.get_rendition('width-400')
+            self.assertEqual(rendition.pk, self.rendition.pk)
+            self.assertEqual(rendition.url, self.rendition.url)
+            self.assertEqual((rendition.width, rendition.height), (400, 300))
+            self.assertEqual(rendition.alt, self.rendition.alt)
+            self.assertIs(rendition.image, image)
+
+    def test_image_tag(self):
+        template = Template('{% load wagtailimages_tags %}{% image image width-400 %}')
+        image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(0):
+            result = template.render(Context({'image': image}))
+
+        self.assertIn('src="%s"' % self.rendition.url, result)
+
+    def test_looked_up_rendition_is_cached(self):
+        cache.clear()
+        Image.objects.get(id=self.image.id).get_rendition('width-400')
+
+        image = Image.objects.get(id=self.image.id)
+        with self.assertNumQueries(0):
+            image.get_rendition('width-400')
+
+    def test_get_renditions(self):
+        images = [self.image, Image.objects.create(title="Other image", file=get_test_image_file())]
+
+        # The missing rendition of the other image is generated and cached
+        get_renditions(images, 'width-400')
+
+        images = list(Image.objects.filter(id__in=[image.id for image in images]).order_by('id'))
+        with self.assertNumQueries(0):
+            renditions = get_renditions(images, 'width-400')
+        self.assertEqual([rendition.width for rendition in renditions], [400, 400])
+
+    def test_deleting_rendition_invalidates_cache(self):
+        self.rendition.delete()
+        image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(image.find_rendition('width-400'))
+
+    def test_saving_image_invalidates_cache(self):
+        self.image.save()
+        image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(image.find_rendition('width-400'), self.rendition)
+
+    def test_focal_point_change(self):
+        self.image.set_focal_point(Rect(100, 100, 200, 200))
+        self.image.save()
+
+        rendition = self.image.get_rendition('fill-100x100')
+        self.assertEqual(self.image.get_rendition('fill-100x100'), rendition)
+
+        self.image.set_focal_point(Rect(300, 300, 400, 400))
+        self.image.save()
+
+        self.assertNotEqual(self.image.get_rendition('fill-100x100'), rendition)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestRenditionLocking(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+        self.filter = Filter(spec='width-400')
+        self.lock_key = rendition_locks.get_lock_key(self.image, 'width-400', '')
+
+    def test_lock_released_after_generating(self):
+        self.image.get_rendition(self.filter)
+
+        self.assertIsNone(cache.get(self.lock_key))
+
+    def test_waits_for_rendition_generated_elsewhere(self):
+        # Another process holds the lock, and finishes generating the rendition while we wait
+        cache.add(self.lock_key, 'other')
+
+        def generate_elsewhere(seconds):
+            image = Image.objects.get(id=self.image.id)
+            image._create_rendition(image.renditions, self.filter)
+            cache.delete(self.lock_key)
+
+        with mock.patch.object(Filter, 'run_many', wraps=Filter.run_many) as run_many:
+            with mock.patch('time.sleep', side_effect=generate_elsewhere):
+                rendition = self.image.get_rendition(self.filter)
+
+        # Only the other process generated it
+        self.assertEqual(run_many.call_count, 1)
+        self.assertEqual(rendition, Rendition.objects.get(image=self.image, filter_spec='width-400'))
+
+    def test_generates_rendition_if_lock_released_without_it(self):
+        cache.add(self.lock_key, 'other')
+
+        # The other process fails
+        with mock.patch('time.sleep', side_effect=lambda seconds: cache.delete(self.lock_key)):
+            rendition = self.image.get_rendition(self.filter)
+
+        self.assertEqual(rendition.width, 400)
+        self.assertIsNotNone(rendition.pk)
+
+    def test_get_renditions_waits_for_rendition_generated_elsewhere(self):
+        cache.add(self.lock_key, 'other')
+
+        def generate_elsewhere(seconds):
+            image = Image.objects.get(id=self.image.id)
+            image._create_rendition(image.renditions, self.filter)
+            cache.delete(self.lock_key)
+
+        with mock.patch.object(Filter, 'run_many', wraps=Filter.run_many) as run_many:
+            with mock.patch('time.sleep', side_effect=generate_elsewhere):
+                renditions = self.image.get_renditions('width-400', 'width-200')
+
+        # This process only generated the rendition that wasn't locked
+        self.assertEqual(
+            [[filter.spec for filter in call[0][0]] for call in run_many.call_args_list],
+            [['width-200'], ['width-400']]
+        )
+        self.assertEqual(renditions['width-400'], Rendition.objects.get(image=self.image, filter_spec='width-400'))
+        self.assertEqual(renditions['width-200'].width, 200)
+        self.assertIsNone(cache.get(rendition_locks.get_lock_key(self.image, 'width-200', '')))
+
+    @override_settings(WAGTAILIMAGES_RENDITION_LOCK_TIMEOUT=0)
+    def test_disabled(self):
+        cache.add(self.lock_key, 'other')
+
+        with mock.patch('time.sleep') as sleep:
+            rendition = self.image.get_rendition(self.filter)
+
+        sleep.assert_not_called()
+        self.assertEqual(rendition.width, 400)
+
+
+class TestRenditionPrefetching(TestCase):
+    def setUp(self):
+        self.images = [
+            Image.objects.create(title="Test image %d" % i, file=get_test_image_file())
+            for i in range(3)
+        ]
+        for image in self.images:
+            image.get_rendition('width-400')
+            image.get_rendition('max-100x100')
+
+    def test_prefetch_renditions(self):
+        with self.assertNumQueries(2):
+            images = list(Image.objects.filter(title__startswith="Test image").prefetch_renditions('width-400'))
+            for image in images:
+                rendition = image.get_rendition('width-400')
+                self.assertEqual(rendition.width, 400)
+                self.assertIs(rendition.image, image)
+
+        # Other filters are looked up individually, as before
+        with self.assertNumQueries(1):
+            self.assertEqual(images[0].get_rendition('max-100x100').width, 100)
+
+    def test_prefetch_all_renditions(self):
+        images = list(Image.objects.filter(title__startswith="Test image").prefetch_renditions())
+
+        with self.assertNumQueries(0):
+            for image in images:
+                self.assertEqual(image.get_rendition('width-400').width, 400)
+                self.assertEqual(image.get_rendition('max-100x100').width, 100)
+
+    def test_get_renditions(self):
+        images = list(Image.objects.filter(title__startswith="Test image"))
+
+        with self.assertNumQueries(1):
+            renditions = get_renditions(images, 'width-400')
+
+        self.assertEqual([rendition.image for rendition in renditions], images)
+        self.assertEqual([rendition.width for rendition in renditions], [400, 400, 400])
+
+        # The renditions are reused by get_rendition
+        with self.assertNumQueries(0):
+            self.assertEqual(images[1].get_rendition('width-400'), renditions[1])
+
+    def test_get_renditions_generates_missing_renditions(self):
+        images = list(Image.objects.filter(title__startswith="Test image"))
+        images[0].get_rendition('fill-100x100')
+
+        renditions = get_renditions(images, 'fill-100x100')
+
+        self.assertEqual(renditions[0], images[0].get_rendition('fill-100x100'))
+        self.assertEqual(Rendition.objects.filter(filter_spec='fill-100x100').count(), 3)
+        self.assertEqual([(rendition.width, rendition.height) for rendition in renditions], [(100, 100)] * 3)
+
+
 class TestUsageCount(TestCase):
     fixtures = ['test.json']
 
@@ -0,0 +1,118 @@
+import threading
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from wagtail.core.models import Collection
+from wagtail.images.models import Filter, Rendition
+from wagtail.images.rendition_queue import (
+    BaseRenditionQueue, ThreadPoolRenditionQueue, generate_rendition, get_rendition_queue)
+from wagtail.images.views.serve import generate_image_url
+
+from .utils import Image, get_test_image_file
+
+
+class RecordingRenditionQueue(BaseRenditionQueue):
+    def __init__(self, params):
+        super().__init__(params)
+        self.enqueued = []
+
+    def enqueue(self, image, filter):
+        self.enqueued.append((image.pk, filter.spec))
+
+
+@override_settings(WAGTAILIMAGES_RENDITION_QUEUE={
+    'BACKEND': 'wagtail.images.tests.test_rendition_queue.RecordingRenditionQueue',
+})
+class TestImageTagWithRenditionQueue(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+
+    def render_image_tag(self, filter_spec):
+        template = Template('{% load wagtailimages_tags %}{% image image ' + filter_spec + ' %}')
+        return template.render(Context({'image': self.image}))
+
+    def test_missing_rendition_is_queued(self):
+        result = self.render_image_tag('width-400')
+
+        self.assertIn('src="%s"' % generate_image_url(self.image, 'width-400'), result)
+        self.assertEqual(get_rendition_queue().enqueued, [(self.image.pk, 'width-400')])
+        self.assertFalse(Rendition.objects.filter(image=self.image).exists())
+
+    def test_existing_rendition_is_used(self):
+        rendition = self.image.get_rendition('width-400')
+
+        result = self.render_image_tag('width-400')
+
+        self.assertIn('src="%s"' % rendition.url, result)
+        self.assertIn('width="400"', result)
+        self.assertEqual(get_rendition_queue().enqueued, [])
+
+    def test_serve_view_generates_queued_rendition(self):
+        self.render_image_tag('width-400')
+
+        response = self.client.get(generate_image_url(self.image, 'width-400'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Rendition.objects.filter(image=self.image, filter_spec='width-400').exists())
+
+
+class TestGenerateRendition(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", file=get_test_image_file())
+
+    def test_concurrent_calls_generate_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get_rendition(filter):
+            started.set()
+            release.wait()
+            return mock.sentinel.rendition
+
+        results = []
+        with mock.patch.object(self.image, 'get_rendition', side_effect=slow_get_rendition) as get_rendition:
+            thread = threading.Thread(target=lambda: results.append(generate_rendition(self.image, 'width-400')))
+            thread.start()
+            started.wait()
+
+            waiter = threading.Thread(target=lambda: results.append(generate_rendition(self.image, 'width-400')))
+            waiter.start()
+            waiter.join(0.2)
+
+            # The second call is waiting for the first to finish, rather than generating it too
+            self.assertTrue(waiter.is_alive())
+            self.assertEqual(get_rendition.call_count, 1)
+
+            get_rendition.side_effect = None
+            get_rendition.return_value = mock.sentinel.looked_up
+            release.set()
+            thread.join()
+            waiter.join()
+
+        # Once finished, the waiting call looks up the rendition that was generated
+        self.assertCountEqual(results, [mock.sentinel.rendition, mock.sentinel.looked_up])
+
+
+class TestThreadPoolRenditionQueue(TransactionTestCase):
+    def setUp(self):
+        # Required to create root collection because the TransactionTestCase
+        # does not make initial data loaded in migrations available
+        Collection.objects.get_or_create(
+            name="Root",
+            path='0001',
+            depth=1,
+            numchild=0,
+        )
+
+    def test_generates_rendition(self):
+        image = Image.objects.create(title="Test image", file=get_test_image_file())
+        queue = ThreadPoolRenditionQueue({'WORKERS': 1})
+
+        queue.enqueue(image, Filter(spec='width-400'))
+        queue.enqueue(image, Filter(spec='width-400'))
+        queue.executor.shutdown(wait=True)
+
+        self.assertEqual(Rendition.objects.filter(image=image, filter_spec='width-400').count(), 1)
+        self.assertEqual(queue.queued, set())
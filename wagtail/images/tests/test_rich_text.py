@@ -114,3 +114,30 @@ class TestFrontendImageEmbedHandler(TestCase, WagtailTestUtils):
             'format': 'left',
         })
         self.assertTagInHTML('<img class="richtext-image left" alt="" />', result, allow_extra_attrs=True)
+
+
+class TestFrontendImageEmbedHandlerMany(TestCase):
+    def setUp(self):
+        self.images = [
+            Image.objects.create(title="Test image %d" % i, file=get_test_image_file())
+            for i in range(5)
+        ]
+        self.attrs_list = [
+            {'id': image.id, 'alt': image.title, 'format': 'left'} for image in self.images
+        ] + [{'id': 0, 'format': 'left'}]
+
+    def test_expand_db_attributes_many(self):
+        result = FrontendImageEmbedHandler.expand_db_attributes_many(self.attrs_list)
+
+        self.assertEqual(len(result), 6)
+        self.assertIn('alt="Test image 3"', result[3])
+        self.assertEqual(result[5], '<img alt="">')
+
+    def test_existing_renditions_are_fetched_together(self):
+        FrontendImageEmbedHandler.expand_db_attributes_many(self.attrs_list)
+
+        # One query for the images and one for their renditions
+        with self.assertNumQueries(2):
+            result = FrontendImageEmbedHandler.expand_db_attributes_many(self.attrs_list)
+
+        self.assertIn('alt="Test image 4"', result[4])
@@ -51,6 +51,20 @@ class TestFilesDeletedForDefaultModels(TransactionTestCase):
             self.assertTrue(rendition.file.storage.exists(filename))
         self.assertFalse(rendition.file.storage.exists(filename))
 
+    def test_shared_rendition_file_kept_until_last_rendition_deleted(self):
+        image = get_image_model().objects.create(
+            title="Test Image", file=get_test_image_file(), file_hash='abc')
+        copy = get_image_model().objects.create(
+            title="Test Image copy", file=get_test_image_file(), file_hash='abc')
+        rendition = image.get_rendition('width-100')
+        filename = rendition.file.name
+        self.assertEqual(copy.get_rendition('width-100').file.name, filename)
+
+        image.delete()
+        self.assertTrue(rendition.file.storage.exists(filename))
+        copy.delete()
+        self.assertFalse(rendition.file.storage.exists(filename))
+
 
 @override_settings(WAGTAILIMAGES_IMAGE_MODEL='tests.CustomImage')
 class TestFilesDeletedForCustomModels(TestFilesDeletedForDefaultModels):
@@ -1,5 +1,6 @@
 import os
 import unittest
+import unittest.mock
 
 from django import forms, template
 from django.conf import settings
@@ -14,7 +15,8 @@ from wagtail.images.formats import Format, get_image_format, register_image_form
 from wagtail.images.forms import get_image_form
 from wagtail.images.models import Image as WagtailImage
 from wagtail.images.rect import Rect, Vector
-from wagtail.images.views.serve import ServeView, generate_signature, verify_signature
+from wagtail.images.utils import is_output_format_supported
+from wagtail.images.views.serve import ServeView, generate_signature, parse_range_header, verify_signature
 from wagtail.tests.testapp.models import CustomImage, CustomImageFilePath
 from wagtail.tests.utils import WagtailTestUtils
 
@@ -278,6 +280,119 @@ class TestFormat(TestCase, WagtailTestUtils):
         self.assertEqual(result, self.format)
 
 
+class TestPictureTag(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", alt_text="A photo", file=get_test_image_file())
+
+    def render_picture_tag(self, arguments):
+        temp = template.Template('{% load wagtailimages_tags %}{% picture image_obj ' + arguments + ' %}')
+        return temp.render(template.Context({'image_obj': self.image}))
+
+    @unittest.skipUnless(is_output_format_supported('webp'), "Pillow was built without WebP support")
+    def test_picture(self):
+        result = self.render_picture_tag('fill-400x300 widths="200,400" sizes="50vw" class="photo"')
+
+        renditions = {rendition.filter_spec: rendition for rendition in self.image.renditions.all()}
+        self.assertEqual(set(renditions), {
+            'fill-400x300|width-200|format-webp', 'fill-400x300|width-400|format-webp',
+            'fill-400x300|width-200', 'fill-400x300|width-400',
+        })
+        self.assertHTMLEqual(result, """
+            <picture>
+                <source srcset="{webp_200} 200w, {webp_400} 400w" sizes="50vw" type="image/webp">
+                <img src="{png_200}" srcset="{png_200} 200w, {png_400} 400w" sizes="50vw"
+                    width="200" height="150" alt="A photo" class="photo">
+            </picture>
+        """.format(
+            webp_200=renditions['fill-400x300|width-200|format-webp'].url,
+            webp_400=renditions['fill-400x300|width-400|format-webp'].url,
+            png_200=renditions['fill-400x300|width-200'].url,
+            png_400=renditions['fill-400x300|width-400'].url,
+        ))
+
+    @unittest.skipUnless(is_output_format_supported('webp'), "Pillow was built without WebP support")
+    def test_one_decode(self):
+        with unittest.mock.patch.object(
+            Image, 'get_willow_image', wraps=self.image.get_willow_image
+        ) as get_willow_image:
+            self.render_picture_tag('widths="200,400,600"')
+
+        self.assertEqual(get_willow_image.call_count, 1)
+        self.assertEqual(self.image.renditions.count(), 6)
+
+    @unittest.skipUnless(is_output_format_supported('webp'), "Pillow was built without WebP support")
+    def test_formats(self):
+        result = self.render_picture_tag('width-300 formats="webp,jpeg"')
+
+        webp = self.image.renditions.get(filter_spec='width-300|format-webp')
+        jpeg = self.image.renditions.get(filter_spec='width-300|format-jpeg')
+        self.assertIn('<source srcset="%s" type="image/webp">' % webp.url, result)
+        self.assertIn('src="%s"' % jpeg.url, result)
+        self.assertNotIn('srcset="%s"' % jpeg.url, result)
+
+    @unittest.mock.patch('wagtail.images.utils.features.check', return_value=False)
+    def test_unsupported_formats_are_left_out(self, check):
+        result = self.render_picture_tag('width-300')
+
+        self.assertNotIn('<source', result)
+        self.assertEqual(
+            list(self.image.renditions.values_list('filter_spec', flat=True)), ['width-300'])
+
+    def test_widths_larger_than_image(self):
+        result = self.render_picture_tag('widths="400,800,1200" formats="png"')
+
+        # The image is 640 pixels wide and isn't enlarged
+        rendition = self.image.renditions.get(filter_spec='width-800|format-png')
+        self.assertIn('%s 640w"' % rendition.url, result)
+        self.assertNotIn('1200w', result)
+
+    def test_no_image(self):
+        temp = template.Template('{% load wagtailimages_tags %}{% picture image_obj widths="200" %}')
+        self.assertEqual(temp.render(template.Context({'image_obj': None})), '')
+
+
+class TestSrcsetImageTag(TestCase):
+    def setUp(self):
+        self.image = Image.objects.create(title="Test image", alt_text="A photo", file=get_test_image_file())
+
+    def render_srcset_image_tag(self, arguments):
+        temp = template.Template('{% load wagtailimages_tags %}{% srcset_image image_obj ' + arguments + ' %}')
+        return temp.render(template.Context({'image_obj': self.image}))
+
+    def test_srcset_image(self):
+        result = self.render_srcset_image_tag('fill-400x300 widths="200,400" sizes="50vw" class="photo"')
+
+        renditions = {rendition.filter_spec: rendition for rendition in self.image.renditions.all()}
+        self.assertEqual(set(renditions), {'fill-400x300|width-200', 'fill-400x300|width-400'})
+        self.assertHTMLEqual(result, """
+            <img src="{small}" srcset="{small} 200w, {large} 400w" sizes="50vw"
+                width="200" height="150" alt="A photo" class="photo">
+        """.format(
+            small=renditions['fill-400x300|width-200'].url,
+            large=renditions['fill-400x300|width-400'].url,
+        ))
+
+    def test_existing_renditions_are_fetched_in_one_query(self):
+        self.render_srcset_image_tag('widths="400,800,1200"')
+        self.image = Image.objects.get(id=self.image.id)
+
+        with self.assertNumQueries(1):
+            self.render_srcset_image_tag('widths="400,800,1200"')
+
+    def test_missing_renditions_share_one_decode(self):
+        with unittest.mock.patch.object(
+            Image, 'get_willow_image', wraps=self.image.get_willow_image
+        ) as get_willow_image:
+            self.render_srcset_image_tag('widths="400,800,1200"')
+
+        self.assertEqual(get_willow_image.call_count, 1)
+        self.assertEqual(self.image.renditions.count(), 3)
+
+    def test_widths_required(self):
+        with self.assertRaises(template.TemplateSyntaxError):
+            template.Template('{% load wagtailimages_tags %}{% srcset_image image_obj fill-400x300 %}')
+
+
 class TestSignatureGeneration(TestCase):
     def test_signature_generation(self):
         self.assertEqual(generate_signature(100, 'fill-800x600'), 'xnZOzQyUg6pkfciqcfRJRosOrGg=')
@@ -361,6 +476,43 @@ class TestFrontendServeView(TestCase):
 
         self.assertRedirects(response, expected_redirect_url, status_code=301, fetch_redirect_response=False)
 
+    @unittest.skipUnless(is_output_format_supported('webp'), "Pillow was built without WebP support")
+    def test_get_with_accept_formats(self):
+        signature = generate_signature(self.image.id, 'fill-800x600')
+        url = reverse('wagtailimages_serve_accept_webp', args=(signature, self.image.id, 'fill-800x600'))
+
+        response = self.client.get(url, HTTP_ACCEPT='image/webp,image/apng,image/*,*/*;q=0.8')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn("Accept", response["Vary"].split(", "))
+        self.assertTrue(self.image.renditions.filter(filter_spec='fill-800x600|format-webp').exists())
+
+    def test_get_with_accept_formats_not_accepted(self):
+        signature = generate_signature(self.image.id, 'fill-800x600')
+        url = reverse('wagtailimages_serve_accept_webp', args=(signature, self.image.id, 'fill-800x600'))
+
+        response = self.client.get(url, HTTP_ACCEPT='image/png,image/*,*/*;q=0.8')
+
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn("Accept", response["Vary"].split(", "))
+
+    def test_get_with_accept_formats_refused(self):
+        signature = generate_signature(self.image.id, 'fill-800x600')
+        url = reverse('wagtailimages_serve_accept_webp', args=(signature, self.image.id, 'fill-800x600'))
+
+        response = self.client.get(url, HTTP_ACCEPT='image/webp;q=0,image/*,*/*;q=0.8')
+
+        self.assertEqual(response['Content-Type'], 'image/png')
+
+    def test_get_with_accept_formats_and_format_filter(self):
+        signature = generate_signature(self.image.id, 'fill-800x600|format-jpeg')
+        url = reverse('wagtailimages_serve_accept_webp', args=(signature, self.image.id, 'fill-800x600|format-jpeg'))
+
+        response = self.client.get(url, HTTP_ACCEPT='image/webp,*/*')
+
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
     def test_init_with_unknown_action_raises_error(self):
         with self.assertRaises(ImproperlyConfigured):
             ServeView.as_view(action='unknown')
@@ -441,6 +593,100 @@ class TestFrontendServeView(TestCase):
         # Check response
         self.assertEqual(response.status_code, 410)
 
+    def get_image(self, **headers):
+        signature = generate_signature(self.image.id, 'fill-800x600')
+        return self.client.get(
+            reverse('wagtailimages_serve', args=(signature, self.image.id, 'fill-800x600')), **headers)
+
+    def test_cache_headers(self):
+        response = self.get_image()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['ETag'], r'^"[0-9a-f]{40}"$')
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(response['Content-Length']), len(b''.join(response.streaming_content)))
+        self.assertEqual(
+            set(response['Cache-Control'].split(', ')), {'public', 'max-age=31536000', 'immutable'})
+
+    def test_etag_changes_with_image_file(self):
+        etag = self.get_image()['ETag']
+
+        self.image.file_hash = 'changed'
+        self.image.save()
+
+        self.assertNotEqual(self.get_image()['ETag'], etag)
+
+    def test_if_none_match(self):
+        etag = self.get_image()['ETag']
+
+        response = self.get_image(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.get_image(HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.get_image()['Last-Modified']
+
+        response = self.get_image(HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        content = b''.join(self.get_image().streaming_content)
+
+        response = self.get_image(HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[10:20])
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/%d' % len(content))
+
+    def test_suffix_range(self):
+        content = b''.join(self.get_image().streaming_content)
+
+        response = self.get_image(HTTP_RANGE='bytes=-10')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[-10:])
+
+    def test_unsatisfiable_range(self):
+        content = b''.join(self.get_image().streaming_content)
+
+        response = self.get_image(HTTP_RANGE='bytes=%d-' % len(content))
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */%d' % len(content))
+
+    def test_range_with_outdated_if_range(self):
+        response = self.get_image(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"outdated"')
+
+        self.assertEqual(response.status_code, 200)
+
+
+class TestParseRangeHeader(TestCase):
+    def test_parse_range_header(self):
+        self.assertEqual(parse_range_header('bytes=0-499', 1000), (0, 499))
+        self.assertEqual(parse_range_header('bytes=500-', 1000), (500, 999))
+        self.assertEqual(parse_range_header('bytes=900-1999', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-2000', 1000), (0, 999))
+
+    def test_invalid_ranges_are_ignored(self):
+        self.assertIsNone(parse_range_header('bytes=500-100', 1000))
+        self.assertIsNone(parse_range_header('bytes=0-10,20-30', 1000))
+        self.assertIsNone(parse_range_header('lines=0-10', 1000))
+        self.assertIsNone(parse_range_header('bytes=-', 1000))
+
+    def test_unsatisfiable_ranges(self):
+        with self.assertRaises(ValueError):
+            parse_range_header('bytes=1000-', 1000)
+        with self.assertRaises(ValueError):
+            parse_range_header('bytes=-0', 1000)
+
 
 class TestFrontendSendfileView(TestCase):
 
@@ -471,6 +717,46 @@ class TestFrontendSendfileView(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.content, 'Dummy backend response')
 
+    def get_with_sendfile_backend(self):
+        from wagtail.utils.sendfile import _get_sendfile
+        _get_sendfile.clear()
+        self.addCleanup(_get_sendfile.clear)
+
+        signature = generate_signature(self.image.id, 'fill-800x600')
+        return self.client.get(reverse('wagtailimages_sendfile', args=(signature, self.image.id, 'fill-800x600')))
+
+    @override_settings(
+        SENDFILE_BACKEND='wagtail.utils.sendfile_accel_backend',
+        WAGTAIL_SENDFILE_PATH_MAP={settings.MEDIA_ROOT: '/protected-media/'},
+    )
+    def test_sendfile_accel_backend(self):
+        response = self.get_with_sendfile_backend()
+
+        rendition = self.image.renditions.get(filter_spec='fill-800x600')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + rendition.file.name)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('ETag', response)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(
+        SENDFILE_BACKEND='wagtail.utils.sendfile_accel_backend',
+        WAGTAIL_SENDFILE_HEADER='X-Sendfile',
+    )
+    def test_sendfile_accel_backend_with_x_sendfile(self):
+        response = self.get_with_sendfile_backend()
+
+        rendition = self.image.renditions.get(filter_spec='fill-800x600')
+        self.assertEqual(response['X-Sendfile'], rendition.file.path)
+
+    @override_settings(
+        SENDFILE_BACKEND='wagtail.utils.sendfile_accel_backend',
+        WAGTAIL_SENDFILE_PATH_MAP={'/somewhere/else/': '/protected-media/'},
+    )
+    def test_sendfile_accel_backend_unmapped_path(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_with_sendfile_backend()
+
 
 class TestRect(TestCase):
     def test_init(self):
@@ -1,3 +1,6 @@
+from PIL import features
+
+
 # Helper functions for migrating the Rendition.filter foreign key to the filter_spec field,
 # and the corresponding reverse migration
 
@@ -60,3 +63,13 @@ def parse_color_string(color_string):
         raise ValueError('Color string must be either 3 or 6 hexadecimal digits long')
 
     return r, g, b
+
+
+def is_output_format_supported(output_format):
+    """
+    Returns whether renditions can be saved in the given output format (e.g. 'webp'). Pillow
+    may be built without WebP support, in which case saving a WebP rendition fails.
+    """
+    if output_format == 'webp':
+        return features.check('webp')
+    return True
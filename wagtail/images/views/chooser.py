@@ -164,7 +164,8 @@ def chooser(request):
     will_select_rendition = request.GET.get('select_rendition')
 
     images = Image.objects.order_by('-created_at') \
-                          .filter(show_in_catalogue=True)
+                          .filter(show_in_catalogue=True) \
+                          .prefetch_renditions('max-165x165')
 
     # allow hooks to modify the queryset
     for hook in hooks.get_hooks('construct_image_chooser_queryset'):
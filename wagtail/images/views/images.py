@@ -41,7 +41,7 @@ def index(request):
         request.user, ['change', 'delete']
     ).order_by('-created_at')
 
-    images = images.filter(show_in_catalogue=True)
+    images = images.filter(show_in_catalogue=True).prefetch_renditions('max-165x165')
 
     # Search
     query_string = None
@@ -123,9 +123,7 @@ def edit(request, image_id):
                 image.file_size = image.file.size
 
                 # Set new image file hash
-                image.file.seek(0)
-                image._set_file_hash(image.file.read())
-                image.file.seek(0)
+                image._set_file_hash()
 
             form.save()
 
@@ -300,9 +298,7 @@ def add(request):
             image.file_size = image.file.size
 
             # Set image file hash
-            image.file.seek(0)
-            image._set_file_hash(image.file.read())
-            image.file.seek(0)
+            image._set_file_hash()
 
             form.save()
 
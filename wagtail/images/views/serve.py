@@ -2,22 +2,29 @@ import base64
 import hashlib
 import hmac
 import imghdr
-from wsgiref.util import FileWrapper
+import re
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, PermissionDenied
-from django.http import HttpResponse, HttpResponsePermanentRedirect, StreamingHttpResponse
+from django.http import (
+    FileResponse, HttpResponse, HttpResponsePermanentRedirect, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils.decorators import classonlymethod
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.utils.encoding import force_str
+from django.utils.http import http_date
 from django.views.generic import View
 
 from wagtail.images import get_image_model
 from wagtail.images.exceptions import InvalidFilterSpecError
 from wagtail.images.models import SourceImageIOError
+from wagtail.images.rendition_queue import generate_rendition
+from wagtail.images.utils import is_output_format_supported
 from wagtail.utils.sendfile import sendfile
 
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
 
 def generate_signature(image_id, filter_spec, key=None):
     if key is None:
@@ -44,11 +51,87 @@ def generate_image_url(image, filter_spec, viewname='wagtailimages_serve', key=N
     return url
 
 
+def parse_range_header(header, size):
+    """
+    Parse a Range header requesting a single range of bytes, e.g. 'bytes=0-499', of a file
+    of the given size. Returns the positions of the first and last bytes requested, or None
+    if the header isn't a valid single byte range, in which case the whole file should be
+    served. Raises ValueError if the range is outside the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+
+    if not first:
+        if not last:
+            return None
+        # A suffix range, e.g. 'bytes=-500' for the last 500 bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise ValueError("Range not satisfiable")
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def read_range(f, first, last, chunk_size=8192):
+    # Yields the bytes from first to last of the file in chunks, then closes it
+    try:
+        f.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def parse_accept_header(header):
+    """
+    Returns a dict mapping each media type in an Accept header to its quality value, e.g.
+    {'image/webp': 1.0, '*/*': 0.8} for 'image/webp,*/*;q=0.8'. Types with a quality of 0
+    are not acceptable.
+    """
+    accepted_types = {}
+    for media_range in header.split(','):
+        media_type, *params = [part.strip() for part in media_range.split(';')]
+        if not media_type:
+            continue
+
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted_types[media_type.lower()] = quality
+    return accepted_types
+
+
 class ServeView(View):
     model = get_image_model()
     action = 'serve'
     key = None
 
+    # Output formats (e.g. ['webp']) to serve the image in instead of its usual format, if the
+    # request's Accept header says they are supported, in order of preference
+    accept_formats = ()
+
+    # Cache-Control directives for served images, passed to patch_cache_control. The URL of an
+    # image changes with its ID and filter spec, so by default it can be cached for a year
+    cache_control = {'public': True, 'max_age': 31536000, 'immutable': True}
+
     @classonlymethod
     def as_view(cls, **initkwargs):
         if 'action' in initkwargs:
@@ -63,22 +146,116 @@ class ServeView(View):
 
         image = get_object_or_404(self.model, id=image_id)
 
-        # Get/generate the rendition
+        # Get/generate the rendition, waiting for it instead if it is already being generated
         try:
-            rendition = image.get_rendition(filter_spec)
+            rendition = generate_rendition(image, self.get_accepted_filter_spec(request, filter_spec))
         except SourceImageIOError:
             return HttpResponse("Source image file not found", content_type='text/plain', status=410)
         except InvalidFilterSpecError:
             return HttpResponse("Invalid filter spec: " + filter_spec, content_type='text/plain', status=400)
 
-        return getattr(self, self.action)(rendition)
+        if self.action == 'serve':
+            etag = self.get_etag(rendition)
+            last_modified = self.get_last_modified(rendition)
+            # Returns a 304 response if the client's copy is up to date
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = self.serve(rendition)
+            self.set_cache_headers(response, etag, last_modified)
+        else:
+            response = self.redirect(rendition)
+
+        if self.accept_formats:
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+    def get_accepted_filter_spec(self, request, filter_spec):
+        """
+        Return the filter spec to serve, converting the image to the first of accept_formats
+        that the request accepts, unless the filter spec already gives an output format
+        """
+        if 'format-' in filter_spec:
+            return filter_spec
+
+        accepted_types = parse_accept_header(request.META.get('HTTP_ACCEPT', ''))
+        for image_format in self.accept_formats:
+            if accepted_types.get('image/' + image_format) and is_output_format_supported(image_format):
+                return filter_spec + '|format-' + image_format
+        return filter_spec
+
+    def get_etag(self, rendition):
+        """
+        Return a strong ETag for the rendition. Rendition file names are derived from the
+        filter spec and focal point, so they are combined with the hash of the original
+        image's contents to change whenever the image is replaced.
+        """
+        key = '%s:%s' % (rendition.file.name, rendition.image.file_hash)
+        return '"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get_last_modified(self, rendition):
+        # Returns a timestamp, or None if the storage backend can't tell
+        try:
+            return int(rendition.file.storage.get_modified_time(rendition.file.name).timestamp())
+        except (NotImplementedError, OSError):
+            return None
+
+    def set_cache_headers(self, response, etag, last_modified):
+        if response.status_code not in (200, 206, 304):
+            return
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if self.cache_control:
+            patch_cache_control(response, **self.cache_control)
+
+    def get_byte_range(self, rendition, size):
+        """
+        Return the positions of the first and last bytes of the file that the request's Range
+        header asks for, or None to serve the whole file. Raises ValueError if the range can't
+        be satisfied.
+        """
+        header = self.request.META.get('HTTP_RANGE')
+        if not header:
+            return None
+
+        # Only serve part of the file if the client's copy of the rest of it is up to date
+        if_range = self.request.META.get('HTTP_IF_RANGE')
+        if if_range and if_range != self.get_etag(rendition):
+            last_modified = self.get_last_modified(rendition)
+            if last_modified is None or if_range != http_date(last_modified):
+                return None
+
+        return parse_range_header(header, size)
 
     def serve(self, rendition):
         # Open and serve the file
         rendition.file.open('rb')
         image_format = imghdr.what(rendition.file)
-        return StreamingHttpResponse(FileWrapper(rendition.file),
-                                     content_type='image/' + image_format)
+        content_type = 'image/' + image_format
+        size = rendition.file.size
+
+        try:
+            byte_range = self.get_byte_range(rendition, size)
+        except ValueError:
+            rendition.file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+
+        if byte_range is None:
+            # WSGI servers that provide wsgi.file_wrapper can send a FileResponse with os.sendfile
+            response = FileResponse(rendition.file, content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                read_range(rendition.file, first, last), content_type=content_type, status=206)
+            response['Content-Length'] = last - first + 1
+            response['Content-Range'] = 'bytes %d-%d/%d' % (first, last, size)
+
+        response['Accept-Ranges'] = 'bytes'
+        return response
 
     def redirect(self, rendition):
         # Redirect to the file's public location
@@ -92,4 +269,10 @@ class SendFileView(ServeView):
     backend = None
 
     def serve(self, rendition):
-        return sendfile(self.request, rendition.file.path, backend=self.backend)
+        try:
+            path = rendition.file.path
+        except NotImplementedError:
+            # Files in storage backends without local paths can't be handed to the web server
+            return super().serve(rendition)
+
+        return sendfile(self.request, path, backend=self.backend)
@@ -295,6 +295,9 @@ class NullIndex:
     def delete_item(self, item):
         pass
 
+    def delete_stale_model_entries(self, model):
+        pass
+
 
 class BaseSearchBackend:
     query_compiler_class = None
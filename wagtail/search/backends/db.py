@@ -1,16 +1,47 @@
+import math
+import re
 from collections import OrderedDict
 from warnings import warn
 
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import FieldDoesNotExist
-from django.db import models
-from django.db.models import Count
-from django.db.models.expressions import Value
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Avg, Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.expressions import ExpressionWrapper, Value
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.manager import Manager
+from django.utils.encoding import force_str
 
 from wagtail.search.backends.base import (
     BaseSearchBackend, BaseSearchQueryCompiler, BaseSearchResults, FilterFieldError)
+from wagtail.search.index import RelatedFields, SearchField, get_indexed_models
+from wagtail.search.models import IndexEntry, IndexTerm
 from wagtail.search.query import And, Boost, MatchAll, Not, Or, PlainText
 from wagtail.search.utils import AND, OR
 
+TERM_RE = re.compile(r'\w+')
+
+
+def get_terms(text):
+    """
+    Split text into the terms stored in the index, which are lowercase words
+    """
+    return [term[:255] for term in TERM_RE.findall(text.lower())]
+
+
+def get_descendants_content_types_pks(model):
+    """
+    Returns content types ids for the descendants of this model, including it.
+    """
+    descendant_models = [other_model for other_model in apps.get_models() if issubclass(other_model, model)]
+    return [ct.pk for ct in ContentType.objects.get_for_models(*descendant_models).values()]
+
+
+def get_object_id(obj, connection):
+    # The primary key as the database stores it, so that it matches the primary key cast to text
+    return force_str(obj._meta.pk.get_db_prep_value(obj.pk, connection))
+
 
 class DatabaseSearchQueryCompiler(BaseSearchQueryCompiler):
     DEFAULT_OPERATOR = 'and'
@@ -143,12 +174,355 @@ class DatabaseSearchResults(BaseSearchResults):
         ])
 
 
+class DatabaseIndex:
+    """
+    An inverted index of the terms in the search fields of each object, stored in the
+    IndexEntry and IndexTerm models, which the database backend uses when USE_INDEX is enabled
+    """
+    def __init__(self, backend, db_alias=None):
+        self.backend = backend
+        self.name = 'default'
+        self.db_alias = DEFAULT_DB_ALIAS if db_alias is None else db_alias
+
+        self.entries = IndexEntry._default_manager.using(self.db_alias)
+        self.terms = IndexTerm._default_manager.using(self.db_alias)
+
+    def add_model(self, model):
+        pass
+
+    def refresh(self):
+        pass
+
+    def delete_stale_model_entries(self, model):
+        existing_pks = (model._default_manager.using(self.db_alias)
+                        .annotate(object_id=Cast('pk', models.CharField(max_length=255)))
+                        .values('object_id'))
+        stale_entries = (
+            self.entries.filter(content_type_id__in=get_descendants_content_types_pks(model))
+            .exclude(object_id__in=existing_pks))
+        stale_entries.delete()
+
+    def delete_stale_entries(self):
+        for model in get_indexed_models():
+            # Entries of subclasses are deleted with the entries of the root models
+            if not model._meta.parents:
+                self.delete_stale_model_entries(model)
+
+    def prepare_value(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, str):
+            return value
+        if isinstance(value, list):
+            return ', '.join(self.prepare_value(item) for item in value)
+        if isinstance(value, dict):
+            return ', '.join(self.prepare_value(item) for item in value.values())
+        return force_str(value)
+
+    def prepare_field(self, obj, field, prefix=''):
+        """
+        Yield the (field name, search field, text) of each search field of the object, following
+        RelatedFields
+        """
+        if isinstance(field, SearchField):
+            yield prefix + field.field_name, field, self.prepare_value(field.get_value(obj))
+        elif isinstance(field, RelatedFields):
+            sub_obj = field.get_value(obj)
+            if sub_obj is None:
+                return
+            if isinstance(sub_obj, Manager):
+                sub_objs = sub_obj.all()
+            else:
+                if callable(sub_obj):
+                    sub_obj = sub_obj()
+                sub_objs = [sub_obj]
+            for sub_obj in sub_objs:
+                for sub_field in field.fields:
+                    yield from self.prepare_field(sub_obj, sub_field, prefix + field.field_name + '__')
+
+    def prepare_terms(self, obj, search_fields):
+        """
+        Return the weights of the object's terms, keyed by (field name, term, autocomplete)
+        """
+        weights = {}
+        for field_name, field, text in (
+            prepared_field for search_field in search_fields
+            for prepared_field in self.prepare_field(obj, search_field)
+        ):
+            boost = field.boost if field.boost is not None else 1.0
+            for term in get_terms(text):
+                key = (field_name, term, field.partial_match)
+                weights[key] = weights.get(key, 0) + boost
+        return weights
+
+    def add_item(self, obj):
+        self.add_items(obj._meta.model, [obj])
+
+    def add_items(self, model, objs):
+        search_fields = model.get_search_fields()
+        if not search_fields or not objs:
+            return
+
+        connection = connections[self.db_alias]
+        content_type = ContentType.objects.get_for_model(model)
+        terms_by_object_id = OrderedDict(
+            (get_object_id(obj, connection), self.prepare_terms(obj, search_fields))
+            for obj in objs
+        )
+
+        with transaction.atomic(using=self.db_alias):
+            # Replace any existing entries for the objects
+            self.entries.filter(content_type=content_type, object_id__in=terms_by_object_id).delete()
+            self.entries.bulk_create([
+                IndexEntry(content_type=content_type, object_id=object_id, length=sum(weights.values()))
+                for object_id, weights in terms_by_object_id.items()
+            ])
+
+            # Not all databases return the ids of objects created in bulk
+            entry_ids = dict(
+                self.entries.filter(content_type=content_type, object_id__in=terms_by_object_id)
+                .values_list('object_id', 'pk')
+            )
+            self.terms.bulk_create([
+                IndexTerm(entry_id=entry_ids[object_id], field=field_name, term=term, weight=weight,
+                          autocomplete=autocomplete)
+                for object_id, weights in terms_by_object_id.items()
+                for (field_name, term, autocomplete), weight in weights.items()
+            ])
+
+    def delete_item(self, item):
+        self.entries.filter(
+            content_type_id__in=get_descendants_content_types_pks(item._meta.model),
+            object_id=get_object_id(item, connections[self.db_alias]),
+        ).delete()
+
+    def __str__(self):
+        return self.name
+
+
+class DatabaseIndexSearchQueryCompiler(BaseSearchQueryCompiler):
+    """
+    Finds objects through the DatabaseIndex, ranking them with the BM25 algorithm
+    """
+    DEFAULT_OPERATOR = 'and'
+    OPERATORS = {
+        'and': AND,
+        'or': OR,
+    }
+
+    # BM25 parameters: how quickly repeated terms stop raising the score, and how much
+    # long objects are penalised
+    K1 = 1.2
+    B = 0.75
+
+    autocomplete = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.content_types_pks = get_descendants_content_types_pks(self.queryset.model)
+
+    def get_terms_queryset(self):
+        terms = IndexTerm._default_manager.using(self.queryset.db).filter(
+            entry__content_type_id__in=self.content_types_pks)
+        if self.fields is not None:
+            terms = terms.filter(field__in=self.fields)
+        if self.autocomplete:
+            terms = terms.filter(autocomplete=True)
+        return terms
+
+    def get_term_lookup(self, term):
+        return models.Q(term=term)
+
+    def build_term_filter(self, term):
+        # Cast the stored ids to the type of the primary key, to look the objects up by it
+        pk_field = self.queryset.model._meta.pk
+        while pk_field.remote_field is not None:
+            pk_field = pk_field.target_field
+
+        object_pks = (
+            self.get_terms_queryset().filter(self.get_term_lookup(term))
+            .annotate(object_pk=Cast('entry__object_id', output_field=pk_field))
+            .values('object_pk')
+        )
+        return models.Q(pk__in=object_pks)
+
+    def build_database_filter(self, query=None):
+        if query is None:
+            query = self.query
+
+        if isinstance(query, PlainText):
+            terms = get_terms(query.query_string)
+            if not terms:
+                return models.Q(pk__in=[])
+
+            operator = self.OPERATORS[query.operator]
+            return operator([self.build_term_filter(term) for term in terms])
+
+        if isinstance(query, Boost):
+            return self.build_database_filter(query.subquery)
+        if isinstance(query, Not):
+            return ~self.build_database_filter(query.subquery)
+        if isinstance(query, And):
+            return AND(self.build_database_filter(subquery) for subquery in query.subqueries)
+        if isinstance(query, Or):
+            return OR(self.build_database_filter(subquery) for subquery in query.subqueries)
+        raise NotImplementedError(
+            '`%s` is not supported by the database search backend.'
+            % query.__class__.__name__)
+
+    def get_scored_terms(self, query, boost=1.0):
+        """
+        Return the (term, boost) pairs that count towards the score of a match
+        """
+        if isinstance(query, PlainText):
+            return [(term, boost) for term in get_terms(query.query_string)]
+        if isinstance(query, Boost):
+            return self.get_scored_terms(query.subquery, boost * query.boost)
+        if isinstance(query, (And, Or)):
+            return [
+                scored_term for subquery in query.subqueries
+                for scored_term in self.get_scored_terms(subquery, boost)
+            ]
+        # Objects match a Not query by not containing its terms
+        return []
+
+    def get_idf(self, term, object_count):
+        matching_count = self.get_terms_queryset().filter(self.get_term_lookup(term)).values('entry').distinct().count()
+        return math.log(1 + (object_count - matching_count + 0.5) / (matching_count + 0.5))
+
+    def build_rank(self):
+        """
+        Return an expression of the BM25 score of each object, with the idf of each term and
+        the average length of objects computed up front
+        """
+        scored_terms = self.get_scored_terms(self.query)
+        if not scored_terms:
+            return Value(0.0, output_field=models.FloatField())
+
+        stats = (
+            IndexEntry._default_manager.using(self.queryset.db)
+            .filter(content_type_id__in=self.content_types_pks)
+            .aggregate(count=Count('pk'), average_length=Avg('length'))
+        )
+        average_length = stats['average_length'] or 1.0
+
+        term_weight = Case(*[
+            When(self.get_term_lookup(term), then=Value(self.get_idf(term, stats['count']) * boost))
+            for term, boost in scored_terms
+        ], default=Value(0.0), output_field=models.FloatField())
+        length_norm = Value(self.K1 * (1 - self.B)) + Value(self.K1 * self.B / average_length) * F('entry__length')
+        score = ExpressionWrapper(
+            term_weight * F('weight') * Value(self.K1 + 1) / (F('weight') + length_norm),
+            output_field=models.FloatField())
+
+        scores = (
+            self.get_terms_queryset()
+            .filter(OR(self.get_term_lookup(term) for term, boost in scored_terms))
+            .filter(entry__object_id=Cast(OuterRef('pk'), models.CharField(max_length=255)))
+            .values('entry').annotate(score=Sum(score)).values('score')
+        )
+        return Coalesce(Subquery(scores, output_field=models.FloatField()), Value(0.0))
+
+    def search(self, start, stop, score_field=None):
+        # TODO: Handle MatchAll nested inside other search query classes.
+        if isinstance(self.query, MatchAll):
+            queryset = self.queryset
+            if score_field:
+                queryset = queryset.annotate(**{score_field: Value(None, output_field=models.FloatField())})
+            return queryset[start:stop]
+
+        queryset = self.queryset.filter(self.build_database_filter())
+        if score_field or self.order_by_relevance:
+            rank = self.build_rank()
+            if score_field:
+                queryset = queryset.annotate(**{score_field: rank})
+                rank = F(score_field)
+            if self.order_by_relevance:
+                queryset = queryset.order_by(rank.desc(), '-pk')
+
+        return queryset[start:stop]
+
+    def _process_lookup(self, field, lookup, value):
+        return models.Q(**{field.get_attname(self.queryset.model) + '__' + lookup: value})
+
+    def _connect_filters(self, filters, connector, negated):
+        if connector == 'AND':
+            q = models.Q(*filters)
+        elif connector == 'OR':
+            q = OR([models.Q(fil) for fil in filters])
+        else:
+            return
+
+        if negated:
+            q = ~q
+
+        return q
+
+
+class DatabaseIndexAutocompleteQueryCompiler(DatabaseIndexSearchQueryCompiler):
+    autocomplete = True
+
+    def get_term_lookup(self, term):
+        return models.Q(term__startswith=term)
+
+
+class DatabaseIndexSearchResults(DatabaseSearchResults):
+    def get_queryset(self):
+        # Run _get_filters_from_queryset to test that no fields that are not
+        # a FilterField have been used in the query.
+        self.query_compiler._get_filters_from_queryset()
+
+        return self.query_compiler.search(self.start, self.stop, score_field=self._score_field)
+
+    def _do_search(self):
+        if self.return_pks:
+            return self.get_queryset().values_list('pk', flat=True)
+
+        return self.get_queryset().iterator()
+
+    def _do_count(self):
+        return self.query_compiler.search(self.start, self.stop).count()
+
+
+class DatabaseIndexRebuilder:
+    def __init__(self, index):
+        self.index = index
+
+    def start(self):
+        self.index.delete_stale_entries()
+        return self.index
+
+    def finish(self):
+        pass
+
+
 class DatabaseSearchBackend(BaseSearchBackend):
     query_compiler_class = DatabaseSearchQueryCompiler
     results_class = DatabaseSearchResults
 
+    def __init__(self, params):
+        super().__init__(params)
+
+        # Search an index of the terms in each object, rather than matching the query against
+        # the fields of every object
+        self.use_index = params.get('USE_INDEX', False)
+        if self.use_index:
+            self.query_compiler_class = DatabaseIndexSearchQueryCompiler
+            self.autocomplete_query_compiler_class = DatabaseIndexAutocompleteQueryCompiler
+            self.results_class = DatabaseIndexSearchResults
+            self.rebuilder_class = DatabaseIndexRebuilder
+
+    def get_index_for_model(self, model, db_alias=None):
+        if self.use_index:
+            return DatabaseIndex(self, db_alias)
+        return super().get_index_for_model(model)
+
+    def get_index_for_object(self, obj):
+        return self.get_index_for_model(obj._meta.model, obj._state.db)
+
     def reset_index(self):
-        pass  # Not needed
+        if self.use_index:
+            IndexEntry._default_manager.all().delete()
 
     def add_type(self, model):
         pass  # Not needed
@@ -157,13 +531,16 @@ class DatabaseSearchBackend(BaseSearchBackend):
         pass  # Not needed
 
     def add(self, obj):
-        pass  # Not needed
+        if self.use_index:
+            self.get_index_for_object(obj).add_item(obj)
 
     def add_bulk(self, model, obj_list):
-        return  # Not needed
+        if self.use_index and obj_list:
+            self.get_index_for_object(obj_list[0]).add_items(model, obj_list)
 
     def delete(self, obj):
-        pass  # Not needed
+        if self.use_index:
+            self.get_index_for_object(obj).delete_item(obj)
 
 
 SearchBackend = DatabaseSearchBackend
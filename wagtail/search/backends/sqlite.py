@@ -0,0 +1,289 @@
+from collections import OrderedDict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import Func, OuterRef, Subquery
+from django.db.models.expressions import ExpressionWrapper, Value
+from django.db.models.functions import Cast, Coalesce
+
+from wagtail.search.backends.base import BaseSearchBackend
+from wagtail.search.backends.db import (
+    DatabaseIndex, DatabaseIndexRebuilder, DatabaseIndexSearchQueryCompiler, DatabaseIndexSearchResults,
+    DatabaseSearchQueryCompiler, get_descendants_content_types_pks, get_object_id, get_terms)
+from wagtail.search.index import RelatedFields, SearchField
+from wagtail.search.models import SQLiteFTSEntry, SQLiteIndexEntry
+from wagtail.search.query import And, Boost, Not, Or, PlainText
+from wagtail.search.utils import ADD, AND, OR
+
+# The columns of the full text table that hold the text of search fields, with the lowest boost
+# stored in each of them. The mapping is fixed, so that indexed text never needs to move
+# between columns when models or their boosts change
+BODY_COLUMN_BOOSTS = OrderedDict([
+    ('body_a', 10.0),
+    ('body_b', 2.0),
+    ('body_c', 1.0),
+    ('body_d', float('-inf')),
+])
+BODY_COLUMNS = list(BODY_COLUMN_BOOSTS)
+
+# The weight of matches in each column. Fields boosted below 1 are weighted by half, as bm25()
+# ranks matches in columns with a weight of 0 or less no higher than non-matches
+BODY_COLUMN_WEIGHTS = [10.0, 2.0, 1.0, 0.5]
+
+# The weight of matches in the autocomplete column
+AUTOCOMPLETE_WEIGHT = 1.0
+
+
+def get_search_fields(search_fields):
+    for search_field in search_fields:
+        if isinstance(search_field, SearchField):
+            yield search_field
+        elif isinstance(search_field, RelatedFields):
+            yield from get_search_fields(search_field.fields)
+
+
+def get_body_column(boost):
+    """
+    Return the column storing the text of search fields with the given boost
+    """
+    if boost is None:
+        boost = 1.0
+
+    for column, min_boost in BODY_COLUMN_BOOSTS.items():
+        if boost >= min_boost:
+            return column
+
+
+def quote_term(term):
+    return '"%s"' % term.replace('"', '""')
+
+
+class SQLiteIndex(DatabaseIndex):
+    """
+    Stores the text of each object's search fields in an SQLite FTS5 table
+    """
+    def __init__(self, backend, db_alias=None):
+        super().__init__(backend, db_alias)
+
+        if connections[self.db_alias].vendor != 'sqlite':
+            raise NotSupportedError('You must select an SQLite database to use SQLite search.')
+
+        self.entries = SQLiteIndexEntry._default_manager.using(self.db_alias)
+        self.fts_entries = SQLiteFTSEntry._default_manager.using(self.db_alias)
+
+    def delete_stale_model_entries(self, model):
+        existing_pks = (model._default_manager.using(self.db_alias)
+                        .annotate(object_id=Cast('pk', models.CharField(max_length=255)))
+                        .values('object_id'))
+        stale_entries = (
+            self.entries.filter(content_type_id__in=get_descendants_content_types_pks(model))
+            .exclude(object_id__in=existing_pks))
+        self.delete_entries(stale_entries)
+
+    def delete_entries(self, entries):
+        # The full text table isn't linked to the entries by a foreign key
+        self.fts_entries.filter(entry__in=entries.values('pk')).delete()
+        entries.delete()
+
+    def prepare_columns(self, obj, search_fields):
+        """
+        Return the text of the object's search fields to store in each column of the full text
+        table, in order
+        """
+        columns = OrderedDict((column, []) for column in ['autocomplete'] + BODY_COLUMNS)
+        for search_field in search_fields:
+            for field_name, field, text in self.prepare_field(obj, search_field):
+                columns[get_body_column(field.boost)].append(text)
+                if field.partial_match:
+                    columns['autocomplete'].append(text)
+
+        return [' '.join(texts) for texts in columns.values()]
+
+    def add_items(self, model, objs):
+        search_fields = model.get_search_fields()
+        if not search_fields or not objs:
+            return
+
+        connection = connections[self.db_alias]
+        content_type = ContentType.objects.get_for_model(model)
+        columns_by_object_id = OrderedDict(
+            (get_object_id(obj, connection), self.prepare_columns(obj, search_fields))
+            for obj in objs
+        )
+
+        with transaction.atomic(using=self.db_alias):
+            entries = self.entries.filter(content_type=content_type, object_id__in=columns_by_object_id)
+            existing_object_ids = set(entries.values_list('object_id', flat=True))
+            self.entries.bulk_create([
+                SQLiteIndexEntry(content_type=content_type, object_id=object_id)
+                for object_id in columns_by_object_id if object_id not in existing_object_ids
+            ])
+
+            # Replace the text of the objects
+            entry_ids = dict(entries.values_list('object_id', 'pk'))
+            self.fts_entries.filter(entry__in=entry_ids.values()).delete()
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO %s (rowid, autocomplete, %s) VALUES (%s)' % (
+                        SQLiteFTSEntry._meta.db_table, ', '.join(BODY_COLUMNS),
+                        ', '.join(['%s'] * (len(BODY_COLUMNS) + 2))),
+                    [
+                        [entry_ids[object_id]] + columns
+                        for object_id, columns in columns_by_object_id.items()
+                    ]
+                )
+
+    def delete_item(self, item):
+        self.delete_entries(self.entries.filter(
+            content_type_id__in=get_descendants_content_types_pks(item._meta.model),
+            object_id=get_object_id(item, connections[self.db_alias]),
+        ))
+
+
+class SQLiteSearchQueryCompiler(DatabaseIndexSearchQueryCompiler):
+    """
+    Matches queries against the FTS5 table, and ranks the results with its bm25() function
+    """
+    autocomplete = False
+
+    def get_match_expression(self, query):
+        """
+        Return the FTS5 query matching a PlainText query, in the columns searched by this compiler
+        """
+        terms = get_terms(query.query_string)
+        if not terms:
+            return None
+
+        if self.autocomplete:
+            terms = ['%s *' % quote_term(term) for term in terms]
+            columns = ['autocomplete']
+        else:
+            terms = [quote_term(term) for term in terms]
+            columns = BODY_COLUMNS
+
+        operator = ' AND ' if query.operator == 'and' else ' OR '
+        return '{%s} : (%s)' % (' '.join(columns), operator.join(terms))
+
+    def get_fts_entries(self, match_expression):
+        return SQLiteFTSEntry._default_manager.using(self.queryset.db).filter(
+            document__match=match_expression, entry__content_type_id__in=self.content_types_pks)
+
+    def build_database_filter(self, query=None):
+        if query is None:
+            query = self.query
+
+        if self.fields is not None:
+            # The full text table doesn't record which field text is from, so searches on
+            # specific fields are matched against the fields themselves, like the database backend
+            return DatabaseSearchQueryCompiler(self.queryset, self.query, fields=self.fields).build_database_filter(query)
+
+        if isinstance(query, PlainText):
+            match_expression = self.get_match_expression(query)
+            if match_expression is None:
+                return models.Q(pk__in=[])
+
+            # Cast the stored ids to the type of the primary key, to look the objects up by it
+            pk_field = self.queryset.model._meta.pk
+            while pk_field.remote_field is not None:
+                pk_field = pk_field.target_field
+
+            object_pks = (
+                self.get_fts_entries(match_expression)
+                .annotate(object_pk=Cast('entry__object_id', output_field=pk_field))
+                .values('object_pk')
+            )
+            return models.Q(pk__in=object_pks)
+
+        if isinstance(query, Boost):
+            return self.build_database_filter(query.subquery)
+        if isinstance(query, Not):
+            return ~self.build_database_filter(query.subquery)
+        if isinstance(query, And):
+            return AND(self.build_database_filter(subquery) for subquery in query.subqueries)
+        if isinstance(query, Or):
+            return OR(self.build_database_filter(subquery) for subquery in query.subqueries)
+        raise NotImplementedError(
+            '`%s` is not supported by the SQLite search backend.'
+            % query.__class__.__name__)
+
+    def get_scored_queries(self, query, boost=1.0):
+        """
+        Return the (PlainText query, boost) pairs that count towards the score of a match
+        """
+        if isinstance(query, PlainText):
+            return [(query, boost)]
+        if isinstance(query, Boost):
+            return self.get_scored_queries(query.subquery, boost * query.boost)
+        if isinstance(query, (And, Or)):
+            return [
+                scored_query for subquery in query.subqueries
+                for scored_query in self.get_scored_queries(subquery, boost)
+            ]
+        # Objects match a Not query by not containing its terms
+        return []
+
+    def build_rank(self):
+        if self.fields is not None:
+            return Value(0.0, output_field=models.FloatField())
+
+        weights = [AUTOCOMPLETE_WEIGHT] + BODY_COLUMN_WEIGHTS
+        ranks = []
+        for query, boost in self.get_scored_queries(self.query):
+            match_expression = self.get_match_expression(query)
+            if match_expression is None:
+                continue
+
+            # bm25() is lower for better matches
+            score = ExpressionWrapper(
+                Value(-boost) * Func('document', *[Value(weight) for weight in weights], function='bm25'),
+                output_field=models.FloatField())
+            scores = (
+                self.get_fts_entries(match_expression)
+                .filter(entry__object_id=Cast(OuterRef('pk'), models.CharField(max_length=255)))
+                .annotate(score=score).values('score')
+            )
+            ranks.append(Coalesce(Subquery(scores, output_field=models.FloatField()), Value(0.0)))
+
+        if not ranks:
+            return Value(0.0, output_field=models.FloatField())
+        return ADD(ranks)
+
+
+class SQLiteAutocompleteQueryCompiler(SQLiteSearchQueryCompiler):
+    autocomplete = True
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    query_compiler_class = SQLiteSearchQueryCompiler
+    autocomplete_query_compiler_class = SQLiteAutocompleteQueryCompiler
+    results_class = DatabaseIndexSearchResults
+    rebuilder_class = DatabaseIndexRebuilder
+
+    def get_index_for_model(self, model, db_alias=None):
+        return SQLiteIndex(self, db_alias)
+
+    def get_index_for_object(self, obj):
+        return self.get_index_for_model(obj._meta.model, obj._state.db)
+
+    def reset_index(self):
+        index = self.get_index_for_model(None)
+        index.delete_entries(index.entries.all())
+
+    def add_type(self, model):
+        pass  # Not needed
+
+    def refresh_index(self):
+        pass  # Not needed
+
+    def add(self, obj):
+        self.get_index_for_object(obj).add_item(obj)
+
+    def add_bulk(self, model, obj_list):
+        if obj_list:
+            self.get_index_for_object(obj_list[0]).add_items(model, obj_list)
+
+    def delete(self, obj):
+        self.get_index_for_object(obj).delete_item(obj)
+
+
+SearchBackend = SQLiteSearchBackend
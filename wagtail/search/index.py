@@ -85,6 +85,18 @@ class Indexed:
 
         return queryset
 
+    @classmethod
+    def get_indexed_objects_modified_since(cls, since):
+        """
+        Return the indexed objects that were modified at or after the given datetime, for
+        incremental index updates, or None if the model doesn't record when its objects are
+        modified. By default, this filters on the field named by search_modified_at_field.
+        """
+        if not cls.search_modified_at_field:
+            return None
+
+        return cls.get_indexed_objects().filter(**{cls.search_modified_at_field + '__gte': since})
+
     def get_indexed_instance(self):
         """
         If the indexed model uses multi table inheritance, override this method
@@ -122,6 +134,9 @@ class Indexed:
 
     search_fields = []
 
+    # The name of a DateTimeField recording when each object was last modified
+    search_modified_at_field = None
+
 
 def get_indexed_models():
     return [
@@ -159,6 +174,26 @@ def insert_or_update_object(instance):
                 logger.exception("Exception raised while adding %r into the '%s' search backend", indexed_instance, backend_name)
 
 
+def insert_or_update_objects(model, object_ids, using=None):
+    """
+    Add or update the objects of an indexed model with the given ids in the search backends,
+    with a single add_bulk call to each. Objects that are not in the model's indexed objects
+    (fetched from the `using` database) are skipped.
+    """
+    objects = list(model.get_indexed_objects().using(using).filter(pk__in=object_ids))
+    if not objects:
+        return
+
+    for backend_name, backend in get_search_backends_with_name(with_auto_update=True):
+        try:
+            backend.add_bulk(model, objects)
+        except Exception:
+            # Catch and log all errors
+            logger.exception(
+                "Exception raised while adding %d %s objects into the '%s' search backend",
+                len(objects), model.__name__, backend_name)
+
+
 def remove_object(instance):
     indexed_instance = get_indexed_instance(instance, check_exists=False)
 
@@ -0,0 +1,92 @@
+"""
+Deferred search index updates, enabled with the WAGTAILSEARCH_DEFER_INDEX_UPDATES setting.
+
+Rather than updating the search index as each object is saved or deleted inside a
+transaction, the objects are collected until the transaction is committed, then sent to the
+search backends together, with one add_bulk() call per model. Objects changed several times
+in the transaction are only indexed once, and nothing is sent if it is rolled back.
+"""
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from wagtail.search import index
+
+
+def is_enabled():
+    return getattr(settings, 'WAGTAILSEARCH_DEFER_INDEX_UPDATES', False)
+
+
+class IndexUpdateBatch:
+    """
+    The index updates to make when a transaction is committed. The batch is registered with
+    transaction.on_commit, so Django discards it if the transaction is rolled back.
+    """
+    def __init__(self, using):
+        self.using = using
+
+        # Ordered sets of object IDs to add or update, keyed by model
+        self.updated = OrderedDict()
+
+        # Instances to remove, keyed by model and object ID
+        self.deleted = OrderedDict()
+
+    def add_update(self, instance):
+        indexed_instance = index.get_indexed_instance(instance, check_exists=False)
+        if indexed_instance is None or indexed_instance.pk is None:
+            return
+
+        self.updated.setdefault(type(indexed_instance), OrderedDict())[indexed_instance.pk] = None
+
+    def add_delete(self, instance):
+        indexed_instance = index.get_indexed_instance(instance, check_exists=False)
+        if indexed_instance is None:
+            return
+
+        self.deleted[(type(indexed_instance), indexed_instance.pk)] = indexed_instance
+
+    def __call__(self):
+        connection = connections[self.using]
+        if getattr(connection, '_wagtail_index_batch', None) is self:
+            connection._wagtail_index_batch = None
+
+        # Objects are fetched again here, so they are indexed as they were committed, and
+        # ones that were deleted later in the transaction are skipped
+        for model, object_ids in self.updated.items():
+            index.insert_or_update_objects(model, list(object_ids), using=self.using)
+
+        deleted_ids = OrderedDict()
+        for model, object_id in self.deleted:
+            deleted_ids.setdefault(model, []).append(object_id)
+
+        for model, object_ids in deleted_ids.items():
+            # Deletions inside a savepoint that was rolled back may not have happened
+            existing_ids = set(
+                model._default_manager.using(self.using).filter(pk__in=object_ids).values_list('pk', flat=True)
+            )
+            for object_id in object_ids:
+                if object_id not in existing_ids:
+                    index.remove_object(self.deleted[(model, object_id)])
+
+
+def get_batch(using=None):
+    """
+    Return the batch of index updates for the transaction in progress on the given database,
+    or None if there isn't a transaction in progress
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return None
+
+    # The batch is kept on the connection. Django discards it with the other on_commit
+    # callbacks if the transaction, or the savepoint it was created in, is rolled back, so
+    # it is only reused while it is still registered
+    batch = getattr(connection, '_wagtail_index_batch', None)
+    if batch is None or not any(batch in entry for entry in connection.run_on_commit):
+        batch = IndexUpdateBatch(using)
+        transaction.on_commit(batch, using=using)
+        connection._wagtail_index_batch = batch
+    return batch
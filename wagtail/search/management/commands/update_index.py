@@ -1,9 +1,19 @@
 import collections
+import datetime
+import json
+import os
+import time
+from multiprocessing import get_all_start_methods, get_context
 
+from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
+from wagtail.core.query import keyset_chunks
 from wagtail.search.backends import get_search_backend
 from wagtail.search.index import get_indexed_models
 
@@ -51,9 +61,122 @@ def group_models_by_index(backend, models):
     ])
 
 
+def get_pk_ranges(queryset, chunk_size, start_after=None):
+    """
+    Yield (first pk, last pk) pairs dividing the objects of a queryset into chunks of up to
+    chunk_size objects, in pk order. Each chunk is found with a query filtered by the last
+    pk of the previous one, which stays fast for later chunks unlike slicing with OFFSET.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = start_after
+    while True:
+        chunk = list((pks if last_pk is None else pks.filter(pk__gt=last_pk))[:chunk_size])
+        if chunk:
+            yield chunk[0], chunk[-1]
+
+        if len(chunk) < chunk_size:
+            return
+
+        last_pk = chunk[-1]
+
+
+def get_objects_to_index(model, since=None):
+    """
+    Return the indexed objects of the model, or only the ones modified since the given
+    datetime if the model records when they are modified
+    """
+    if since is not None:
+        objects = model.get_indexed_objects_modified_since(since)
+        if objects is not None:
+            return objects
+
+    return model.get_indexed_objects()
+
+
+def add_objects(index, model, first_pk, last_pk, since=None):
+    """
+    Add the objects to index of the model with pks from first_pk to last_pk to the index.
+    Returns the number of objects added.
+    """
+    objects = list(
+        get_objects_to_index(model, since).filter(pk__gte=first_pk, pk__lte=last_pk).order_by('pk')
+    )
+    index.add_items(model, objects)
+    return len(objects)
+
+
+def get_index(backend, index_name):
+    """
+    Return the index of the backend with the given name, which may be a new index that an
+    atomic rebuild is adding objects to
+    """
+    for index in group_models_by_index(backend, get_indexed_models()):
+        if index.name == index_name:
+            return index
+    return backend.index_class(backend, index_name)
+
+
+# The index that objects are added to in worker processes
+worker_index = None
+
+
+def init_worker(backend_name, index_name):
+    global worker_index
+    # Connections inherited from the parent process must not be shared with it, so the
+    # worker opens its own, to the database and the search backend
+    connections.close_all()
+    worker_index = get_index(get_search_backend(backend_name), index_name)
+
+
+def add_objects_in_worker(args):
+    model_label, first_pk, last_pk, since = args
+    return add_objects(worker_index, apps.get_model(model_label), first_pk, last_pk, since), last_pk
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    if not checkpoint:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    # Replace the file in one step, so it isn't left half-written if the command is killed
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f, cls=DjangoJSONEncoder)
+    os.replace(path + '.tmp', path)
+
+
+def parse_since(value):
+    """
+    Parse the value of --since, an ISO 8601 date or datetime, into an aware datetime
+    """
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError("'%s' is not a date or datetime" % value)
+        since = datetime.datetime.combine(date, datetime.time())
+
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
 class Command(BaseCommand):
-    def update_backend(self, backend_name, schema_only=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    def update_backend(self, backend_name, schema_only=False, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+                       checkpoint_path=None, since=None):
+        """
+        Rebuild the indices of the backend, or if since is given, update them with the objects
+        modified since then and remove entries for deleted objects
+        """
         self.stdout.write("Updating backend: " + backend_name)
+        incremental = since is not None
 
         backend = get_search_backend(backend_name)
 
@@ -66,11 +189,35 @@ class Command(BaseCommand):
             self.stdout.write(backend_name + ": No indices to rebuild")
 
         for index, models in models_grouped_by_index:
-            self.stdout.write(backend_name + ": Rebuilding index %s" % index.name)
-
-            # Start rebuild
             rebuilder = backend.rebuilder_class(index)
-            index = rebuilder.start()
+
+            # Rebuilders that add objects in a transaction can't share the work with other
+            # processes, and lose it all if they are interrupted
+            transactional = getattr(rebuilder, 'transactional', False)
+            if transactional and workers > 1:
+                self.stdout.write(backend_name + ": Index %s is rebuilt in a transaction, so it can't use "
+                                  "more than one worker" % index.name)
+            index_workers = 1 if transactional else workers
+            index_checkpoint_path = None if transactional or schema_only or incremental else checkpoint_path
+
+            # The name of the index being rebuilt, which atomic rebuilds keep as an alias
+            alias_name = index.name
+
+            checkpoint = load_checkpoint(index_checkpoint_path)
+            progress = checkpoint.get(backend_name, {}).get(alias_name)
+            if incremental:
+                self.stdout.write(backend_name + ": Updating index %s with objects modified since %s" % (
+                    alias_name, since.isoformat()))
+                progress = {'index': index.name, 'done': [], 'model': None, 'last_pk': None}
+            elif progress:
+                self.stdout.write(backend_name + ": Resuming rebuild of index %s" % alias_name)
+                index = self.resume_rebuild(rebuilder, progress['index'])
+            else:
+                self.stdout.write(backend_name + ": Rebuilding index %s" % alias_name)
+
+                # Start rebuild
+                index = rebuilder.start()
+                progress = {'index': index.name, 'done': [], 'model': None, 'last_pk': None}
 
             # Add models
             for model in models:
@@ -79,22 +226,113 @@ class Command(BaseCommand):
             # Add objects
             object_count = 0
             if not schema_only:
-                for model in models:
-                    self.stdout.write('{}: {}.{} '.format(backend_name, model._meta.app_label, model.__name__).ljust(35), ending='')
-
-                    # Add items (chunk_size at a time)
-                    for chunk in self.print_iter_progress(self.queryset_chunks(model.get_indexed_objects().order_by('pk'), chunk_size)):
-                        index.add_items(model, chunk)
-                        object_count += len(chunk)
-
-                    self.print_newline()
-
-            # Finish rebuild
-            rebuilder.finish()
+                pool = None
+                if index_workers > 1:
+                    # Forked processes would otherwise share this process' database connections.
+                    # Workers are forked rather than spawned so that Django is already set up in them
+                    connections.close_all()
+                    pool = get_context('fork').Pool(
+                        index_workers, initializer=init_worker, initargs=(backend_name, index.name))
+
+                try:
+                    for model in models:
+                        label = model._meta.label
+                        self.stdout.write('{}: {} '.format(backend_name, label).ljust(35), ending='')
+                        if label in progress['done']:
+                            self.stdout.write("already indexed")
+                            continue
+
+                        model_since = since
+                        if incremental and model.get_indexed_objects_modified_since(since) is None:
+                            # All of them have to be indexed again
+                            self.stdout.write("(no modification time) ", ending='')
+                            model_since = None
+
+                        start_after = progress['last_pk'] if progress['model'] == label else None
+                        pk_ranges = get_pk_ranges(get_objects_to_index(model, model_since), chunk_size, start_after)
+                        if pool is not None:
+                            # Find the ranges here, as the pool would otherwise query them from
+                            # its task handler thread, on a database connection of its own
+                            results = pool.imap(add_objects_in_worker, [
+                                (label, first_pk, last_pk, model_since) for first_pk, last_pk in pk_ranges
+                            ])
+                        else:
+                            results = (
+                                (add_objects(index, model, first_pk, last_pk, model_since), last_pk)
+                                for first_pk, last_pk in pk_ranges
+                            )
+
+                        # Add items (chunk_size at a time)
+                        start_time = time.time()
+                        model_object_count = 0
+                        for added, last_pk in self.print_iter_progress(results):
+                            model_object_count += added
+                            if index_checkpoint_path:
+                                progress.update(model=label, last_pk=last_pk)
+                                self.save_progress(index_checkpoint_path, backend_name, alias_name, progress)
+
+                        elapsed = time.time() - start_time
+                        self.stdout.write(" %d objects in %.1fs (%.1f/s)" % (
+                            model_object_count, elapsed, model_object_count / elapsed if elapsed else 0))
+                        object_count += model_object_count
+
+                        # Entries for subclasses are removed along with their parent model's. Indexes
+                        # that can't find stale entries keep them until the next full rebuild
+                        delete_stale_model_entries = getattr(index, 'delete_stale_model_entries', None)
+                        if incremental and not model._meta.parents and delete_stale_model_entries:
+                            delete_stale_model_entries(model)
+
+                        progress['done'].append(label)
+                        progress.update(model=None, last_pk=None)
+                        if index_checkpoint_path:
+                            self.save_progress(index_checkpoint_path, backend_name, alias_name, progress)
+                except BaseException:
+                    if pool is not None:
+                        # The pool has queued the rest of the model's chunks, so stop the workers
+                        # rather than waiting for them to index those first
+                        pool.terminate()
+                        pool.join()
+                    raise
+                else:
+                    if pool is not None:
+                        pool.close()
+                        pool.join()
+
+            if incremental:
+                index.refresh()
+            else:
+                # Finish rebuild
+                rebuilder.finish()
+
+            if index_checkpoint_path:
+                self.save_progress(index_checkpoint_path, backend_name, alias_name, None)
 
             self.stdout.write(backend_name + ": indexed %d objects" % object_count)
             self.print_newline()
 
+    def resume_rebuild(self, rebuilder, index_name):
+        """
+        Return the index that an interrupted rebuild was adding objects to, to carry on adding
+        them without resetting it
+        """
+        index = rebuilder.index
+        if index.name != index_name:
+            # Atomic rebuilds add objects to a new index with a random name
+            index = index.backend.index_class(index.backend, index_name)
+            rebuilder.index = index
+        return index
+
+    def save_progress(self, checkpoint_path, backend_name, index_name, progress):
+        checkpoint = load_checkpoint(checkpoint_path)
+        backend_checkpoint = checkpoint.setdefault(backend_name, {})
+        if progress is None:
+            backend_checkpoint.pop(index_name, None)
+            if not backend_checkpoint:
+                del checkpoint[backend_name]
+        else:
+            backend_checkpoint[index_name] = progress
+        save_checkpoint(checkpoint_path, checkpoint)
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--backend', action='store', dest='backend_name', default=None,
@@ -105,8 +343,48 @@ class Command(BaseCommand):
         parser.add_argument(
             '--chunk_size', action='store', dest='chunk_size', default=DEFAULT_CHUNK_SIZE, type=int,
             help="Set number of records to be fetched at once for inserting into the index")
+        parser.add_argument(
+            '--workers', action='store', dest='workers', default=1, type=int,
+            help="Number of processes to add objects to the index in (default 1)")
+        parser.add_argument(
+            '--checkpoint', action='store', dest='checkpoint', default=None,
+            help="File to record progress in, so that an interrupted run can be resumed by running "
+                 "the command again with the same file")
+        parser.add_argument(
+            '--since', action='store', dest='since', default=None,
+            help="Only index objects modified since this ISO 8601 date or datetime, and remove "
+                 "deleted objects, rather than rebuilding the index")
+        parser.add_argument(
+            '--incremental', action='store_true', dest='incremental', default=False,
+            help="Only index objects modified since the last successful run recorded in --state-file")
+        parser.add_argument(
+            '--state-file', action='store', dest='state_file', default=None,
+            help="File recording when each backend was last updated, for --incremental")
 
     def handle(self, **options):
+        if options.get('workers', 1) < 1:
+            raise CommandError("--workers must be at least 1")
+        if options.get('workers', 1) > 1 and 'fork' not in get_all_start_methods():
+            raise CommandError("--workers can only be used on platforms that can fork processes")
+        if options.get('chunk_size') < 1:
+            raise CommandError("--chunk_size must be at least 1")
+
+        since = None
+        if options.get('since'):
+            try:
+                since = parse_since(options['since'])
+            except ValueError as e:
+                raise CommandError("Invalid --since: %s" % e)
+
+        incremental = options.get('incremental', False)
+        state_path = options.get('state_file')
+        if incremental and not state_path:
+            raise CommandError("--incremental requires --state-file")
+        if incremental and since is not None:
+            raise CommandError("--since can't be used with --incremental")
+        if (incremental or since is not None) and (options.get('checkpoint') or options.get('schema_only')):
+            raise CommandError("--since and --incremental can't be used with --checkpoint or --schema-only")
+
         # Get list of backends to index
         if options['backend_name']:
             # index only the passed backend
@@ -120,11 +398,28 @@ class Command(BaseCommand):
 
         # Update backends
         for backend_name in backend_names:
+            backend_since = since
+            if incremental:
+                # Objects modified while this run is in progress are picked up by the next one
+                started_at = timezone.now()
+                last_run = load_checkpoint(state_path).get(backend_name)
+                if last_run:
+                    backend_since = parse_since(last_run)
+                else:
+                    self.stdout.write("No previous run of backend %s recorded, rebuilding it" % backend_name)
+
             self.update_backend(
                 backend_name,
-                schema_only=options.get('schema_only', False), chunk_size=options.get('chunk_size')
+                schema_only=options.get('schema_only', False), chunk_size=options.get('chunk_size'),
+                workers=options.get('workers', 1), checkpoint_path=options.get('checkpoint'),
+                since=backend_since,
             )
 
+            if incremental:
+                state = load_checkpoint(state_path)
+                state[backend_name] = started_at.isoformat()
+                save_checkpoint(state_path, state)
+
     def print_newline(self):
         self.stdout.write('')
 
@@ -151,19 +446,11 @@ class Command(BaseCommand):
 
             self.stdout.flush()
 
-    # Atomic so the count of models doesnt change as it is iterated
-    @transaction.atomic
     def queryset_chunks(self, qs, chunk_size=DEFAULT_CHUNK_SIZE):
         """
         Yield a queryset in chunks of at most ``chunk_size``. The chunk yielded
-        will be a list, not a queryset. Iterating over the chunks is done in a
-        transaction so that the order and count of items in the queryset
-        remains stable.
+        will be a list, not a queryset. Chunks are fetched by pk (see
+        ``wagtail.core.query.keyset_chunks``), so the order and count of items
+        stays stable without holding a transaction open.
         """
-        i = 0
-        while True:
-            items = list(qs[i * chunk_size:][:chunk_size])
-            if not items:
-                break
-            yield items
-            i += 1
+        return keyset_chunks(qs.order_by('pk'), chunk_size)
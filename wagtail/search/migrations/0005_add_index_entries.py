@@ -0,0 +1,45 @@
+# Generated by Django 3.0.14 on 2026-10-18 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('wagtailsearch', '0004_querydailyhits_verbose_name_plural'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('length', models.FloatField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'index entry',
+                'verbose_name_plural': 'index entries',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='IndexTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=255)),
+                ('term', models.CharField(db_index=True, max_length=255)),
+                ('weight', models.FloatField()),
+                ('autocomplete', models.BooleanField(default=False)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='wagtailsearch.IndexEntry')),
+            ],
+            options={
+                'verbose_name': 'index term',
+                'verbose_name_plural': 'index terms',
+                'unique_together': {('entry', 'term', 'field')},
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.0.14 on 2026-10-18 07:55
+
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+import wagtail.search.models
+
+
+def create_fts_table(apps, schema_editor):
+    # The table is only used by the SQLite search backend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    sql = (
+        "CREATE VIRTUAL TABLE wagtailsearch_sqliteftsentry USING fts5("
+        "autocomplete, body_a, body_b, body_c, body_d, tokenize='unicode61 remove_diacritics %d')"
+    )
+    try:
+        schema_editor.execute(sql % 2)
+    except OperationalError as e:
+        if 'no such module' in str(e):
+            # SQLite was built without FTS5
+            return
+
+        # SQLite before 3.27 only supports the older way of removing diacritics
+        schema_editor.execute(sql % 1)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS wagtailsearch_sqliteftsentry")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('wagtailsearch', '0005_add_index_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SQLiteIndexEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'SQLite index entry',
+                'verbose_name_plural': 'SQLite index entries',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SQLiteFTSEntry',
+            fields=[
+                ('entry', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='wagtailsearch.SQLiteIndexEntry')),
+                ('autocomplete', models.TextField()),
+                ('body_a', models.TextField()),
+                ('body_b', models.TextField()),
+                ('body_c', models.TextField()),
+                ('body_d', models.TextField()),
+                ('document', wagtail.search.models.SQLiteFTSDocumentField(db_column='wagtailsearch_sqliteftsentry')),
+            ],
+            options={
+                'verbose_name': 'SQLite full text entry',
+                'verbose_name_plural': 'SQLite full text entries',
+                'db_table': 'wagtailsearch_sqliteftsentry',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
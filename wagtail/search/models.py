@@ -1,6 +1,7 @@
 import datetime
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
@@ -74,3 +75,114 @@ class QueryDailyHits(models.Model):
         )
         verbose_name = _('Query Daily Hits')
         verbose_name_plural = _('Query Daily Hits')
+
+
+class IndexEntry(models.Model):
+    """
+    An object in the database search backend's index (used when its USE_INDEX option is enabled)
+    """
+    content_type = models.ForeignKey(ContentType, related_name='+', on_delete=models.CASCADE)
+    # Primary keys are stored as text, as they are not always integers
+    object_id = models.CharField(max_length=255)
+
+    # The total weight of the object's terms, to rank matches in long documents lower
+    length = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = (
+            ('content_type', 'object_id'),
+        )
+        verbose_name = _('index entry')
+        verbose_name_plural = _('index entries')
+
+    def __str__(self):
+        return '%s: %s' % (self.content_type.name, self.object_id)
+
+
+class IndexTerm(models.Model):
+    """
+    A term that occurs in a search field of an indexed object
+    """
+    entry = models.ForeignKey(IndexEntry, related_name='terms', on_delete=models.CASCADE)
+    # The search field the term occurs in, with the names of RelatedFields joined by '__'
+    field = models.CharField(max_length=255)
+    term = models.CharField(max_length=255, db_index=True)
+    # The number of times the term occurs, multiplied by the field's boost
+    weight = models.FloatField()
+    # Whether the field is searched by autocomplete (SearchField with partial_match)
+    autocomplete = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = (
+            ('entry', 'term', 'field'),
+        )
+        verbose_name = _('index term')
+        verbose_name_plural = _('index terms')
+
+    def __str__(self):
+        return self.term
+
+
+class SQLiteFTSDocumentField(models.TextField):
+    """
+    The hidden column of an SQLite FTS5 table, which has the name of the table. Full text
+    queries are matched against it, and ranking functions such as bm25() take it.
+    """
+
+
+@SQLiteFTSDocumentField.register_lookup
+class SQLiteFTSMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), lhs_params + rhs_params
+
+
+class SQLiteIndexEntry(models.Model):
+    """
+    An object in the index of the SQLite search backend, which its full text is stored
+    against in SQLiteFTSEntry
+    """
+    content_type = models.ForeignKey(ContentType, related_name='+', on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = (
+            ('content_type', 'object_id'),
+        )
+        verbose_name = _('SQLite index entry')
+        verbose_name_plural = _('SQLite index entries')
+
+    def __str__(self):
+        return '%s: %s' % (self.content_type.name, self.object_id)
+
+
+class SQLiteFTSEntry(models.Model):
+    """
+    The full text of an object in the index of the SQLite search backend. The FTS5 virtual
+    table is created by a migration on SQLite databases only, and rows are inserted into it
+    with raw SQL.
+    """
+    # The rowid of the FTS5 table is the id of the index entry
+    entry = models.OneToOneField(
+        SQLiteIndexEntry, primary_key=True, db_column='rowid', related_name='+',
+        on_delete=models.DO_NOTHING, db_constraint=False)
+
+    # The text of the SearchFields with partial_match, for autocomplete
+    autocomplete = models.TextField()
+
+    # The text of all SearchFields, in columns for up to four levels of boost
+    body_a = models.TextField()
+    body_b = models.TextField()
+    body_c = models.TextField()
+    body_d = models.TextField()
+
+    document = SQLiteFTSDocumentField(db_column='wagtailsearch_sqliteftsentry')
+
+    class Meta:
+        managed = False
+        db_table = 'wagtailsearch_sqliteftsentry'
+        verbose_name = _('SQLite full text entry')
+        verbose_name_plural = _('SQLite full text entries')
@@ -1,9 +1,15 @@
 from django.db.models.signals import post_delete, post_save
 
-from wagtail.search import index
+from wagtail.search import index, index_queue
 
 
-def post_save_signal_handler(instance, update_fields=None, **kwargs):
+def post_save_signal_handler(instance, update_fields=None, using=None, **kwargs):
+    if index_queue.is_enabled():
+        batch = index_queue.get_batch(using)
+        if batch is not None:
+            batch.add_update(instance)
+            return
+
     if update_fields is not None:
         # fetch a fresh copy of instance from the database to ensure
         # that we're not indexing any of the unsaved data contained in
@@ -13,7 +19,13 @@ def post_save_signal_handler(instance, update_fields=None, **kwargs):
     index.insert_or_update_object(instance)
 
 
-def post_delete_signal_handler(instance, **kwargs):
+def post_delete_signal_handler(instance, using=None, **kwargs):
+    if index_queue.is_enabled():
+        batch = index_queue.get_batch(using)
+        if batch is not None:
+            batch.add_delete(instance)
+            return
+
     index.remove_object(instance)
 
 
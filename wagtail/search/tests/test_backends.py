@@ -4,6 +4,7 @@ import unittest
 from collections import OrderedDict
 from datetime import date
 from io import StringIO
+from unittest import mock
 
 from django.conf import settings
 from django.core import management
@@ -645,6 +646,39 @@ class BackendTests(WagtailTestUtils):
                              'Two Scoops of Django 1.11'})
 
 
+class IndexEntryBackendTests:
+    # For backends that store an entry for each indexed object in the database. Subclasses
+    # define get_entries(book), returning a queryset of the entries for a Novel.
+
+    def test_index_is_updated_on_save(self):
+        book = models.Book.objects.get(title="The Hobbit")
+        book.title = "The Hobbit, or There and Back Again"
+        book.save()
+
+        results = self.backend.search("again", models.Book)
+        self.assertEqual([r.title for r in results], ["The Hobbit, or There and Back Again"])
+
+    def test_index_entry_is_removed_on_delete(self):
+        book = models.Novel.objects.get(title="The Hobbit")
+        entries = self.get_entries(book)
+        self.assertTrue(entries.exists())
+
+        book.delete()
+        self.assertFalse(entries.exists())
+
+    def test_rebuild_removes_stale_entries(self):
+        book = models.Novel.objects.get(title="The Hobbit")
+        entries = self.get_entries(book)
+
+        # Delete the book without updating the index
+        with mock.patch('wagtail.search.index.get_search_backends_with_name', return_value=[]):
+            book.delete()
+        self.assertTrue(entries.exists())
+
+        management.call_command('update_index', backend_name=self.backend_name, stdout=StringIO())
+        self.assertFalse(entries.exists())
+
+
 @override_settings(
     WAGTAILSEARCH_BACKENDS={
         'default': {'BACKEND': 'wagtail.search.backends.db'}
@@ -1,8 +1,12 @@
 import unittest
 
-from django.test import TestCase
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
 
-from .test_backends import BackendTests
+from wagtail.search.models import IndexEntry
+from wagtail.tests.search import models
+
+from .test_backends import BackendTests, IndexEntryBackendTests
 
 
 class TestDBBackend(BackendTests, TestCase):
@@ -62,3 +66,23 @@ class TestDBBackend(BackendTests, TestCase):
     @unittest.expectedFailure
     def test_boost(self):
         super().test_boost()
+
+
+@override_settings(WAGTAILSEARCH_BACKENDS={
+    'default': {
+        'BACKEND': 'wagtail.search.backends.db',
+        'USE_INDEX': True,
+    }
+})
+class TestDBBackendWithIndex(IndexEntryBackendTests, BackendTests, TestCase):
+    backend_path = 'wagtail.search.backends.db'
+
+    def get_entries(self, book):
+        return IndexEntry.objects.filter(
+            content_type=ContentType.objects.get_for_model(models.Novel), object_id=str(book.pk))
+
+    def test_scores_are_ranked_by_term_frequency(self):
+        results = self.backend.search("JavaScript Definitive", models.Book, operator='or').annotate_score('_score')
+        scores = {r.title: r._score for r in results}
+        self.assertGreater(scores["JavaScript: The Definitive Guide"], scores["JavaScript: The good parts"])
+        self.assertGreater(scores["JavaScript: The good parts"], 0)
@@ -1,10 +1,11 @@
 from datetime import date
 from unittest import mock
 
-from django.test import TestCase, override_settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from wagtail.core.models import Page
-from wagtail.search import index
+from wagtail.search import index, index_queue
 from wagtail.tests.search import models
 from wagtail.tests.testapp.models import SimplePage
 from wagtail.tests.utils import WagtailTestUtils
@@ -173,3 +174,121 @@ class TestSignalHandlers(TestCase, WagtailTestUtils):
         indexed_object = backend().add.call_args[0][0]
         self.assertEqual(indexed_object.title, "Updated test")
         self.assertEqual(indexed_object.publication_date, date(2017, 10, 18))
+
+
+@mock.patch('wagtail.search.tests.DummySearchBackend', create=True)
+@override_settings(
+    WAGTAILSEARCH_BACKENDS={
+        'default': {
+            'BACKEND': 'wagtail.search.tests.DummySearchBackend'
+        }
+    },
+    WAGTAILSEARCH_DEFER_INDEX_UPDATES=True,
+)
+class TestDeferredIndexUpdates(TransactionTestCase, WagtailTestUtils):
+    def create_book(self, title="Test"):
+        return models.Book.objects.create(title=title, publication_date=date(2017, 10, 18), number_of_pages=100)
+
+    def test_updates_are_sent_on_commit(self, backend):
+        with transaction.atomic():
+            book = self.create_book()
+            other_book = self.create_book("Other test")
+            book.title = "Updated test"
+            book.save(update_fields=['title'])
+
+            self.assertFalse(backend().add_bulk.mock_calls)
+
+        backend().add_bulk.assert_called_once_with(models.Book, [book, other_book])
+        self.assertFalse(backend().add.mock_calls)
+        self.assertEqual(backend().add_bulk.call_args[0][1][0].title, "Updated test")
+
+    def test_nothing_is_sent_on_rollback(self, backend):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.create_book()
+                raise ValueError
+
+        with transaction.atomic():
+            pass
+
+        self.assertFalse(backend().add_bulk.mock_calls)
+
+    def test_delete_after_update(self, backend):
+        with transaction.atomic():
+            book = self.create_book()
+            book.delete()
+
+        self.assertFalse(backend().add_bulk.mock_calls)
+        self.assertEqual(backend().delete.call_count, 1)
+
+    def test_delete_rolled_back_in_savepoint(self, backend):
+        book = self.create_book()
+        backend().reset_mock()
+
+        with transaction.atomic():
+            book.title = "Updated test"
+            book.save()
+            try:
+                with transaction.atomic():
+                    models.Book.objects.get(pk=book.pk).delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        backend().add_bulk.assert_called_once_with(models.Book, [book])
+        self.assertFalse(backend().delete.mock_calls)
+
+    def test_batch_is_kept_on_connection(self, backend):
+        with transaction.atomic():
+            batch = index_queue.get_batch()
+            self.assertIs(index_queue.get_batch(), batch)
+            self.assertIs(connection._wagtail_index_batch, batch)
+
+        self.assertIsNone(connection._wagtail_index_batch)
+
+    def test_batch_rolled_back_in_savepoint(self, backend):
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.create_book("Rolled back")
+                    raise ValueError
+            except ValueError:
+                pass
+
+            # The batch was discarded with the savepoint, so a new one is started
+            book = self.create_book()
+
+        backend().add_bulk.assert_called_once_with(models.Book, [book])
+
+    def test_new_batch_after_rollback(self, backend):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.create_book("Rolled back")
+                raise ValueError
+
+        with transaction.atomic():
+            book = self.create_book()
+
+        backend().add_bulk.assert_called_once_with(models.Book, [book])
+
+    def test_skips_objects_not_in_indexed_objects(self, backend):
+        with transaction.atomic():
+            models.Novel.objects.create(
+                title="Don't index me!", publication_date=date(2017, 10, 18), number_of_pages=100)
+
+        self.assertFalse(backend().add_bulk.mock_calls)
+
+    def test_objects_are_fetched_from_the_transaction_database(self, backend):
+        book = self.create_book()
+        batch = index_queue.IndexUpdateBatch('default')
+        batch.add_update(book)
+
+        with mock.patch.object(index, 'insert_or_update_objects') as insert_or_update_objects:
+            batch()
+
+        insert_or_update_objects.assert_called_once_with(models.Book, [book.pk], using='default')
+
+    def test_autocommit_updates_are_sent_immediately(self, backend):
+        book = self.create_book()
+
+        backend().add.assert_called_with(book)
@@ -1,9 +1,13 @@
+import datetime
 from contextlib import contextmanager
 
 from django.core import checks
 from django.test import TestCase
+from django.utils import timezone
 
+from wagtail.core.models import Page
 from wagtail.search import index
+from wagtail.tests.testapp.models import EventPage
 from wagtail.tests.search import models
 
 
@@ -92,3 +96,43 @@ class TestSearchFields(TestCase):
             ]
             errors = models.Book.check()
             self.assertEqual(errors, expected_errors)
+
+
+class TestIndexedObjectsModifiedSince(TestCase):
+    fixtures = ['test.json']
+
+    def test_model_without_modified_at_field(self):
+        self.assertIsNone(models.Author.get_indexed_objects_modified_since(timezone.now()))
+
+    def test_pages(self):
+        now = timezone.now()
+        EventPage.objects.update(latest_revision_created_at=now - datetime.timedelta(days=1), last_published_at=None)
+        EventPage.objects.filter(url_path='/home/events/christmas/').update(latest_revision_created_at=now)
+        EventPage.objects.filter(url_path='/home/events/final-event/').update(last_published_at=now)
+
+        self.assertEqual(
+            set(EventPage.get_indexed_objects_modified_since(now).values_list('url_path', flat=True)),
+            {'/home/events/christmas/', '/home/events/final-event/'}
+        )
+
+    def test_unpublished_page(self):
+        now = timezone.now()
+        EventPage.objects.get(url_path='/home/events/christmas/').unpublish()
+
+        self.assertEqual(
+            list(EventPage.get_indexed_objects_modified_since(now).values_list('url_path', flat=True)),
+            ['/home/events/christmas/']
+        )
+
+    def test_moved_pages(self):
+        now = timezone.now()
+        events_index = Page.objects.get(url_path='/home/events/')
+        events_index.move(Page.objects.get(url_path='/home/about-us/'), pos='last-child')
+
+        # The descendants' URL paths have changed too
+        moved_pages = EventPage.get_indexed_objects().filter(url_path__startswith='/home/about-us/events/')
+        self.assertTrue(moved_pages.exists())
+        self.assertEqual(
+            set(EventPage.get_indexed_objects_modified_since(now).values_list('url_path', flat=True)),
+            set(moved_pages.values_list('url_path', flat=True))
+        )
@@ -0,0 +1,269 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.core import management
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from wagtail.search.backends.base import BaseSearchBackend
+from wagtail.search.management.commands.update_index import load_checkpoint, save_checkpoint
+from wagtail.tests.search import models
+
+
+class RecordingIndex:
+    name = 'recording'
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def add_model(self, model):
+        pass
+
+    def add_item(self, item):
+        pass
+
+    def delete_item(self, item):
+        pass
+
+    def refresh(self):
+        pass
+
+    def add_items(self, model, items):
+        if RecordingSearchBackend.fail_after is not None:
+            if RecordingSearchBackend.fail_after == 0:
+                raise ValueError("Indexing failed")
+            RecordingSearchBackend.fail_after -= 1
+
+        RecordingSearchBackend.added.append((model._meta.label, [item.pk for item in items]))
+
+
+class StaleEntriesRecordingIndex(RecordingIndex):
+    def delete_stale_model_entries(self, model):
+        RecordingSearchBackend.stale_entries_deleted.append(model._meta.label)
+
+
+class RecordingIndexRebuilder:
+    def __init__(self, index):
+        self.index = index
+
+    def start(self):
+        RecordingSearchBackend.rebuilds_started += 1
+        return self.index
+
+    def finish(self):
+        pass
+
+
+class RecordingSearchBackend(BaseSearchBackend):
+    index_class = StaleEntriesRecordingIndex
+    rebuilder_class = RecordingIndexRebuilder
+
+    added = []
+    stale_entries_deleted = []
+    rebuilds_started = 0
+    fail_after = None
+
+    def get_index_for_model(self, model):
+        return self.index_class(self)
+
+
+class InProcessPool:
+    # The in-memory test database can't be shared with forked processes, so this runs the
+    # workers' functions in this process
+    instances = []
+
+    def __init__(self, processes, initializer, initargs):
+        self.initargs = initargs
+        self.closed = self.terminated = False
+        InProcessPool.instances.append(self)
+        initializer(*initargs)
+
+    def imap(self, func, iterable):
+        return map(func, iterable)
+
+    def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.terminated = True
+
+    def join(self):
+        pass
+
+
+@override_settings(WAGTAILSEARCH_BACKENDS={
+    'default': {
+        'BACKEND': 'wagtail.search.tests.test_management_commands.RecordingSearchBackend',
+    }
+})
+class TestUpdateIndexCommand(TestCase):
+    fixtures = ['search']
+
+    def setUp(self):
+        RecordingSearchBackend.added = []
+        RecordingSearchBackend.stale_entries_deleted = []
+        RecordingSearchBackend.rebuilds_started = 0
+        RecordingSearchBackend.fail_after = None
+
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.checkpoint_dir)
+        self.checkpoint_path = os.path.join(self.checkpoint_dir, 'checkpoint.json')
+
+    def run_command(self, **options):
+        output = StringIO()
+        management.call_command('update_index', stdout=output, **options)
+        output.seek(0)
+        return output.read()
+
+    def get_added_novels(self):
+        return [
+            pk for label, pks in RecordingSearchBackend.added for pk in pks
+            if label == 'searchtests.Novel'
+        ]
+
+    def test_update_index(self):
+        output = self.run_command(chunk_size=5)
+
+        novel_ids = list(models.Novel.get_indexed_objects().order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self.get_added_novels(), novel_ids)
+        self.assertTrue(all(
+            len(pks) <= 5 for label, pks in RecordingSearchBackend.added
+        ))
+        self.assertIn("%d objects in" % len(novel_ids), output)
+
+    def test_resume_from_checkpoint(self):
+        RecordingSearchBackend.fail_after = 3
+        with self.assertRaises(ValueError):
+            self.run_command(chunk_size=2, checkpoint=self.checkpoint_path)
+
+        self.assertTrue(os.path.exists(self.checkpoint_path))
+        added_before_failure = list(RecordingSearchBackend.added)
+
+        RecordingSearchBackend.fail_after = None
+        output = self.run_command(chunk_size=2, checkpoint=self.checkpoint_path)
+
+        self.assertIn("Resuming rebuild of index recording", output)
+        self.assertEqual(RecordingSearchBackend.rebuilds_started, 1)
+
+        # Each chunk is only added once
+        added_chunks = [(label, tuple(pks)) for label, pks in RecordingSearchBackend.added]
+        self.assertEqual(len(added_chunks), len(set(added_chunks)))
+        self.assertEqual(RecordingSearchBackend.added[:len(added_before_failure)], added_before_failure)
+
+        novel_ids = list(models.Novel.get_indexed_objects().order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self.get_added_novels(), novel_ids)
+
+        # The checkpoint is removed once the rebuild is finished
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def run_command_with_workers(self, **options):
+        InProcessPool.instances = []
+        with mock.patch('wagtail.search.management.commands.update_index.get_context') as get_context:
+            get_context.return_value.Pool = InProcessPool
+            output = self.run_command(workers=2, **options)
+
+        # Workers are forked, and set up their own index rather than sharing this process'
+        get_context.assert_called_with('fork')
+        return output
+
+    def test_workers(self):
+        output = self.run_command_with_workers(chunk_size=2)
+
+        [pool] = InProcessPool.instances
+        self.assertEqual(pool.initargs, ('default', 'recording'))
+        self.assertTrue(pool.closed)
+
+        novel_ids = list(models.Novel.get_indexed_objects().order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self.get_added_novels(), novel_ids)
+        self.assertIn(" %d objects in" % len(novel_ids), output)
+
+    def test_workers_are_terminated_on_error(self):
+        RecordingSearchBackend.fail_after = 1
+        with self.assertRaises(ValueError):
+            self.run_command_with_workers(chunk_size=2)
+
+        [pool] = InProcessPool.instances
+        self.assertTrue(pool.terminated)
+        self.assertFalse(pool.closed)
+
+    def test_checkpoint_with_uuid_primary_key(self):
+        pk = uuid.uuid4()
+        save_checkpoint(self.checkpoint_path, {'default': {'recording': {'model': 'tests.Advert', 'last_pk': pk}}})
+
+        self.assertEqual(load_checkpoint(self.checkpoint_path)['default']['recording']['last_pk'], str(pk))
+
+    def test_invalid_workers(self):
+        with self.assertRaises(CommandError):
+            self.run_command(workers=0)
+
+    @mock.patch.object(models.Book, 'search_modified_at_field', 'publication_date')
+    def test_since(self):
+        since = datetime.date(1990, 1, 1)
+        output = self.run_command(since=since.isoformat())
+
+        novel_ids = list(
+            models.Novel.get_indexed_objects().filter(publication_date__gte=since)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        self.assertTrue(novel_ids)
+        self.assertLess(len(novel_ids), models.Novel.get_indexed_objects().count())
+        self.assertEqual(self.get_added_novels(), novel_ids)
+
+        # The index isn't rebuilt, but entries for deleted objects are removed
+        self.assertEqual(RecordingSearchBackend.rebuilds_started, 0)
+        self.assertIn('searchtests.Book', RecordingSearchBackend.stale_entries_deleted)
+        self.assertNotIn('searchtests.Novel', RecordingSearchBackend.stale_entries_deleted)
+
+        # Models that don't record when they are modified are indexed in full
+        self.assertIn("(no modification time)", output)
+        author_ids = [pk for label, pks in RecordingSearchBackend.added for pk in pks if label == 'searchtests.Author']
+        self.assertEqual(len(author_ids), models.Author.objects.count())
+
+    @mock.patch.object(models.Book, 'search_modified_at_field', 'publication_date')
+    @mock.patch.object(RecordingSearchBackend, 'index_class', RecordingIndex)
+    def test_since_without_stale_entry_removal(self):
+        # Like the Elasticsearch indexes, this one can't remove entries for deleted objects
+        self.run_command(since='1990-01-01')
+
+        self.assertTrue(self.get_added_novels())
+        self.assertEqual(RecordingSearchBackend.stale_entries_deleted, [])
+
+    def test_invalid_since(self):
+        with self.assertRaises(CommandError):
+            self.run_command(since='yesterday')
+
+    @mock.patch.object(models.Book, 'search_modified_at_field', 'publication_date')
+    def test_incremental(self):
+        state_path = os.path.join(self.checkpoint_dir, 'state.json')
+
+        # The first run rebuilds the index
+        self.run_command(incremental=True, state_file=state_path)
+        self.assertEqual(RecordingSearchBackend.rebuilds_started, 1)
+        with open(state_path) as f:
+            last_run = json.load(f)['default']
+
+        # Later runs only index objects modified since the last one
+        RecordingSearchBackend.added = []
+        with open(state_path, 'w') as f:
+            json.dump({'default': '1990-01-01T00:00:00+00:00'}, f)
+        self.run_command(incremental=True, state_file=state_path)
+
+        self.assertEqual(RecordingSearchBackend.rebuilds_started, 1)
+        novel_ids = list(
+            models.Novel.get_indexed_objects().filter(publication_date__gte=datetime.date(1990, 1, 1))
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        self.assertEqual(self.get_added_novels(), novel_ids)
+
+        with open(state_path) as f:
+            self.assertGreater(json.load(f)['default'], last_run)
+
+    def test_incremental_requires_state_file(self):
+        with self.assertRaises(CommandError):
+            self.run_command(incremental=True)
@@ -0,0 +1,58 @@
+import unittest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from wagtail.search.backends.sqlite import get_body_column
+from wagtail.search.models import SQLiteFTSEntry, SQLiteIndexEntry
+from wagtail.tests.search import models
+
+from .test_backends import BackendTests, IndexEntryBackendTests
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "The SQLite search backend requires SQLite")
+@override_settings(WAGTAILSEARCH_BACKENDS={
+    'default': {
+        'BACKEND': 'wagtail.search.backends.sqlite',
+    }
+})
+class TestSQLiteBackend(IndexEntryBackendTests, BackendTests, TestCase):
+    backend_path = 'wagtail.search.backends.sqlite'
+
+    def get_entries(self, book):
+        return SQLiteIndexEntry.objects.filter(
+            content_type=ContentType.objects.get_for_model(models.Novel), object_id=str(book.pk))
+
+    def test_index_is_updated_on_save(self):
+        super().test_index_is_updated_on_save()
+
+        # The object's text is replaced rather than added to
+        entries = self.get_entries(models.Book.objects.get(title__startswith="The Hobbit"))
+        self.assertEqual(SQLiteFTSEntry.objects.filter(entry__in=entries).count(), 1)
+
+    def test_index_entry_is_removed_on_delete(self):
+        super().test_index_entry_is_removed_on_delete()
+
+        # The object's text is removed from the full text table too
+        self.assertFalse(SQLiteFTSEntry.objects.filter(document__match='hobbit').exists())
+
+    def test_accented_characters(self):
+        book = models.Book.objects.get(title="The Hobbit")
+        book.title = "The Hobbit, or Thére and Back Again"
+        book.save()
+
+        results = self.backend.search("there", models.Book)
+        self.assertEqual([r.title for r in results], ["The Hobbit, or Thére and Back Again"])
+
+
+class TestGetBodyColumn(SimpleTestCase):
+    def test_boosts_are_mapped_to_fixed_columns(self):
+        self.assertEqual(get_body_column(20.0), 'body_a')
+        self.assertEqual(get_body_column(10.0), 'body_a')
+        self.assertEqual(get_body_column(2.0), 'body_b')
+        self.assertEqual(get_body_column(1.5), 'body_c')
+        self.assertEqual(get_body_column(1.0), 'body_c')
+        self.assertEqual(get_body_column(None), 'body_c')
+        self.assertEqual(get_body_column(0.5), 'body_d')
+        self.assertEqual(get_body_column(-1.0), 'body_d')
@@ -0,0 +1,49 @@
+# Sendfile "accel" backend
+# This hands the transfer of the file over to the web server with an X-Accel-Redirect (nginx)
+# or X-Sendfile (Apache mod_xsendfile, lighttpd) header, without needing django-sendfile.
+#
+# Settings:
+#   WAGTAIL_SENDFILE_HEADER - the header to send, 'X-Accel-Redirect' (the default) or 'X-Sendfile'
+#   WAGTAIL_SENDFILE_PATH_MAP - a dict mapping directories to where the web server finds them,
+#       e.g. {'/srv/media/': '/protected-media/'} for an internal nginx location. Required for
+#       X-Accel-Redirect; with X-Sendfile, paths outside it are sent unchanged.
+
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+
+def get_header():
+    return getattr(settings, 'WAGTAIL_SENDFILE_HEADER', 'X-Accel-Redirect')
+
+
+def map_path(filename):
+    """
+    Return the value of the sendfile header for the file, by replacing the directory it is in
+    with the prefix WAGTAIL_SENDFILE_PATH_MAP gives for it
+    """
+    filename = os.path.abspath(filename)
+    path_map = getattr(settings, 'WAGTAIL_SENDFILE_PATH_MAP', {})
+
+    # Use the most specific directory if several contain the file
+    for root in sorted(path_map, key=len, reverse=True):
+        root_dir = os.path.join(os.path.abspath(root), '')
+        if filename.startswith(root_dir):
+            path = path_map[root].rstrip('/') + '/' + filename[len(root_dir):].replace(os.sep, '/')
+            # nginx decodes the URI in X-Accel-Redirect, while X-Sendfile takes a plain path
+            return quote(path) if get_header() == 'X-Accel-Redirect' else path
+
+    if get_header() == 'X-Sendfile':
+        return filename
+
+    raise ImproperlyConfigured(
+        "'%s' is not in any of the directories in WAGTAIL_SENDFILE_PATH_MAP" % filename)
+
+
+def sendfile(request, filename, **kwargs):
+    response = HttpResponse()
+    response[get_header()] = map_path(filename)
+    return response
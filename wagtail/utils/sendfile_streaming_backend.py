@@ -1,13 +1,13 @@
 # Sendfile "streaming" backend
-# This is based on sendfiles builtin "simple" backend but uses a StreamingHttpResponse
+# This is based on sendfiles builtin "simple" backend but uses a FileResponse, which WSGI servers
+# that provide wsgi.file_wrapper (such as gunicorn and uWSGI) can send with os.sendfile
 
 import os
 import re
 import stat
 from email.utils import mktime_tz, parsedate_tz
-from wsgiref.util import FileWrapper
 
-from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.http import FileResponse, HttpResponseNotModified
 from django.utils.http import http_date
 
 
@@ -19,7 +19,7 @@ def sendfile(request, filename, **kwargs):
                               statobj[stat.ST_MTIME], statobj[stat.ST_SIZE]):
         return HttpResponseNotModified()
 
-    response = StreamingHttpResponse(FileWrapper(open(filename, 'rb')))
+    response = FileResponse(open(filename, 'rb'))
 
     response["Last-Modified"] = http_date(statobj[stat.ST_MTIME])
     return response